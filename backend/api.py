@@ -4,6 +4,11 @@ REST API Endpoints - Drone Status, Telemetry, and Command Control
 This module defines the REST API endpoints for:
 - /api/status - Current drone status
 - /api/telemetry - Latest telemetry data
+- /api/telemetry/history - Downsampled telemetry history for charts
+- /api/telemetry/stream - Server-Sent Events telemetry for read-only viewers
+- /api/events - Server-Sent Events from the event bus (alerts, command results, ...)
+- /api/flights - Flight recordings (flight recorder) and their exports
+- /api/replay - Replay a recorded flight through the live telemetry hub
 - /api/command - Send control commands to drone
 
 TODO: Implement real status queries from drone hardware
@@ -11,11 +16,27 @@ TODO: Implement command validation and transmission
 TODO: Add authentication checks to all endpoints
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 import json
+import time
 from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+from backend.src.telemetry.store import telemetry_store
+from backend.src.safety.supervisor import safety_supervisor
+from backend.src.streaming.telemetry_hub import hub
+from backend.src.streaming.event_bus import Topic, event_bus, parse_topics
+from backend.src.telemetry.producer import telemetry_producer
+from backend.src.telemetry.recorder import flight_recorder, list_flights, open_flight
+from backend.src.telemetry.replay import flight_replay
+from backend.src.telemetry.export import export_stream
+from backend.src.mission.mission_manager import DEFAULT_CAMERA_FOV_DEG, MissionManager
 
 router = APIRouter()
 
@@ -46,6 +67,8 @@ class TelemetryData(BaseModel):
     yaw_deg: float = 0.0
     battery_voltage_v: float = 12.0
     battery_percent: float = 85.0
+    link_rtt_ms: Optional[float] = None
+    link_loss_percent: float = 0.0
 
 
 class Command(BaseModel):
@@ -54,6 +77,13 @@ class Command(BaseModel):
     params: Optional[dict] = None
 
 
+class ReplayRequest(BaseModel):
+    """Flight replay control (fields used depend on the action)."""
+    flight_id: Optional[str] = None
+    speed: Optional[float] = None       # 1-50x
+    offset_s: Optional[float] = None    # seconds from the start of the flight
+
+
 class CommandResponse(BaseModel):
     """Response from command execution."""
     success: bool
@@ -67,6 +97,7 @@ class MissionWaypoint(BaseModel):
     lat: float
     lon: float
     alt: float = 20.0
+    speed: float = 5.0      # m/s on the leg towards this waypoint
 
 
 class Mission(BaseModel):
@@ -83,6 +114,7 @@ class Mission(BaseModel):
 _drone_status = DroneStatus()
 _telemetry_data = TelemetryData()
 _missions = {}  # {mission_name: Mission}
+_mission_manager = MissionManager()     # same missions as NumPy waypoints (statistics)
 
 
 @router.get("/status", response_model=DroneStatus)
@@ -107,11 +139,234 @@ async def get_telemetry():
     Returns:
         TelemetryData: Latest sensor readings
         
-    TODO: Query actual telemetry from drone hardware/sensors
+    Built from the latest row of the telemetry ring buffer (fed by the
+    flight-controller link); falls back to defaults before the first sample.
+
     TODO: Add authentication check
-    TODO: Implement caching to avoid excessive queries
     """
-    return _telemetry_data
+    row = telemetry_store.latest_dict()
+    if row is None:
+        return _telemetry_data
+    return _row_to_telemetry(row)
+
+
+@router.get("/telemetry/history")
+async def get_telemetry_history(
+    from_ts: Optional[float] = Query(None, alias="from"),
+    to_ts: Optional[float] = Query(None, alias="to"),
+    max_points: int = Query(500, ge=10, le=5000),
+    fields: str = "alt,battery",
+    method: str = "lttb",
+):
+    """
+    Downsampled telemetry history from the ring buffer (charts).
+
+    The live ring holds 12-24 minutes at the FC rate; older windows (the
+    last hour of a flight) are served from its 1 Hz archive ("archive": true).
+
+    ?from= / ?to= are unix seconds; negative values are relative to now
+    (from=-3600 = last hour). Each requested field (alt, speed, battery,
+    ...) comes back as {"t": [...], "v": [...]} with at most max_points
+    points, reduced server-side with LTTB (default) or method=minmax.
+    """
+    now = time.time()
+    if from_ts is not None and from_ts < 0:
+        from_ts = now + from_ts
+    if to_ts is not None and to_ts < 0:
+        to_ts = now + to_ts
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    if not names:
+        raise HTTPException(status_code=400, detail="no fields requested")
+    try:
+        return telemetry_store.history(from_ts, to_ts, names, max_points, method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/telemetry/stream")
+async def stream_telemetry(
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events telemetry stream (EventSource).
+
+    Same messages as /ws (same pre-encoded JSON, no command channel). A
+    reconnecting EventSource sends Last-Event-ID and gets the missed events
+    from the hub's replay buffer; ?last_event_id= does the same for clients
+    that cannot set headers.
+    """
+    if last_event_id is None:
+        last_event_id = request.query_params.get("last_event_id")
+    client = request.client.host if request.client else ""
+    return StreamingResponse(
+        hub.sse_stream(last_event_id, name=client),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/events")
+async def stream_events(request: Request, topics: Optional[str] = None):
+    """
+    Server-Sent Events from the event bus.
+
+    ?topics=alert,system (default: every topic). Each event is named after
+    its topic (EventSource.addEventListener("alert", ...)); "telemetry" is
+    sent as unnamed message events, as on /api/telemetry/stream. Retained
+    topics (system, thermal.stats) are sent immediately on connect.
+    """
+    try:
+        selected = parse_topics(topics)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    telemetry = selected is None or Topic.TELEMETRY.value in selected
+    client = request.client.host if request.client else ""
+    return StreamingResponse(
+        hub.sse_stream(
+            request.headers.get("last-event-id"), name=client, telemetry=telemetry,
+            topics=selected, initial=event_bus.retained(selected),
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/flights")
+async def get_flights():
+    """Recorded flights (index.json summaries) and the recorder state."""
+    return {
+        "recorder": flight_recorder.status(),
+        "flights": list_flights(flight_recorder.directory),
+    }
+
+
+@router.get("/flights/{flight_id}")
+async def get_flight(flight_id: str):
+    """Time span, record counts and command / alert events of one recording."""
+    try:
+        log = open_flight(flight_id, flight_recorder.directory)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Flight '{flight_id}' not found")
+    with log:
+        start, end = log.time_span()
+        return {
+            "flight_id": log.flight_id,
+            "recording": flight_id == flight_recorder.flight_id and flight_recorder.is_running(),
+            "from": start,
+            "to": end,
+            "telemetry_records": len(log),
+            "segments": len(log.segments),
+            "torn_records": log.torn_records,
+            "events": log.events(),
+        }
+
+
+@router.get("/flights/{flight_id}/export")
+async def export_flight(
+    flight_id: str,
+    format: str = "npz",
+    fields: Optional[str] = None,
+    from_ts: Optional[float] = Query(None, alias="from"),
+    to_ts: Optional[float] = Query(None, alias="to"),
+):
+    """
+    Download a recorded flight (streamed, not built in memory).
+
+    ?format=npz (default) | npy (one field) | csv | gpx | kml,
+    ?fields=alt,battery,... (columns or history aliases, default: all),
+    ?from= / ?to= in unix seconds.
+    """
+    try:
+        log = open_flight(flight_id, flight_recorder.directory)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Flight '{flight_id}' not found")
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        stream, media_type, filename = export_stream(log, format, names, from_ts, to_ts)
+    except ValueError as e:
+        log.close()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def body():
+        # the segments stay mapped until the last chunk is sent
+        with log:
+            yield from stream
+
+    return StreamingResponse(
+        body(), media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/replay")
+async def get_replay():
+    """State of the flight replay (position, speed, paused)."""
+    return flight_replay.status()
+
+
+@router.post("/replay/{action}")
+async def control_replay(action: str, req: Optional[ReplayRequest] = None):
+    """
+    Control the flight replay.
+
+    Actions: start (flight_id, speed, offset_s), pause, resume,
+    seek (offset_s), speed (speed), stop. Replayed telemetry goes to the
+    same /ws and SSE clients as live telemetry.
+    """
+    req = req or ReplayRequest()
+    try:
+        if action == "start":
+            if not req.flight_id:
+                raise ValueError("flight_id is required")
+            await flight_replay.start(req.flight_id, req.speed or 1.0, req.offset_s or 0.0)
+        elif action == "pause":
+            flight_replay.pause()
+        elif action == "resume":
+            flight_replay.resume()
+        elif action == "seek":
+            if req.offset_s is None:
+                raise ValueError("offset_s is required")
+            flight_replay.seek(req.offset_s)
+        elif action == "speed":
+            if req.speed is None:
+                raise ValueError("speed is required")
+            flight_replay.set_speed(req.speed)
+        elif action == "stop":
+            await flight_replay.stop()
+        else:
+            raise HTTPException(status_code=404, detail=f"Unknown replay action: {action}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Flight '{req.flight_id}' not found")
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return flight_replay.status()
+
+
+def _row_to_telemetry(row: dict) -> TelemetryData:
+    """Map a telemetry store row onto the REST model."""
+    heading = row['course_deg'] if row['gps_fix'] else row['yaw_deg']
+    return TelemetryData(
+        timestamp=datetime.fromtimestamp(row['ts']).isoformat(),
+        position_lat=row['lat'],
+        position_lon=row['lon'],
+        altitude_m=row['altitude_m'],
+        velocity_mps=row['ground_speed_mps'],
+        heading_deg=heading % 360.0,
+        roll_deg=row['roll_deg'],
+        pitch_deg=row['pitch_deg'],
+        yaw_deg=row['yaw_deg'],
+        battery_voltage_v=row['battery_voltage_v'],
+        battery_percent=row['battery_percent'],
+        link_rtt_ms=None if row['link_rtt_ms'] != row['link_rtt_ms'] else row['link_rtt_ms'],
+        link_loss_percent=row['link_loss_pct'],
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -138,15 +393,195 @@ except ImportError as e:
     _fc = _FakeFC()
 
 # Import UART modules (optional - may fail if hardware not available)
-_UARTLink = None
+_link_manager = None
 _encode_message = None
 _MsgType = None
 try:
-    from backend.src.uart.uart_link import UARTLink as _UARTLink
+    from backend.src.uart.link_manager import link_manager as _link_manager
     from backend.src.uart.protocol import encode_message as _encode_message, MessageType as _MsgType
+    from backend.src.uart.scheduler import Priority as _Priority
 except ImportError as e:
     print(f"Info: UART modules not available (hardware simulation mode): {e}")
 
+# STM32 telemetry frames are copied straight into the ring buffer
+if _link_manager and _MsgType:
+    _link_manager.fc.add_handler(telemetry_store.on_fc_frame, _MsgType.TELEMETRY_DATA)
+
+
+def _on_gps_update(update: dict):
+    """Latch NEO-M8N fixes into the ring buffer and the drone status."""
+    telemetry_store.on_gps_update(update)
+    if 'gps_fix' in update:
+        _drone_status.gps_fix = bool(update['gps_fix'])
+    if 'num_satellites' in update:
+        _drone_status.num_satellites = update['num_satellites']
+
+
+def _on_heartbeat_update(monitor):
+    """Latch FC link RTT / loss into the telemetry rows."""
+    rtt = monitor.last_rtt_ms
+    telemetry_store.update_link(float('nan') if rtt is None else rtt, monitor.loss_pct())
+
+
+def _on_link_lost(info: dict):
+    event_bus.publish(Topic.ALERT, {"level": "critical", "msg": f"Link lost: {info.get('link')}", **info})
+
+
+def _on_link_restored(info: dict):
+    event_bus.publish(Topic.ALERT, {"level": "info", "msg": f"Link restored: {info.get('link')}", **info})
+
+
+def _armed() -> bool:
+    """Armed flag of the latest telemetry row (False before the first one)."""
+    row = telemetry_store.latest_dict()
+    return bool(row and row['armed'])
+
+
+safety_supervisor.armed_state = _armed
+
+if _link_manager:
+    _link_manager.gps.add_handler(_on_gps_update)
+    _link_manager.heartbeat.on_update(_on_heartbeat_update)
+    _link_manager.heartbeat.on_link_lost(safety_supervisor.on_link_lost)
+    _link_manager.heartbeat.on_link_restored(safety_supervisor.on_link_restored)
+    _link_manager.heartbeat.on_link_lost(_on_link_lost)
+    _link_manager.heartbeat.on_link_restored(_on_link_restored)
+
+
+def _system_event() -> dict:
+    """Server-side health summary pushed on Topic.SYSTEM."""
+    heartbeat = _link_manager.heartbeat.status() if _link_manager else {}
+    return {
+        "links": {name: link.state for name, link in _link_manager.links().items()} if _link_manager else {},
+        "fc_link": {k: heartbeat.get(k) for k in ("state", "rtt_ms", "loss_pct")},
+        "links_ok": safety_supervisor.links_ok,
+        "gps_fix": _drone_status.gps_fix,
+        "num_satellites": _drone_status.num_satellites,
+        "telemetry": telemetry_producer.status()["source"],
+        "clients": len(hub.clients) + len(hub.sse_listeners),
+    }
+
+
+# One server-side poll for every dashboard instead of per-tab timers
+event_bus.add_poller(Topic.SYSTEM, _system_event, 2.0)
+
+
+# UI command -> (MessageType, priority lane, coalescing key)
+_COMMAND_ROUTES = {
+    "abort": (_MsgType.ABORT, _Priority.SAFETY, None),
+    "rtl": (_MsgType.RTL, _Priority.SAFETY, None),
+    "land": (_MsgType.LAND, _Priority.SAFETY, None),
+    "arm": (_MsgType.ARM, _Priority.CONTROL, None),
+    "disarm": (_MsgType.DISARM, _Priority.CONTROL, None),
+    "takeoff": (_MsgType.TAKEOFF, _Priority.CONTROL, None),
+    "hover": (_MsgType.HOVER, _Priority.CONTROL, None),
+    "move": (_MsgType.MOVE, _Priority.CONTROL, "move"),
+    "set_speed": (_MsgType.SET_SPEED, _Priority.CONTROL, "speed"),
+} if _MsgType else {}
+
+_DEFAULT_TAKEOFF_ALT_M = 10.0
+PID_ACK_WAIT_S = 1.0    # POST /pid waits this long for the STM32 ACK (0.25 s x 4 attempts)
+
+
+def _config_takeoff_alt_m() -> float:
+    """drone.takeoff_altitude_m from config/system.yaml."""
+    cfg_path = Path(__file__).parent.parent / 'config' / 'system.yaml'
+    try:
+        with open(cfg_path, 'r') as f:
+            cfg = yaml.safe_load(f) or {}
+        alt = cfg.get('drone', {}).get('takeoff_altitude_m')
+        if alt:
+            return float(alt)
+    except Exception as e:
+        print(f"Warning: could not read takeoff altitude from {cfg_path}: {e}")
+    return _DEFAULT_TAKEOFF_ALT_M
+
+
+# Fields filled in when a /command request leaves them out: "takeoff" climbs
+# to the configured altitude, "move" flies there too unless "alt" is given
+# ("lat" / "lon" are always required).
+_TAKEOFF_ALT_M = _config_takeoff_alt_m()
+_COMMAND_DEFAULTS = {
+    "takeoff": {"alt": _TAKEOFF_ALT_M},
+    "move": {"alt": _TAKEOFF_ALT_M},
+}
+
+
+def submit_fc_command(command: str, payload=b''):
+    """
+    Queue a UI command for the flight controller on the shared scheduler.
+
+    ABORT also drops any mission upload still waiting in the bulk lane.
+
+    Returns:
+        Future resolving to the delivery result, or None if the command has
+        no flight-controller equivalent / UART is unavailable.
+
+    Raises:
+        ValueError: malformed payload (missing field, bad value); nothing is sent
+    """
+    route = _COMMAND_ROUTES.get(command)
+    if route is None or not _link_manager:
+        return None
+    msg_type, priority, key = route
+    if command == "abort":
+        _link_manager.commands.cancel_lane(_Priority.BULK)
+    fut = _link_manager.commands.submit(msg_type, payload, priority, key)
+    fut.add_done_callback(lambda f: _publish_command_result(command, f))
+    return fut
+
+
+def _publish_command_result(command: str, fut):
+    """Push every FC delivery result (acked / nacked / timeout) to the UI."""
+    if fut.cancelled():
+        result = {"status": "cancelled"}
+    elif fut.exception() is not None:
+        result = {"status": "error", "error": str(fut.exception())}
+    else:
+        result = fut.result()
+    event_bus.publish(Topic.COMMAND, {"cmd": command, **result})
+
+
+async def run_fc_command(command: str, payload=b''):
+    """submit_fc_command() and wait for the delivery result (None if not sent)."""
+    fut = submit_fc_command(command, payload)
+    return await fut if fut is not None else None
+
+
+def submit_mission_upload(points: list):
+    """
+    Queue a mission upload (clear + one MISSION_ITEM per waypoint) in the
+    bulk lane so it never delays safety commands.
+
+    Returns:
+        Future of the last item, or None if UART is unavailable.
+
+    Raises:
+        ValueError: a waypoint without lat / lon or with a bad value; the
+            whole upload is rejected before anything is queued
+    """
+    if not _link_manager:
+        return None
+    items = []
+    for i, pt in enumerate(points):
+        item = {
+            'index': i,
+            'lat': pt.get('lat'),
+            'lon': pt.get('lon', pt.get('lng')),
+            'alt': pt.get('alt', 20.0),
+            'speed': pt.get('speed', 5.0),
+        }
+        if item['lat'] is None or item['lon'] is None:
+            raise ValueError(f"waypoint {i} has no lat / lon")
+        _encode_message(_MsgType.MISSION_ITEM, item)
+        items.append(item)
+    commands = _link_manager.commands
+    fut = commands.submit(_MsgType.MISSION_CLEAR, b'', _Priority.BULK, key="mission_clear")
+    for i, item in enumerate(items):
+        fut = commands.submit(_MsgType.MISSION_ITEM, item, _Priority.BULK, key=("mission_item", i))
+    fut.add_done_callback(lambda f: _publish_command_result("mission_upload", f))
+    return fut
+
 
 class PIDUpdate(BaseModel):
     axis: str
@@ -172,14 +607,23 @@ async def update_pid(p: PIDUpdate):
     if not ok:
         raise HTTPException(status_code=400, detail=f"Unknown axis: {axis}")
 
-    # forward to MCU (simulated when UART not present)
-    if _UARTLink and _encode_message and _MsgType:
+    # forward to MCU over the shared link (simulated when UART not present)
+    if _link_manager and _encode_message and _MsgType:
         try:
-            uart = _UARTLink()
             payload = { 'axis': axis, 'kp': p.kp, 'ki': p.ki, 'kd': p.kd }
-            data = _encode_message(_MsgType.PID_UPDATE, payload)
-            sent = uart.send(data)
-            return { 'success': True, 'sent_to_mcu': bool(sent), 'pid': _fc.pid_gains[axis] }
+            # Slider drags produce bursts: queued updates for the same axis coalesce
+            fut = _link_manager.commands.submit(_MsgType.PID_UPDATE, payload, _Priority.CONTROL, key=('pid', axis))
+            # sent_to_mcu means acknowledged by the STM32; the wait is bounded
+            # (shielded: a slow ACK still completes the command in the background)
+            try:
+                result = await asyncio.wait_for(asyncio.shield(fut), PID_ACK_WAIT_S)
+                mcu_status = result["status"]
+            except asyncio.TimeoutError:
+                mcu_status = "pending"
+            return {
+                'success': True, 'sent_to_mcu': mcu_status == "acked", 'mcu_status': mcu_status,
+                'link': _link_manager.fc.state, 'pid': _fc.pid_gains[axis],
+            }
         except Exception as e:
             return { 'success': True, 'sent_to_mcu': False, 'pid': _fc.pid_gains[axis], 'warning': str(e) }
     else:
@@ -192,19 +636,43 @@ async def send_command(cmd: Command):
     """
     Send a command to the drone.
 
-    Placeholder implementation: validates and returns a queued command response.
+    Queues the command on the flight-controller scheduler and waits for its
+    ACK (bounded by the scheduler's timeout and retries). "takeoff" needs no
+    params (drone.takeoff_altitude_m); "move" needs {"lat", "lon"} and takes
+    an optional "alt". Missing fields are rejected with success=False.
     """
     try:
         valid_commands = ["arm", "disarm", "takeoff", "land", "move", "rtl", "hover"]
         if cmd.command not in valid_commands:
             return CommandResponse(success=False, message=f"Unknown command: {cmd.command}")
 
-        # TODO: Implement actual command transmission via UART
-        return CommandResponse(success=True, message=f"Command '{cmd.command}' queued", command_id="cmd_001")
+        try:
+            params = {**_COMMAND_DEFAULTS.get(cmd.command, {}), **(cmd.params or {})}
+            fut = submit_fc_command(cmd.command, params or b'')
+        except ValueError as e:
+            return CommandResponse(success=False, message=f"Command '{cmd.command}' rejected: {e}")
+        if fut is None:
+            return CommandResponse(success=True, message=f"Command '{cmd.command}' queued", command_id="cmd_001")
+
+        result = await fut
+        ok = result["status"] in ("acked", "simulated")
+        return CommandResponse(
+            success=ok,
+            message=f"Command '{cmd.command}' {result['status']}",
+            command_id=f"seq_{result['seq']}",
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/links")
+async def get_links():
+    """Connection state of the flight-controller and GPS UART links."""
+    if not _link_manager:
+        return {}
+    return _link_manager.status()
+
+
 @router.post("/status/update")
 async def update_status(status: DroneStatus):
     """
@@ -230,8 +698,26 @@ async def update_telemetry(telemetry: TelemetryData):
         
     TODO: Remove this endpoint in production
     """
-    global _telemetry_data
-    _telemetry_data = telemetry
+    try:
+        ts = datetime.fromisoformat(telemetry.timestamp).timestamp()
+    except ValueError:
+        ts = None
+    telemetry_store.append(
+        ts=ts,
+        lat=telemetry.position_lat,
+        lon=telemetry.position_lon,
+        altitude_m=telemetry.altitude_m,
+        ground_speed_mps=telemetry.velocity_mps,
+        course_deg=telemetry.heading_deg,
+        # a posted position counts as a fix: the heading is read back from
+        # course_deg only with one (yaw otherwise), keep a better fix type
+        gps_fix=telemetry_store.gps()['gps_fix'] or 1,
+        roll_deg=telemetry.roll_deg,
+        pitch_deg=telemetry.pitch_deg,
+        yaw_deg=telemetry.yaw_deg,
+        battery_voltage_v=telemetry.battery_voltage_v,
+        battery_percent=telemetry.battery_percent,
+    )
     return {"message": "Telemetry updated"}
 
 
@@ -255,6 +741,13 @@ async def create_mission(mission: Mission):
         
         # Store mission
         _missions[mission.name] = mission
+        planned = _mission_manager.missions.get(mission.name) or _mission_manager.create_mission(mission.name)
+        planned.set_waypoints(
+            [p.lat for p in mission.points], [p.lon for p in mission.points],
+            [p.alt for p in mission.points], [p.speed for p in mission.points],
+        )
+        # default stats computed now, off the event loop (area raster)
+        await asyncio.get_running_loop().run_in_executor(None, planned.snapshot().stats)
         
         return {
             "success": True,
@@ -283,17 +776,31 @@ async def list_missions():
 
 
 @router.get("/missions/{mission_name}")
-async def get_mission(mission_name: str):
+async def get_mission(
+    mission_name: str,
+    footprint_m: Optional[float] = Query(None, gt=0),
+    fov_deg: float = Query(DEFAULT_CAMERA_FOV_DEG, gt=0, lt=180),
+):
     """
     Get a specific mission by name.
     
     Args:
         mission_name: Name of the mission
+        footprint_m: Camera swath width for the scanned area (default:
+            from fov_deg and the waypoint altitudes)
         
     Returns:
-        Mission: Mission object with waypoints
+        Mission object with waypoints, plus "stats": leg distances, total
+        distance, ETA per waypoint, total time and area scanned (cached
+        until the mission is saved again)
     """
     if mission_name not in _missions:
         raise HTTPException(status_code=404, detail=f"Mission '{mission_name}' not found")
     
-    return _missions[mission_name]
+    mission = _missions[mission_name]
+    planned = _mission_manager.missions[mission_name]
+    # the area raster can take a while: never on the event loop. The snapshot
+    # is taken here, so a concurrent save cannot change the route under it
+    route = planned.snapshot()
+    stats = await asyncio.get_running_loop().run_in_executor(None, route.stats, footprint_m, fov_deg)
+    return {**mission.model_dump(), "stats": stats}
@@ -6,14 +6,21 @@ from pathlib import Path
 # Note: FastAPI Form parsing requires python-multipart
 # Install with: pip install python-multipart
 import json
-import asyncio
 import time
 import secrets
-import math
 from datetime import datetime, timedelta
 from typing import Optional
 from pydantic import BaseModel
-from backend.src.streaming.vedio_heatmap_stream import HeatmapStreamer
+from backend.src.streaming.vedio_heatmap_stream import PALETTES, HeatmapStreamer
+from backend.src.uart.link_manager import link_manager
+from backend.src.telemetry.store import telemetry_store
+from backend.src.streaming.telemetry_hub import hub
+from backend.src.streaming.binary_telemetry import negotiate as negotiate_encoding
+from backend.src.streaming.event_bus import Topic, event_bus, parse_topics
+from backend.src.telemetry.recorder import flight_recorder
+from backend.src.telemetry.replay import flight_replay
+from backend.src.telemetry.producer import telemetry_producer
+from backend.src.safety.supervisor import safety_supervisor
 
 try:
     from config.cablage import GPS, FLIGHT_CONTROLLER as _CABLAGE_FC
@@ -27,8 +34,6 @@ except Exception:
 
 SESSION_TIMEOUT = 86400  # 24 hours
 SESSION_COOKIE_NAME = "sid"
-BASE_LATITUDE = 36.8065  # Tunis
-BASE_LONGITUDE = 10.1815
 STATIC_DIR = Path(__file__).parent.parent / "frontend" / "static"
 LOGIN_DIR = Path(__file__).parent.parent / "frontend" / "login"
 ELECTRICAL_WIRING_DIR = Path(__file__).parent.parent / "frontend" / "Electrical Wiring"
@@ -138,6 +143,7 @@ app.add_middleware(
 
 # Include REST API router (/api/status, /api/telemetry, /api/pid, etc.)
 from backend import api
+from backend.api import run_fc_command, submit_fc_command, submit_mission_upload
 app.include_router(api.router, prefix="/api", tags=["API"])
 
 # Mount static files
@@ -527,11 +533,26 @@ def video_endpoint():
 _heatmap_streamer = HeatmapStreamer(output_size=320, temp_min=18.0, temp_max=45.0)
 
 @app.get("/thermal")
-def thermal_endpoint():
-    """Retourne une image heatmap JPEG de la caméra thermique AMG8833."""
+def thermal_endpoint(request: Request, size: int = 320, quality: int = 85, palette: str = "jet"):
+    """
+    Retourne une image heatmap JPEG de la caméra thermique AMG8833.
+
+    ETag par frame et variante : tant que le capteur n'a pas produit de
+    nouvelle frame, un client qui renvoie If-None-Match reçoit un 304 vide.
+    """
+    if not 16 <= size <= 1024 or not 10 <= quality <= 95:
+        raise HTTPException(status_code=400, detail="size must be 16-1024 and quality 10-95")
+    if palette not in PALETTES:
+        raise HTTPException(status_code=400, detail=f"unknown palette (known: {', '.join(PALETTES)})")
     try:
-        jpeg = _heatmap_streamer.get_jpeg(quality=85)
-        return Response(content=jpeg, media_type="image/jpeg")
+        frame = _heatmap_streamer.latest()
+        etag = _heatmap_streamer.jpeg_etag(frame, size, quality, palette)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Frame-Id": str(frame.frame_id)}
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        jpeg = _heatmap_streamer.get_jpeg(quality=quality, frame=frame, size=size, palette=palette)
+        return Response(content=jpeg, media_type="image/jpeg", headers=headers)
     except Exception as e:
         svg = f"""<?xml version='1.0' encoding='UTF-8'?>
 <svg xmlns='http://www.w3.org/2000/svg' width='320' height='320' viewBox='0 0 320 320'>
@@ -543,53 +564,39 @@ def thermal_endpoint():
 
 @app.get("/thermal/stats")
 def thermal_stats_endpoint():
-    """Retourne les stats de température (min, max, avg, pixels)."""
+    """Retourne les stats de la dernière frame (min, max, avg, pixels, frame_id, ts)."""
     try:
         return _heatmap_streamer.get_stats()
     except Exception as e:
         return {"error": str(e)}
 
+
+# Stats poussées aux clients (/ws, /api/events) : lues dans la frame en cache du thread de capture
+event_bus.add_poller(Topic.THERMAL_STATS, _heatmap_streamer.get_stats, 1.0, blocking=True)
+
 @app.get("/health")
-def health():
+async def health():
     """Health check endpoint."""
     return {
         "ok": True,
         "ws": "/ws",
         "dashboard": "/dashboard",
-        "active_sessions": len(ACTIVE_SESSIONS)
+        "active_sessions": len(ACTIVE_SESSIONS),
+        "links": {name: link.state for name, link in link_manager.links().items()},
+        "fc_link": link_manager.heartbeat.status(),
+        "safety": safety_supervisor.status(),
+        "ws_clients": hub.status(),
+        "telemetry": telemetry_producer.status(),
+        "events": event_bus.status(),
+        "recorder": flight_recorder.status(),
+        "replay": flight_replay.status(),
+        "thermal": _heatmap_streamer.status(),
     }
 
 # ============================================================================
 # WEBSOCKET MANAGEMENT
 # ============================================================================
 
-class ConnectionManager:
-    """Manage WebSocket connections."""
-    def __init__(self):
-        self.active_connections: set = set()
-    
-    async def connect(self, websocket: WebSocket):
-        """Accept and register a new connection."""
-        await websocket.accept()
-        self.active_connections.add(websocket)
-    
-    async def disconnect(self, websocket: WebSocket):
-        """Remove a disconnected client."""
-        self.active_connections.discard(websocket)
-    
-    async def broadcast(self, data: dict):
-        """Broadcast data to all connected clients."""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(data)
-            except Exception:
-                disconnected.append(connection)
-        
-        for connection in disconnected:
-            await self.disconnect(connection)
-
-manager = ConnectionManager()
 
 def get_session_from_headers(headers: dict) -> Optional[str]:
     """Extract session_id from Cookie header."""
@@ -604,7 +611,7 @@ def get_session_from_headers(headers: dict) -> Optional[str]:
 async def websocket_endpoint(websocket: WebSocket):
     """Protected WebSocket endpoint for telemetry + commands.
 
-    Telemetry is broadcast to all clients by demo_telemetry_loop.
+    Telemetry is broadcast to all clients by telemetry_producer.
     Incoming messages are treated as JSON commands:
       { "cmd": "send_route",  "points": [...] }
       { "cmd": "start_flight" }
@@ -623,7 +630,8 @@ async def websocket_endpoint(websocket: WebSocket):
         return
     
     print(f"✓ WS connected: {username}")
-    await manager.connect(websocket)
+    encoding, subprotocol = negotiate_encoding(websocket)
+    await hub.connect(websocket, username, encoding, subprotocol)
     
     try:
         while True:
@@ -631,7 +639,7 @@ async def websocket_endpoint(websocket: WebSocket):
             try:
                 msg = json.loads(raw)
             except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "msg": "Invalid JSON"})
+                hub.send(websocket, {"type": "error", "msg": "Invalid JSON"})
                 continue
 
             cmd = msg.get("cmd", "")
@@ -641,8 +649,12 @@ async def websocket_endpoint(websocket: WebSocket):
                 points = msg.get("points", [])
                 name = msg.get("name", f"mission_{int(time.time())}")
                 print(f"  Route '{name}' with {len(points)} waypoints")
-                # TODO: forward to flight controller via UART
-                await websocket.send_json({
+                try:
+                    submit_mission_upload(points)
+                except ValueError as e:
+                    hub.send(websocket, {"type": "error", "cmd": "send_route", "msg": str(e)})
+                    continue
+                hub.send(websocket, {
                     "type": "ack",
                     "cmd": "send_route",
                     "status": "ok",
@@ -652,33 +664,58 @@ async def websocket_endpoint(websocket: WebSocket):
 
             elif cmd == "start_flight":
                 print(f"  ▶ START FLIGHT requested by {username}")
-                _flight_active = True
-                asyncio.create_task(demo_telemetry_loop())
-                await websocket.send_json({"type": "ack", "cmd": "start_flight", "status": "ok"})
+                await flight_replay.stop()     # live telemetry takes over the hub
+                started = telemetry_producer.start(username)
+                hub.send(websocket, {
+                    "type": "ack", "cmd": "start_flight", "status": "ok",
+                    "already_running": not started,
+                })
 
             elif cmd == "abort":
                 print(f"  ■ ABORT requested by {username}")
-                _flight_active = False
-                await websocket.send_json({"type": "ack", "cmd": "abort", "status": "ok"})
+                result = await run_fc_command("abort")     # safety command first
+                await telemetry_producer.stop_demo()       # live FC telemetry keeps flowing
+                hub.send(websocket, {"type": "ack", "cmd": "abort", "status": "ok", "fc": result})
 
             elif cmd == "rtl":
                 print(f"  ↩ RTL (Return To Launch) requested by {username}")
-                _flight_active = False
-                # TODO: forward to flight controller via UART
-                await websocket.send_json({"type": "ack", "cmd": "rtl", "status": "ok"})
+                result = await run_fc_command("rtl")     # safety command first
+                await telemetry_producer.stop_demo()       # live FC telemetry keeps flowing
+                hub.send(websocket, {"type": "ack", "cmd": "rtl", "status": "ok", "fc": result})
 
             elif cmd == "set_speed":
                 value = msg.get("value", 0)
                 print(f"  Speed → {value} m/s")
-                # TODO: forward to flight controller
-                await websocket.send_json({"type": "ack", "cmd": "set_speed", "value": value})
+                try:
+                    submit_fc_command("set_speed", {"value": value})
+                except ValueError as e:
+                    hub.send(websocket, {"type": "error", "cmd": "set_speed", "msg": str(e)})
+                    continue
+                hub.send(websocket, {"type": "ack", "cmd": "set_speed", "value": value})
+
+            elif cmd == "subscribe":
+                try:
+                    subscription = hub.subscribe(
+                        websocket, msg.get("topics"), msg.get("rate_hz"), parse_topics(msg.get("events")),
+                    )
+                except ValueError as e:
+                    hub.send(websocket, {"type": "error", "cmd": "subscribe", "msg": str(e)})
+                    continue
+                print(f"  Subscription → {subscription}")
+                hub.send(websocket, {"type": "ack", "cmd": "subscribe", "status": "ok", **subscription})
+                # état retenu des topics d'événements abonnés, tout de suite
+                for _, text in event_bus.retained(subscription["events"]):
+                    hub.send(websocket, text)
 
             else:
-                await websocket.send_json({"type": "error", "msg": f"Unknown cmd: {cmd}"})
+                hub.send(websocket, {"type": "error", "msg": f"Unknown cmd: {cmd}"})
 
     except WebSocketDisconnect:
-        await manager.disconnect(websocket)
+        await hub.disconnect(websocket)
         print(f"✓ WS disconnected: {username}")
+    except Exception as e:
+        print(f"WS error: {e}")
+        await hub.disconnect(websocket)
 
 # ============================================================================
 # DEMO TELEMETRY LOOP
@@ -695,36 +732,22 @@ async def startup_event():
         print(f"Flight Controller configured on {_CABLAGE_FC['port']} (PL011)")
     # Demo telemetry loop is disabled by default.
     # It starts only when the frontend sends a 'start_flight' command.
-
-# Global flag to control backend telemetry broadcast
-_flight_active = False
-
-async def demo_telemetry_loop():
-    """Demo loop: broadcast telemetry every 0.5 seconds while flight is active."""
-    global _flight_active
-    counter = 0
-    radius = 0.005
-    
-    while _flight_active:
-        counter += 1
-        angle = (counter * 2.0) % 360
-        
-        lat = BASE_LATITUDE + radius * math.cos(math.radians(angle))
-        lon = BASE_LONGITUDE + radius * math.sin(math.radians(angle))
-        
-        telemetry = {
-            "lat": lat,
-            "lon": lon,
-            "alt": 15.0 + 5.0 * math.sin(math.radians(counter)),
-            "heading": angle,
-            "speed": 2.5,
-            "battery": 85.0,
-            "ts": int(time.time())
-        }
-        
-        await manager.broadcast(telemetry)
-        await asyncio.sleep(0.5)
+    await link_manager.start()
+    await event_bus.start()
+    await flight_recorder.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop telemetry, close the shared UART links and WebSocket clients."""
+    await telemetry_producer.stop()
+    await flight_replay.stop()
+    await event_bus.stop()
+    await flight_recorder.stop()
+    _heatmap_streamer.stop()
+    await hub.close()
+    await link_manager.stop()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=hub.per_message_deflate)
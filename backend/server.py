@@ -10,10 +10,7 @@ This module creates and configures the FastAPI application with:
 - Health endpoints
 """
 
-import asyncio
 import json
-import math
-import time
 from pathlib import Path
 from datetime import datetime
 
@@ -23,6 +20,13 @@ from fastapi.responses import FileResponse, RedirectResponse
 from pydantic import BaseModel
 
 from backend import api, websocket, auth
+from backend.src.uart.link_manager import link_manager
+from backend.src.streaming.telemetry_hub import hub
+from backend.src.telemetry.producer import telemetry_producer
+from backend.src.streaming.event_bus import event_bus
+from backend.src.telemetry.recorder import flight_recorder
+from backend.src.telemetry.replay import flight_replay
+from backend.src.safety.supervisor import safety_supervisor
 
 
 # ============================================================================
@@ -35,55 +39,6 @@ class LoginRequest(BaseModel):
     password: str
 
 
-# ============================================================================
-# Demo Data - SIMULATED TELEMETRY
-# ============================================================================
-
-demo_counter = 0
-
-
-async def demo_telemetry_loop(manager):
-    """
-    Background task: Simulate drone telemetry every 0.5 seconds.
-    This sends demo data from Tunis area.
-    """
-    global demo_counter
-    
-    print("🚁 Demo telemetry loop started (Tunis data)")
-    
-    # Starting position: Tunis, Tunisia
-    base_lat = 36.8065
-    base_lon = 10.1815
-    
-    while True:
-        demo_counter += 1
-        
-        # Simulate a circular flight path
-        angle = (demo_counter * 2.0) % 360  # Degrees
-        radius = 0.001 * (demo_counter % 100)  # km radius
-        
-        # Calculate new position
-        lat = base_lat + radius * math.cos(math.radians(angle))
-        lon = base_lon + radius * math.sin(math.radians(angle))
-        
-        # Create telemetry message
-        telemetry = {
-            "lat": round(lat, 6),
-            "lon": round(lon, 6),
-            "alt": round(10.0 + (demo_counter % 50) * 0.5, 1),
-            "heading": round(angle, 1),
-            "speed": round(2.5 + (demo_counter % 10) * 0.2, 2),
-            "battery": round(85.0 - (demo_counter % 50) * 0.1, 1),
-            "ts": int(time.time())
-        }
-        
-        # Broadcast to all connected WebSocket clients
-        await manager.broadcast(telemetry)
-        
-        # Send telemetry every 0.5 seconds
-        await asyncio.sleep(0.5)
-
-
 # ============================================================================
 # Application Factory
 # ============================================================================
@@ -141,6 +96,21 @@ def create_app() -> FastAPI:
         # Demo telemetry loop is NOT started automatically.
         # It will be triggered by the frontend via WS command.
 
+        # Open the shared UART links (reconnects in the background)
+        await link_manager.start()
+        await event_bus.start()
+        await flight_recorder.start()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        """Stop telemetry, close the shared UART links and WebSocket clients."""
+        await telemetry_producer.stop()
+        await flight_replay.stop()
+        await event_bus.stop()
+        await flight_recorder.stop()
+        await hub.close()
+        await link_manager.stop()
+
     # ========================================================================
     # Authentication Routes
     # ========================================================================
@@ -507,7 +477,15 @@ def create_app() -> FastAPI:
             "service": "RPi Drone Control API",
             "ws": "/ws",
             "dashboard": "/dashboard",
-            "login": "/login"
+            "login": "/login",
+            "links": {name: link.state for name, link in link_manager.links().items()},
+            "fc_link": link_manager.heartbeat.status(),
+            "safety": safety_supervisor.status(),
+            "ws_clients": hub.status(),
+            "telemetry": telemetry_producer.status(),
+            "events": event_bus.status(),
+            "recorder": flight_recorder.status(),
+            "replay": flight_replay.status(),
         }
 
     return app
@@ -521,4 +499,4 @@ app = create_app()
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("backend.server:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("backend.server:app", host="0.0.0.0", port=8000, reload=True, ws_per_message_deflate=hub.per_message_deflate)
@@ -3,11 +3,43 @@ Mission Management - Flight Mission Planning and Execution
 
 Handles mission planning, waypoint management, and mission execution.
 
+Waypoints are stored as NumPy columns (lat, lon, altitude, speed), so the
+mission statistics shown by the UI are array operations over all legs:
+
+  - leg distances: haversine on the WGS-84 mean radius (horizontal metres)
+  - ETA: each leg flown at the speed of the waypoint it leads to
+  - area scanned: union of the camera swaths along the legs, rasterized on
+    a local metric grid (overlapping passes are counted once)
+
+stats() caches its result (a few footprint / FOV variants) until the
+waypoints change. The raster can take a while on long routes: async callers
+take a snapshot() on the event loop and run its stats() in an executor, so
+the computation never sees a half-replaced route.
+
 TODO: Implement mission planning algorithms
 TODO: Add waypoint validation
 TODO: Implement mission state machine
 """
 
+import math
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+EARTH_RADIUS_M = 6371008.8
+DEFAULT_SPEED_MPS = 5.0
+DEFAULT_CAMERA_FOV_DEG = 60.0    # horizontal FOV used when no footprint is given
+MAX_AREA_CELLS = 4_000_000       # raster size bound for area_scanned()
+STATS_CACHE_SIZE = 8             # (footprint, fov) variants kept by stats()
+
+
+def haversine_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in metres (element-wise over arrays, degrees in)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
 
 class WayPoint:
     """A single waypoint in a mission."""
@@ -29,6 +61,134 @@ class WayPoint:
         self.completed = False
 
 
+class WaypointView(NamedTuple):
+    """Read-only snapshot of a stored waypoint (see Mission.waypoints)."""
+    lat: float
+    lon: float
+    altitude: float
+    speed: float
+    completed: bool
+
+
+class RouteSnapshot:
+    """
+    Read-only copy of a mission's waypoint columns, taken by
+    Mission.snapshot(). All the statistics are computed from it, so they
+    can run in an executor thread while the mission is edited.
+    """
+
+    __slots__ = ("lat", "lon", "altitude", "speed", "_cache")
+
+    def __init__(self, lat, lon, altitude, speed, cache: Dict[tuple, dict]):
+        for name, column in (("lat", lat), ("lon", lon), ("altitude", altitude), ("speed", speed)):
+            column = column.view()
+            column.flags.writeable = False
+            setattr(self, name, column)
+        self._cache = cache     # the mission's cache for these waypoints
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def leg_distances(self) -> np.ndarray:
+        """Horizontal length of each leg in metres (len - 1 values)."""
+        return haversine_m(self.lat[:-1], self.lon[:-1], self.lat[1:], self.lon[1:])
+
+    def leg_times(self) -> np.ndarray:
+        """Flight time of each leg in seconds (leg i flown at the speed of waypoint i + 1)."""
+        speed = self.speed[1:]
+        with np.errstate(divide='ignore'):
+            return np.where(speed > 0, self.leg_distances() / np.where(speed > 0, speed, 1.0), np.inf)
+
+    def swath_widths(self, footprint_m: Optional[float] = None,
+                     fov_deg: float = DEFAULT_CAMERA_FOV_DEG) -> np.ndarray:
+        """
+        Camera swath width of each leg in metres: footprint_m if given,
+        otherwise the ground width seen at the leg's mean altitude.
+        """
+        if footprint_m is not None:
+            return np.full(max(len(self) - 1, 0), float(footprint_m))
+        mean_alt = np.maximum((self.altitude[:-1] + self.altitude[1:]) / 2, 0.0)
+        return 2.0 * mean_alt * math.tan(math.radians(fov_deg) / 2)
+
+    def area_scanned(self, footprint_m: Optional[float] = None,
+                     fov_deg: float = DEFAULT_CAMERA_FOV_DEG) -> float:
+        """
+        Ground area covered by the camera along the route in m² (union of
+        the swaths, so crossings and overlapping passes count once).
+        """
+        if len(self) < 2:
+            return 0.0
+        widths = self.swath_widths(footprint_m, fov_deg)
+        if not np.any(widths > 0):
+            return 0.0
+        # local metric plane around the route (equirectangular)
+        lat0 = math.radians(float(self.lat.mean()))
+        x = np.radians(self.lon - self.lon.mean()) * EARTH_RADIUS_M * math.cos(lat0)
+        y = np.radians(self.lat - self.lat.mean()) * EARTH_RADIUS_M
+        half = widths / 2
+        margin = float(half.max())
+        x_min, y_min = x.min() - margin, y.min() - margin
+        span_x, span_y = x.max() + margin - x_min, y.max() + margin - y_min
+        # cell size: a tenth of the narrowest swath, coarser if the grid would get too large
+        cell = max(float(half[half > 0].min()) / 5, math.sqrt(span_x * span_y / MAX_AREA_CELLS))
+        nx, ny = int(span_x / cell) + 1, int(span_y / cell) + 1
+        covered = np.zeros((ny, nx), dtype=bool)
+
+        for i in range(len(self) - 1):
+            if half[i] <= 0:
+                continue
+            ax, ay, bx, by = x[i], y[i], x[i + 1], y[i + 1]
+            c0 = max(int((min(ax, bx) - half[i] - x_min) / cell), 0)
+            c1 = min(int((max(ax, bx) + half[i] - x_min) / cell) + 1, nx)
+            r0 = max(int((min(ay, by) - half[i] - y_min) / cell), 0)
+            r1 = min(int((max(ay, by) + half[i] - y_min) / cell) + 1, ny)
+            px = x_min + (np.arange(c0, c1) + 0.5) * cell
+            py = y_min + (np.arange(r0, r1) + 0.5)[:, None] * cell
+            # distance from the cell centres to segment AB
+            dx, dy = bx - ax, by - ay
+            length2 = dx * dx + dy * dy
+            t = 0.0 if length2 == 0 else np.clip(((px - ax) * dx + (py - ay) * dy) / length2, 0.0, 1.0)
+            dist2 = (px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2
+            covered[r0:r1, c0:c1] |= dist2 <= half[i] ** 2
+        return float(covered.sum()) * cell * cell
+
+    def stats(self, footprint_m: Optional[float] = None, fov_deg: float = DEFAULT_CAMERA_FOV_DEG) -> dict:
+        """
+        Mission statistics for the UI (cached until the waypoints change,
+        at most STATS_CACHE_SIZE footprint / FOV variants). Safe to call from
+        an executor thread.
+
+        Returns:
+            {"waypoints", "leg_distances_m", "total_distance_m", "eta_s"
+             (cumulative time at each waypoint), "total_time_s",
+             "swath_m" (mean), "area_scanned_m2"}
+        """
+        key = (footprint_m, fov_deg)
+        cache = self._cache
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        legs = self.leg_distances()
+        eta = np.concatenate([[0.0], np.cumsum(self.leg_times())]) if len(self) else np.zeros(0)
+        widths = self.swath_widths(footprint_m, fov_deg)
+        total_time = float(eta[-1]) if len(eta) else 0.0
+        stats = {
+            "waypoints": len(self),
+            "leg_distances_m": np.round(legs, 2).tolist(),
+            "total_distance_m": round(float(legs.sum()), 2),
+            "eta_s": np.round(eta, 1).tolist() if np.all(np.isfinite(eta)) else None,
+            "total_time_s": round(total_time, 1) if math.isfinite(total_time) else None,
+            "swath_m": round(float(widths.mean()), 2) if len(widths) else 0.0,
+            "area_scanned_m2": round(self.area_scanned(footprint_m, fov_deg), 1),
+        }
+        # a waypoint change since the snapshot replaced the mission's cache:
+        # this result then lands in the old one and is dropped with it
+        if len(cache) >= STATS_CACHE_SIZE:
+            cache.pop(next(iter(cache)), None)
+        cache[key] = stats
+        return stats
+
+
 class Mission:
     """Flight mission container."""
     
@@ -40,9 +200,34 @@ class Mission:
             name: Mission name
         """
         self.name = name
-        self.waypoints = []
+        self.lat = np.zeros(0)
+        self.lon = np.zeros(0)
+        self.altitude = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.completed = np.zeros(0, dtype=bool)
         self.active = False
         self.current_waypoint_index = 0
+        self._stats: Dict[tuple, dict] = {}     # replaced on every waypoint change
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @property
+    def waypoints(self) -> Tuple[WaypointView, ...]:
+        """
+        Snapshot of the waypoints. Immutable on purpose: use add_waypoint(),
+        set_waypoints() and complete_waypoint() to change the mission.
+        """
+        return tuple(
+            WaypointView(*values) for values in zip(
+                self.lat.tolist(), self.lon.tolist(), self.altitude.tolist(),
+                self.speed.tolist(), self.completed.tolist(),
+            )
+        )
+
+    def complete_waypoint(self, index: int):
+        """Mark waypoint ``index`` as reached."""
+        self.completed[index] = True
     
     def add_waypoint(self, waypoint: WayPoint):
         """
@@ -51,7 +236,68 @@ class Mission:
         Args:
             waypoint: WayPoint to add
         """
-        self.waypoints.append(waypoint)
+        self.lat = np.append(self.lat, waypoint.lat)
+        self.lon = np.append(self.lon, waypoint.lon)
+        self.altitude = np.append(self.altitude, waypoint.altitude)
+        self.speed = np.append(self.speed, waypoint.speed)
+        self.completed = np.append(self.completed, waypoint.completed)
+        self._changed()
+
+    def set_waypoints(self, lat, lon, altitude, speed=DEFAULT_SPEED_MPS):
+        """
+        Replace all waypoints at once.
+
+        Args:
+            lat, lon: Degrees (sequences of equal length)
+            altitude: Metres (sequence or scalar)
+            speed: m/s (sequence or scalar)
+
+        Raises:
+            ValueError: mismatched lengths (the mission is left unchanged)
+        """
+        lat = np.array(lat, dtype=np.float64)
+        lon = np.array(lon, dtype=np.float64)
+        n = len(lat)
+        if len(lon) != n:
+            raise ValueError("lat and lon must have the same length")
+        altitude = np.broadcast_to(np.asarray(altitude, dtype=np.float64), (n,)).copy()
+        speed = np.broadcast_to(np.asarray(speed, dtype=np.float64), (n,)).copy()
+        self.lat, self.lon, self.altitude, self.speed = lat, lon, altitude, speed
+        self.completed = np.zeros(n, dtype=bool)
+        self.current_waypoint_index = 0
+        self._changed()
+
+    def _changed(self):
+        self._stats = {}
+
+    def snapshot(self) -> RouteSnapshot:
+        """
+        Freeze the current waypoints for the statistics. Take it where the
+        mission is edited (the event loop); the snapshot itself can then go
+        to an executor.
+        """
+        return RouteSnapshot(self.lat, self.lon, self.altitude, self.speed, self._stats)
+
+    # ------------------------------------------------------------------
+    # Statistics (see RouteSnapshot)
+    # ------------------------------------------------------------------
+    def leg_distances(self) -> np.ndarray:
+        return self.snapshot().leg_distances()
+
+    def leg_times(self) -> np.ndarray:
+        return self.snapshot().leg_times()
+
+    def swath_widths(self, footprint_m: Optional[float] = None,
+                     fov_deg: float = DEFAULT_CAMERA_FOV_DEG) -> np.ndarray:
+        return self.snapshot().swath_widths(footprint_m, fov_deg)
+
+    def area_scanned(self, footprint_m: Optional[float] = None,
+                     fov_deg: float = DEFAULT_CAMERA_FOV_DEG) -> float:
+        return self.snapshot().area_scanned(footprint_m, fov_deg)
+
+    def stats(self, footprint_m: Optional[float] = None, fov_deg: float = DEFAULT_CAMERA_FOV_DEG) -> dict:
+        """Mission statistics for the UI (see RouteSnapshot.stats). Async callers: snapshot() first."""
+        return self.snapshot().stats(footprint_m, fov_deg)
     
     def start(self) -> bool:
         """
@@ -63,7 +309,7 @@ class Mission:
         TODO: Add validation
         TODO: Transmit mission to drone
         """
-        print(f"TODO: Start mission '{self.name}' with {len(self.waypoints)} waypoints")
+        print(f"TODO: Start mission '{self.name}' with {len(self)} waypoints")
         self.active = True
         return True
     
@@ -3,11 +3,19 @@ Safety Supervisor - Safety-Critical System Monitoring
 
 Implements safety checks, failsafe logic, and emergency procedures.
 
-TODO: Implement watchdog timers
+Link health: HeartbeatMonitor (uart/heartbeat.py) reports flight
+controller link-lost / restored events through on_link_lost() and
+on_link_restored(); a lost link is reported as a constraint violation and,
+while the vehicle is armed (armed_state), triggers the failsafe.
+
 TODO: Add safety constraint checking
 TODO: Implement emergency landing procedures
 """
 
+import time
+from collections import deque
+from typing import Callable, Optional
+
 
 class SafetySupervisor:
     """
@@ -29,6 +37,12 @@ class SafetySupervisor:
             "max_time_airborne_seconds": 3600
         }
         self.violations = []
+        self.links_ok = {}                  # {link name: bool}
+        self.link_events = deque(maxlen=100)
+        # Returns True while the vehicle is armed (wired by the API to the
+        # latest telemetry row); None: unknown, a lost link is only reported
+        self.armed_state: Optional[Callable[[], bool]] = None
+        self.failsafe_at: Optional[float] = None
     
     def check_constraints(self, drone_state: dict) -> bool:
         """
@@ -57,6 +71,11 @@ class SafetySupervisor:
         # Check battery
         if drone_state.get("battery_percent", 100) < self.constraints["min_battery_percent"]:
             self.violations.append("Low battery")
+
+        # Check communication links
+        for name, ok in self.links_ok.items():
+            if not ok:
+                self.violations.append(f"Link lost: {name}")
         
         if self.violations:
             print(f"Safety violations: {self.violations}")
@@ -72,9 +91,44 @@ class SafetySupervisor:
             
         TODO: Implement actual failsafe landing
         """
+        self.failsafe_at = time.time()
         print("TODO: Trigger failsafe emergency landing")
         return True
     
+    def on_link_lost(self, info: dict):
+        """
+        Handle a link-lost event (HeartbeatMonitor): failsafe if armed.
+
+        Args:
+            info: {"link", "reason", "at", ...}
+        """
+        self.links_ok[info.get("link", "fc")] = False
+        try:
+            armed = self.armed_state is not None and bool(self.armed_state())
+        except Exception as e:
+            print(f"Safety: armed state unavailable: {e}")
+            armed = False
+        self.link_events.append({"event": "lost", "armed": armed, **info})
+        print(f"Safety: link lost ({info.get('link')}): {info.get('reason')}")
+        if armed and self.enabled:
+            self.trigger_failsafe()
+
+    def on_link_restored(self, info: dict):
+        """Handle a link-restored event (HeartbeatMonitor)."""
+        self.links_ok[info.get("link", "fc")] = True
+        self.link_events.append({"event": "restored", **info})
+        print(f"Safety: link restored ({info.get('link')})")
+
+    def status(self) -> dict:
+        """Supervisor state for /health."""
+        return {
+            "enabled": self.enabled,
+            "links_ok": dict(self.links_ok),
+            "last_link_event": self.link_events[-1] if self.link_events else None,
+            "failsafe_at": self.failsafe_at,
+            "checked_at": time.time(),
+        }
+
     def set_constraint(self, constraint_name: str, value: float):
         """
         Update a safety constraint.
@@ -85,3 +139,7 @@ class SafetySupervisor:
         """
         if constraint_name in self.constraints:
             self.constraints[constraint_name] = value
+
+
+# Module-level supervisor instance
+safety_supervisor = SafetySupervisor()
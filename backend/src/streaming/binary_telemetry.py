@@ -0,0 +1,204 @@
+"""
+Binary Telemetry - Compact keyframe + delta encoding for /ws
+
+Opt-in alternative to the JSON telemetry messages for constrained links
+(cellular modem, Cloudflare tunnel). Negotiated per connection with either
+
+  - the WebSocket subprotocol "aquawing.bin.v1", or
+  - the query parameter  /ws?encoding=bin
+
+Telemetry then arrives as binary frames; ACKs and errors stay JSON text
+frames. The frames only carry FIELDS (position, battery %, armed): a client
+that subscribes to a topic they cannot represent (attitude, battery voltage,
+link) gets JSON telemetry instead until it subscribes back to such topics.
+All fields are little-endian fixed point:
+
+  KEYFRAME (21 bytes)
+    u8   type      0x4B ('K')
+    u32  ts        Unix time (s)
+    i32  lat       1e-7 deg (INT32_MIN = unknown)
+    i32  lon       1e-7 deg
+    i16  alt       0.1 m
+    u16  heading   0.01 deg
+    u16  speed     0.01 m/s
+    u8   battery   0.5 %
+    u8   flags     bit 0 = armed
+
+  DELTA (14 bytes) - difference to the previous frame sent to *this* client
+    u8   type      0x44 ('D')
+    u8   dts       s
+    i16  dlat      1e-7 deg
+    i16  dlon      1e-7 deg
+    i16  dalt      0.1 m
+    i16  dheading  0.01 deg, wrapped to ±180°
+    i16  dspeed    0.01 m/s
+    u8   battery   0.5 %
+    u8   flags
+
+Deltas are integer differences of the quantized values, so the decoder
+reconstructs them exactly (no drift). A keyframe is sent first, every
+KEYFRAME_INTERVAL frames, and whenever a delta does not fit. Because the
+hub may drop telemetry for a slow client, deltas are computed in that
+client's sender task against what it actually sent.
+
+A JSON message is ~230 bytes, a delta frame 14.
+"""
+
+import math
+import struct
+from typing import Optional, Tuple
+
+SUBPROTOCOL = "aquawing.bin.v1"
+
+KEYFRAME = 0x4B
+DELTA = 0x44
+KEYFRAME_INTERVAL = 50
+
+NO_FIX = -2 ** 31
+
+# /ws message fields carried by the frames
+FIELDS = frozenset(("ts", "lat", "lon", "alt", "heading", "speed", "battery", "armed"))
+
+_KEYFRAME = struct.Struct('<BIiihHHBB')
+_DELTA = struct.Struct('<BBhhhhhBB')
+
+_I16_MIN, _I16_MAX = -32768, 32767
+
+# (ts, lat, lon, alt, heading, speed, battery, flags)
+Quantized = Tuple[int, int, int, int, int, int, int, int]
+
+
+def negotiate(websocket) -> Tuple[str, Optional[str]]:
+    """
+    Pick the telemetry encoding for a connecting WebSocket.
+
+    Returns:
+        (encoding, subprotocol) - encoding is "bin" or "json"; subprotocol
+        must be passed to accept() when the client offered it
+    """
+    offered = websocket.scope.get("subprotocols") or []
+    if SUBPROTOCOL in offered:
+        return "bin", SUBPROTOCOL
+    if websocket.query_params.get("encoding") == "bin":
+        return "bin", None
+    return "json", None
+
+
+def _fixed(value, scale: float, lo: int, hi: int, default: int = 0) -> int:
+    if value is None or value != value:
+        return default
+    return max(lo, min(hi, int(round(value * scale))))
+
+
+def quantize(message: dict) -> Quantized:
+    """Fixed-point view of a /ws telemetry message (store.to_message)."""
+    lat, lon = message.get("lat"), message.get("lon")
+    if lat is None or lon is None or math.isnan(lat) or math.isnan(lon):
+        lat_q = lon_q = NO_FIX
+    else:
+        lat_q = int(round(lat * 1e7))
+        lon_q = int(round(lon * 1e7))
+    return (
+        _fixed(message.get("ts"), 1, 0, 2 ** 32 - 1),
+        lat_q,
+        lon_q,
+        _fixed(message.get("alt"), 10, _I16_MIN, _I16_MAX),
+        _fixed((message.get("heading") or 0.0) % 360.0, 100, 0, 35999),
+        _fixed(message.get("speed"), 100, 0, 65535),
+        _fixed(message.get("battery"), 2, 0, 255),
+        1 if message.get("armed") else 0,
+    )
+
+
+class BinaryTelemetryEncoder:
+    """Per-client keyframe / delta state."""
+
+    __slots__ = ("keyframe_interval", "_last", "_since_key", "keyframes", "deltas")
+
+    def __init__(self, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self._last: Optional[Quantized] = None
+        self._since_key = 0
+        self.keyframes = 0
+        self.deltas = 0
+
+    def encode(self, q: Quantized) -> bytes:
+        """Encode one quantized sample as a keyframe or delta frame."""
+        last = self._last
+        self._last = q
+        if last is not None and self._since_key < self.keyframe_interval - 1:
+            frame = self._delta(last, q)
+            if frame is not None:
+                self._since_key += 1
+                self.deltas += 1
+                return frame
+        self._since_key = 0
+        self.keyframes += 1
+        return _KEYFRAME.pack(KEYFRAME, *q)
+
+    def reset(self):
+        """Start over with a keyframe (after a JSON fallback period)."""
+        self._last = None
+        self._since_key = 0
+
+    def stats(self) -> dict:
+        return {"keyframes": self.keyframes, "deltas": self.deltas}
+
+    @staticmethod
+    def _delta(last: Quantized, q: Quantized) -> Optional[bytes]:
+        if q[1] == NO_FIX or last[1] == NO_FIX:
+            return None
+        dts = q[0] - last[0]
+        if not 0 <= dts <= 255:
+            return None
+        dheading = (q[4] - last[4] + 18000) % 36000 - 18000
+        diffs = (q[1] - last[1], q[2] - last[2], q[3] - last[3], dheading, q[5] - last[5])
+        for d in diffs:
+            if d < _I16_MIN or d > _I16_MAX:
+                return None
+        return _DELTA.pack(DELTA, dts, *diffs, q[6], q[7])
+
+
+class BinaryTelemetryDecoder:
+    """Reference decoder (the dashboard has the same logic in JavaScript)."""
+
+    def __init__(self):
+        self._last: Optional[list] = None
+
+    def decode(self, frame: bytes) -> Optional[dict]:
+        """
+        Decode one binary frame into a telemetry dict.
+
+        Returns:
+            dict with lat, lon, alt, heading, speed, battery, armed, ts -
+            None for a delta received before any keyframe
+        """
+        kind = frame[0]
+        if kind == KEYFRAME:
+            self._last = list(_KEYFRAME.unpack(frame)[1:])
+        elif kind == DELTA:
+            if self._last is None:
+                return None
+            _, dts, dlat, dlon, dalt, dheading, dspeed, battery, flags = _DELTA.unpack(frame)
+            last = self._last
+            last[0] += dts
+            last[1] += dlat
+            last[2] += dlon
+            last[3] += dalt
+            last[4] = (last[4] + dheading) % 36000
+            last[5] += dspeed
+            last[6] = battery
+            last[7] = flags
+        else:
+            raise ValueError(f"unknown binary telemetry frame type 0x{kind:02X}")
+        ts, lat, lon, alt, heading, speed, battery, flags = self._last
+        return {
+            "lat": None if lat == NO_FIX else lat / 1e7,
+            "lon": None if lat == NO_FIX else lon / 1e7,
+            "alt": alt / 10,
+            "heading": heading / 100,
+            "speed": speed / 100,
+            "battery": battery / 2,
+            "armed": bool(flags & 1),
+            "ts": ts,
+        }
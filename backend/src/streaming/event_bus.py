@@ -0,0 +1,222 @@
+"""
+Event Bus - In-process pub/sub for everything pushed to the UI
+
+One bus per process (like the TelemetryHub it sits on). Producers publish a
+payload once on a typed topic; the bus
+
+  - calls in-process subscribers (subscribe(topic, callback))
+  - encodes the event once as {"type": <topic>, ...payload} and hands the
+    text to the hub, which fans it out to the /ws clients subscribed to the
+    topic and to SSE viewers (/api/events, "event: <topic>"). Retained
+    topics are periodic state: a /ws client only keeps the newest one queued
+
+Telemetry keeps its dedicated path: Topic.TELEMETRY is forwarded to
+TelemetryHub.publish() so per-client subscriptions, binary frames,
+batching and the SSE replay buffer still apply.
+
+Values the UI used to poll (system health, thermal stats) are produced by
+pollers: add_poller(topic, fn, interval_s) calls fn once per interval for
+all clients - and only while somebody is connected - instead of every
+browser tab hitting an endpoint on its own timer. The last SYSTEM and
+THERMAL_STATS events are retained and sent to new subscribers right away.
+"""
+
+import asyncio
+import time
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.src.streaming.telemetry_hub import TelemetryHub, encode_json, hub
+
+
+class Topic(str, Enum):
+    """Bus topics (value = "type" field of the pushed message)."""
+
+    TELEMETRY = "telemetry"              # store.to_message() rows (TelemetryProducer)
+    COMMAND = "command"                  # FC command delivery results (scheduler)
+    ALERT = "alert"                      # safety alerts (link lost / restored, ...)
+    SYSTEM = "system"                    # links, FC heartbeat, producer, clients
+    THERMAL_STATS = "thermal.stats"      # AMG8833 min / max / avg
+
+
+# Keys every payload of a topic must carry
+TOPIC_FIELDS: Dict[Topic, Tuple[str, ...]] = {
+    Topic.TELEMETRY: ("lat", "lon", "ts"),
+    Topic.COMMAND: ("cmd", "status"),
+    Topic.ALERT: ("level", "msg"),
+    Topic.SYSTEM: (),
+    Topic.THERMAL_STATS: (),
+}
+
+# Topics whose last event is replayed to new subscribers
+RETAINED = (Topic.SYSTEM, Topic.THERMAL_STATS)
+
+
+def parse_topics(values) -> Optional[List[str]]:
+    """
+    Validate topic names from a client (list or comma-separated str).
+
+    Returns:
+        List of topic values, None if no filter was given
+
+    Raises:
+        ValueError: unknown topic
+    """
+    if values is None:
+        return None
+    if isinstance(values, str):
+        values = [v for v in values.split(",") if v]
+    topics = []
+    for value in values:
+        try:
+            topics.append(Topic(value).value)
+        except ValueError:
+            raise ValueError(f"unknown event topic: {value} (known: {', '.join(t.value for t in Topic)})")
+    return topics
+
+
+class EventBus:
+    """
+    Typed topic bus on top of a TelemetryHub.
+
+    Usage:
+        event_bus.subscribe(Topic.ALERT, callback)
+        event_bus.publish(Topic.ALERT, {"level": "critical", "msg": "Link lost: fc"})
+        event_bus.add_poller(Topic.THERMAL_STATS, streamer.get_stats, 2.0, blocking=True)
+    """
+
+    def __init__(self, hub: TelemetryHub):
+        self.hub = hub
+        self._callbacks: Dict[Topic, List[Callable]] = {t: [] for t in Topic}
+        self._retained: Dict[Topic, str] = {}
+        self._pollers: Dict[Topic, Tuple[Callable, float, bool]] = {}
+        self._tasks: Dict[Topic, asyncio.Task] = {}
+        self._stopping = False
+
+        # Statistics
+        self.published: Dict[str, int] = {t.value: 0 for t in Topic}
+        self.handler_errors = 0
+        self.poll_errors = 0
+
+    # ------------------------------------------------------------------
+    # Publish / subscribe
+    # ------------------------------------------------------------------
+    def subscribe(self, topic: Topic, callback: Callable[[dict], None]):
+        """Call callback(payload) for every event on topic (in the event loop)."""
+        self._callbacks[Topic(topic)].append(callback)
+
+    def unsubscribe(self, topic: Topic, callback: Callable[[dict], None]):
+        try:
+            self._callbacks[Topic(topic)].remove(callback)
+        except ValueError:
+            pass
+
+    def publish(self, topic: Topic, payload: dict) -> None:
+        """
+        Publish one event (never blocks).
+
+        Raises:
+            ValueError: unknown topic or payload missing a required key
+        """
+        topic = Topic(topic)
+        missing = [k for k in TOPIC_FIELDS[topic] if k not in payload]
+        if missing:
+            raise ValueError(f"{topic.value} event missing {', '.join(missing)}")
+
+        if topic is Topic.TELEMETRY:
+            self.hub.publish(payload)
+        else:
+            text = encode_json({"type": topic.value, **payload})
+            if topic in RETAINED:
+                self._retained[topic] = text
+            self.hub.publish_event(topic.value, text, latest_only=topic in RETAINED)
+        self.published[topic.value] += 1
+
+        for callback in list(self._callbacks[topic]):
+            try:
+                callback(payload)
+            except Exception as e:
+                self.handler_errors += 1
+                print(f"Event bus: {topic.value} handler error: {e}")
+
+    def retained(self, topics: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+        """Last (topic, text) of each retained topic, optionally filtered."""
+        return [
+            (topic.value, text) for topic, text in self._retained.items()
+            if topics is None or topic.value in topics
+        ]
+
+    # ------------------------------------------------------------------
+    # Pollers
+    # ------------------------------------------------------------------
+    def add_poller(self, topic: Topic, fn: Callable[[], Optional[dict]], interval_s: float,
+                   blocking: bool = False):
+        """
+        Publish fn() on topic every interval_s while clients are connected.
+
+        Args:
+            fn: Returns the payload (None = nothing to publish this time)
+            blocking: fn does I/O (sensor read) - run it in the default executor
+        """
+        self._pollers[Topic(topic)] = (fn, interval_s, blocking)
+
+    async def start(self):
+        """Start the pollers (server startup)."""
+        loop = asyncio.get_running_loop()
+        self._stopping = False
+        for topic, (fn, interval_s, blocking) in self._pollers.items():
+            task = self._tasks.get(topic)
+            if task is not None and not task.done() and task.get_loop() is loop:
+                continue
+            self._tasks[topic] = loop.create_task(
+                self._poll(topic, fn, interval_s, blocking), name=f"event-poller-{topic.value}"
+            )
+
+    async def stop(self):
+        """Stop the pollers (server shutdown)."""
+        self._stopping = True
+        tasks, self._tasks = self._tasks, {}
+        loop = asyncio.get_running_loop()
+        for task in tasks.values():
+            task.cancel()
+        for task in tasks.values():
+            if task.get_loop() is loop:
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    def status(self) -> dict:
+        """Bus statistics for /health."""
+        return {
+            "published": dict(self.published),
+            "subscribers": {t.value: len(cbs) for t, cbs in self._callbacks.items() if cbs},
+            "pollers": {
+                t.value: {"interval_s": interval_s, "running": t in self._tasks and not self._tasks[t].done()}
+                for t, (_, interval_s, _) in self._pollers.items()
+            },
+            "handler_errors": self.handler_errors,
+            "poll_errors": self.poll_errors,
+        }
+
+    # ------------------------------------------------------------------
+    async def _poll(self, topic: Topic, fn: Callable, interval_s: float, blocking: bool):
+        loop = asyncio.get_running_loop()
+        last_error = None
+        while not self._stopping:
+            if self.hub.has_listeners():
+                try:
+                    payload = await loop.run_in_executor(None, fn) if blocking else fn()
+                    if payload is not None:
+                        self.publish(topic, payload)
+                    last_error = None
+                except Exception as e:
+                    self.poll_errors += 1
+                    if str(e) != last_error:    # don't flood the log every interval
+                        print(f"Event bus: {topic.value} poller error: {e}")
+                        last_error = str(e)
+            await asyncio.sleep(interval_s)
+
+
+# Module-level bus (shared by every producer and endpoint)
+event_bus = EventBus(hub)
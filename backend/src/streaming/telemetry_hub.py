@@ -0,0 +1,721 @@
+"""
+Telemetry Hub - Shared WebSocket fan-out
+
+One hub for the whole process (backend/websocket.py and backend/main.py
+both register their /ws clients here). Publishing never awaits a socket:
+
+  - every client has its own sender task and a small bounded queue
+  - publish() appends to each queue and returns immediately; when a client
+    falls behind, its oldest telemetry message is dropped (drop-oldest), so
+    a slow browser on a cellular / tunnel link only ever sees fresher data
+  - control messages (command ACKs, errors) go through a separate queue that
+    is never dropped and is served first
+  - a send that blocks for more than ``send_timeout_s`` closes the client
+
+Each message is serialized once in publish() (orjson when installed,
+json otherwise) and the same str is handed to every client's send_text(),
+so fan-out cost is one deque append per client, independent of how fast the
+clients are. Per-client lag (time from publish() to the socket write) is
+reported by status().
+
+Subscriptions: a client can ask for a subset of the message (topics) at a
+lower rate, e.g. {"cmd": "subscribe", "topics": ["position", "battery"],
+"rate_hz": 2}. The hub skips messages to honour rate_hz and projects the
+fields; each distinct projection is still encoded only once per publish().
+
+Binary clients (see binary_telemetry.py, negotiated at connect) receive
+keyframe / delta frames instead: publish() quantizes the message once and
+each sender task delta-encodes it against what that client last received.
+
+Low-bandwidth links (cloudflared tunnel, 4G): with websocket.batch_window_ms
+in config/system.yaml (or /ws?batch_ms=N per connection) a sender waits that
+long after the first queued telemetry message and sends everything queued
+as one frame - {"type": "batch", "items": [...]} for JSON, concatenated
+fixed-size frames for binary clients. permessage-deflate is negotiated by
+uvicorn (websocket.per_message_deflate); the hub feeds one message in
+DEFLATE_SAMPLE_EVERY to a zlib stream per client to report the compression
+ratio it achieves (a full second compressor would double the CPU cost).
+Control messages wake a sender waiting out its batch window, so ACKs are
+never delayed by batching.
+
+Read-only viewers can use Server-Sent Events instead (GET
+/api/telemetry/stream, see sse_stream()). They get the same pre-encoded JSON
+text; each event carries the publish counter as its id, and the last
+``replay_size`` events are kept so a reconnecting EventSource resumes from
+its Last-Event-ID without a gap.
+
+Other pushed events (command results, alerts, system / thermal stats) come
+from the EventBus (event_bus.py) through publish_event(), to the /ws clients
+that subscribed to their topic (none by default: the dashboard reads them
+from /api/events) and to SSE viewers as named events. On /ws, command
+results and alerts go through the control queue; periodic topics (system /
+thermal stats) keep only their latest event per client, so a slow client
+never accumulates a backlog of stale stats.
+"""
+
+import asyncio
+import json
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import yaml
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from backend.src.streaming.binary_telemetry import FIELDS as BINARY_FIELDS, BinaryTelemetryEncoder, quantize
+
+
+# Subscription topics → fields of the /ws telemetry message (store.to_message).
+# "ts" is always sent.
+TOPICS = {
+    "position": ("lat", "lon", "alt", "heading", "speed"),
+    "attitude": ("roll", "pitch", "yaw"),
+    "battery": ("battery", "voltage"),
+    "status": ("armed",),
+    "link": ("rtt_ms", "link_loss"),
+}
+MAX_RATE_HZ = 50.0
+MAX_BATCH_WINDOW_S = 1.0
+SSE_KEEPALIVE_S = 15.0
+SSE_RETRY_MS = 2000
+DEFLATE_SAMPLE_EVERY = 16     # messages per compression-ratio sample
+
+
+def websocket_config() -> dict:
+    """The websocket section of config/system.yaml ({} if unreadable)."""
+    cfg_path = Path(__file__).parent.parent.parent.parent / 'config' / 'system.yaml'
+    try:
+        with open(cfg_path, 'r') as f:
+            return (yaml.safe_load(f) or {}).get('websocket') or {}
+    except Exception as e:
+        print(f"Warning: could not read websocket config from {cfg_path}: {e}")
+        return {}
+
+
+if orjson is not None:
+    JSON_ENCODER = "orjson"
+
+    def encode_json(message: Any) -> str:
+        """Serialize a message to compact JSON text (NumPy scalars allowed)."""
+        return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+else:
+    JSON_ENCODER = "json"
+
+    def encode_json(message: Any) -> str:
+        """Serialize a message to compact JSON text (same output as send_json)."""
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class HubClient:
+    """One connected WebSocket and its outbound queues."""
+
+    __slots__ = (
+        "websocket", "name", "telemetry", "control", "wake", "task", "connected_at",
+        "sent", "dropped", "last_lag_ms", "max_lag_ms", "send_ms", "bytes_sent",
+        "topics", "fields", "rate_hz", "interval_s", "next_due", "decimated",
+        "encoding", "encoder", "binary", "batch_window_s", "batches", "batched", "batch_wait_ms",
+        "max_batch_wait_ms", "deflate", "_zlib", "deflate_raw", "deflate_bytes", "events",
+        "latest", "superseded",
+    )
+
+    def __init__(self, websocket, name: str, queue_size: int, encoding: str = "json",
+                 batch_window_s: float = 0.0, deflate: bool = False):
+        self.websocket = websocket
+        self.name = name
+        self.encoding = encoding
+        self.encoder = BinaryTelemetryEncoder() if encoding == "bin" else None
+        self.binary = self.encoder is not None     # False: subscription needs JSON
+        self.telemetry: Deque[Tuple[float, Any]] = deque(maxlen=queue_size)
+        self.control: Deque[Tuple[float, str]] = deque()
+        self.latest: Dict[str, Tuple[float, str]] = {}     # periodic bus events, one per topic
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.connected_at = time.time()
+        self.sent = 0
+        self.dropped = 0
+        self.superseded = 0         # periodic events replaced before being sent
+        self.last_lag_ms: Optional[float] = None
+        self.max_lag_ms = 0.0
+        self.send_ms: Optional[float] = None
+        self.bytes_sent = 0
+
+        # Subscription (None = everything at the producer's rate)
+        self.topics: Optional[Tuple[str, ...]] = None
+        self.fields: Optional[Tuple[str, ...]] = None
+        self.rate_hz: Optional[float] = None
+        self.interval_s = 0.0
+        self.next_due = 0.0
+        self.decimated = 0
+        self.events: frozenset = frozenset()        # event bus topics pushed to this client
+
+        # Batching / compression (low-bandwidth links)
+        self.batch_window_s = batch_window_s
+        self.batches = 0
+        self.batched = 0
+        self.batch_wait_ms: Optional[float] = None
+        self.max_batch_wait_ms = 0.0
+        self.deflate = deflate
+        self._zlib = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15) if deflate else None
+        self.deflate_raw = 0        # bytes of the sampled messages
+        self.deflate_bytes = 0      # their estimated compressed size
+
+    def estimate_deflate(self, payload) -> None:
+        """Track the permessage-deflate size of every DEFLATE_SAMPLE_EVERY-th message."""
+        if self._zlib is None or self.sent % DEFLATE_SAMPLE_EVERY != 1:
+            return
+        data = payload.encode() if isinstance(payload, str) else payload
+        self.deflate_raw += len(data)
+        # the extension strips the 4-byte 00 00 FF FF sync-flush tail
+        self.deflate_bytes += len(self._zlib.compress(data)) + len(self._zlib.flush(zlib.Z_SYNC_FLUSH)) - 4
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        queued_at = [q[0][0] for q in (self.control, self.telemetry) if q]
+        queued_at.extend(t for t, _ in self.latest.values())
+        oldest = min(queued_at) if queued_at else None
+        status = {
+            "name": self.name,
+            "encoding": self.encoding if self.encoder is None or self.binary else "bin (json fallback)",
+            "connected_s": round(time.time() - self.connected_at, 1),
+            "queued": len(self.telemetry) + len(self.control) + len(self.latest),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "superseded": self.superseded,
+            "decimated": self.decimated,
+            "bytes_sent": self.bytes_sent,
+            "topics": list(self.topics) if self.topics else None,
+            "rate_hz": self.rate_hz,
+            "events": sorted(self.events),
+            "lag_ms": self.last_lag_ms,
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "backlog_age_ms": round((now - oldest) * 1000.0, 2) if oldest is not None else 0.0,
+            "send_ms": self.send_ms,
+            "batch_window_ms": round(self.batch_window_s * 1000.0, 1),
+            "batches": self.batches,
+            "msgs_per_batch": round(self.batched / self.batches, 2) if self.batches else None,
+            "batch_wait_ms": self.batch_wait_ms,
+            "max_batch_wait_ms": round(self.max_batch_wait_ms, 2),
+            "deflate": self.deflate,
+            "compression_ratio": (
+                round(self.deflate_raw / self.deflate_bytes, 2) if self.deflate_bytes else None
+            ),
+        }
+        if self.encoder is not None:
+            status.update(self.encoder.stats())
+        return status
+
+
+class SSEListener:
+    """One Server-Sent Events stream (read-only, no sender task)."""
+
+    __slots__ = (
+        "name", "events", "wake", "connected_at", "sent", "dropped", "replayed", "closed",
+        "telemetry", "topics",
+    )
+
+    def __init__(self, name: str, queue_size: int, telemetry: bool = True,
+                 topics: Optional[frozenset] = frozenset()):
+        self.name = name
+        self.telemetry = telemetry
+        self.topics = topics            # event bus topics (None = all)
+        # (event id or None, text, event name or None)
+        self.events: Deque[Tuple[Optional[int], str, Optional[str]]] = deque(maxlen=queue_size)
+        self.wake = asyncio.Event()
+        self.connected_at = time.time()
+        self.sent = 0
+        self.dropped = 0
+        self.replayed = 0
+        self.closed = False
+
+    def push(self, event: Tuple[Optional[int], str, Optional[str]]):
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(event)
+        self.wake.set()
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "connected_s": round(time.time() - self.connected_at, 1),
+            "queued": len(self.events),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "replayed": self.replayed,
+            "telemetry": self.telemetry,
+            "topics": sorted(self.topics) if self.topics is not None else None,
+        }
+
+
+class TelemetryHub:
+    """
+    Process-wide WebSocket broadcaster.
+
+    Usage:
+        await hub.connect(websocket, username)
+        hub.publish(telemetry_store.latest_message())
+        hub.send(websocket, {"type": "ack", ...})
+        await hub.disconnect(websocket)
+    """
+
+    def __init__(self, queue_size: int = 8, send_timeout_s: float = 5.0,
+                 batch_window_s: float = 0.0, per_message_deflate: bool = False,
+                 replay_size: int = 100):
+        """
+        Args:
+            queue_size: Telemetry messages buffered per client before dropping the oldest
+            send_timeout_s: A single socket write taking longer closes the client
+            batch_window_s: Default telemetry coalescing window (0 = one frame per message)
+            per_message_deflate: The server negotiates permessage-deflate (metrics only)
+            replay_size: Full messages kept for SSE Last-Event-ID resume
+        """
+        self.queue_size = queue_size
+        self.send_timeout_s = send_timeout_s
+        self.batch_window_s = batch_window_s
+        self.per_message_deflate = per_message_deflate
+        self.clients: Dict[Any, HubClient] = {}
+        self.sse_listeners: List[SSEListener] = []
+        self.replay: Deque[Tuple[int, str]] = deque(maxlen=replay_size)
+
+        # Statistics
+        self.published = 0
+        self.bytes_published = 0
+        self.last_publish_us: Optional[float] = None
+        self.last_encode_us: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+    async def connect(self, websocket, name: str = "", encoding: str = "json",
+                      subprotocol: Optional[str] = None) -> HubClient:
+        """
+        Accept a WebSocket and start its sender task.
+
+        Args:
+            encoding: "json" or "bin" (binary_telemetry.negotiate())
+            subprotocol: Subprotocol to confirm in the handshake
+        """
+        if subprotocol:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
+        return self.register(websocket, name, encoding)
+
+    def register(self, websocket, name: str = "", encoding: str = "json") -> HubClient:
+        """Register an already accepted WebSocket."""
+        client = HubClient(
+            websocket, name, self.queue_size, encoding,
+            batch_window_s=self._batch_window(websocket),
+            deflate=self._deflate_negotiated(websocket),
+        )
+        client.task = asyncio.get_running_loop().create_task(
+            self._sender(client), name=f"ws-sender-{name or id(websocket)}"
+        )
+        self.clients[websocket] = client
+        print(f"✓ WebSocket connected ({name}, {encoding}). Active connections: {len(self.clients)}")
+        return client
+
+    async def disconnect(self, websocket):
+        """Unregister a client and stop its sender task."""
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        if client.task is not None and client.task is not asyncio.current_task() and not client.task.done():
+            client.task.cancel()
+            try:
+                await client.task
+            except (asyncio.CancelledError, Exception):
+                pass
+        print(f"✓ WebSocket disconnected ({client.name}). Active connections: {len(self.clients)}")
+
+    async def close(self):
+        """Disconnect every client and end SSE streams (server shutdown)."""
+        for websocket in list(self.clients):
+            await self.disconnect(websocket)
+        for listener in self.sse_listeners:
+            listener.closed = True
+            listener.wake.set()
+
+    # ------------------------------------------------------------------
+    # Outbound
+    # ------------------------------------------------------------------
+    def publish(self, message: Any) -> int:
+        """
+        Queue a telemetry message for every client (never blocks).
+
+        Args:
+            message: dict (serialized here, once) or pre-encoded JSON str
+
+        Returns:
+            Number of clients the message was queued for
+        """
+        if message is None:
+            return 0
+        t0 = time.perf_counter()
+        now = time.monotonic()
+        self.published += 1
+        encoded: Dict[Optional[tuple], Tuple[float, str]] = {}
+        encode_s = 0.0
+        queued = 0
+        if self.replay.maxlen or self.sse_listeners:
+            # full message: SSE events, the replay buffer and unfiltered /ws clients
+            text = message if isinstance(message, str) else encode_json(message)
+            encode_s += time.perf_counter() - t0
+            encoded[None] = (now, text)
+            self.bytes_published += len(text)
+            self.replay.append((self.published, text))
+            event = (self.published, text, None)
+            for listener in self.sse_listeners:
+                if listener.telemetry:
+                    listener.push(event)
+        for client in self.clients.values():
+            if client.interval_s:
+                if now < client.next_due:
+                    client.decimated += 1
+                    continue
+                # keep the schedule (no drift), but never bank missed slots
+                client.next_due = max(client.next_due + client.interval_s, now)
+            if isinstance(message, str):
+                key = None
+            elif client.binary:
+                key = "bin"
+            else:
+                key = client.fields
+            item = encoded.get(key)
+            if item is None:
+                e0 = time.perf_counter()
+                if isinstance(message, str):
+                    text = message
+                elif key == "bin":
+                    text = quantize(message)    # delta-encoded by the sender
+                elif key is None:
+                    text = encode_json(message)
+                else:
+                    text = encode_json({k: message[k] for k in key if k in message})
+                encode_s += time.perf_counter() - e0
+                item = encoded[key] = (now, text)
+                if key != "bin":
+                    self.bytes_published += len(text)
+            queue = client.telemetry
+            if len(queue) == queue.maxlen:
+                client.dropped += 1         # deque(maxlen) drops the oldest
+            queue.append(item)
+            client.wake.set()
+            queued += 1
+        self.last_encode_us = round(encode_s * 1e6, 1)
+        self.last_publish_us = round((time.perf_counter() - t0) * 1e6, 1)
+        return queued
+
+    async def broadcast(self, message: Any) -> int:
+        """Awaitable alias of publish() for ConnectionManager-style callers."""
+        return self.publish(message)
+
+    def send(self, websocket, message: Any) -> bool:
+        """
+        Queue a control message (ACK, error) for one client; never dropped.
+
+        Returns:
+            False if the client is not registered
+        """
+        client = self.clients.get(websocket)
+        if client is None:
+            return False
+        text = message if isinstance(message, str) else encode_json(message)
+        client.control.append((time.monotonic(), text))
+        client.wake.set()
+        return True
+
+    def publish_event(self, topic: str, text: str, latest_only: bool = False) -> int:
+        """
+        Push an encoded event bus message to interested clients.
+
+        /ws clients subscribed to the topic get it in the control queue
+        (never dropped, not batched), or with latest_only in a one-slot
+        queue per topic that a newer event replaces; SSE viewers as
+        "event: <topic>".
+
+        Args:
+            latest_only: Periodic state (stats) where only the newest event matters
+
+        Returns:
+            Number of clients it was queued for
+        """
+        now = time.monotonic()
+        queued = 0
+        for client in self.clients.values():
+            if topic in client.events:
+                if not latest_only:
+                    client.control.append((now, text))
+                else:
+                    if topic in client.latest:
+                        client.superseded += 1
+                    client.latest[topic] = (now, text)
+                client.wake.set()
+                queued += 1
+        event = (None, text, topic)
+        for listener in self.sse_listeners:
+            if listener.topics is None or topic in listener.topics:
+                listener.push(event)
+                queued += 1
+        return queued
+
+    def has_listeners(self) -> bool:
+        """True while any /ws client or SSE viewer is connected."""
+        return bool(self.clients or self.sse_listeners)
+
+    def subscribe(self, websocket, topics=None, rate_hz=None, events=None) -> dict:
+        """
+        Set a client's subscription.
+
+        Args:
+            websocket: Registered client
+            topics: List of TOPICS names (None / empty = all fields)
+            rate_hz: Max telemetry rate for this client (None / 0 = producer rate)
+            events: Event bus topics to push (None / [] = none)
+
+        Returns:
+            {"topics", "rate_hz", "events"} as applied (+ "encoding"
+            for binary clients)
+
+        Raises:
+            ValueError: unknown client, unknown topic or invalid rate
+        """
+        client = self.clients.get(websocket)
+        if client is None:
+            raise ValueError("client not connected")
+        if topics:
+            if isinstance(topics, str):
+                topics = [topics]
+            unknown = [t for t in topics if t not in TOPICS]
+            if unknown:
+                raise ValueError(f"unknown topic(s): {', '.join(map(str, unknown))} (known: {', '.join(TOPICS)})")
+            client.topics = tuple(dict.fromkeys(topics))
+            fields = ["ts"]
+            for topic in client.topics:
+                fields.extend(TOPICS[topic])
+            client.fields = tuple(dict.fromkeys(fields))
+        else:
+            client.topics = client.fields = None
+        if rate_hz:
+            try:
+                rate_hz = float(rate_hz)
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid rate_hz: {rate_hz!r}")
+            if rate_hz <= 0:
+                raise ValueError(f"invalid rate_hz: {rate_hz!r}")
+            client.rate_hz = min(rate_hz, MAX_RATE_HZ)
+            client.interval_s = 1.0 / client.rate_hz
+        else:
+            client.rate_hz = None
+            client.interval_s = 0.0
+        client.next_due = 0.0
+        client.events = frozenset(events or ())
+        for topic in [t for t in client.latest if t not in client.events]:
+            del client.latest[topic]
+        applied = {
+            "topics": list(client.topics) if client.topics else list(TOPICS),
+            "rate_hz": client.rate_hz,
+            "events": sorted(client.events),
+        }
+        if client.encoder is not None:
+            # fields the binary frames cannot carry: JSON telemetry for this client
+            binary = client.fields is not None and BINARY_FIELDS.issuperset(client.fields)
+            if binary and not client.binary:
+                client.encoder.reset()
+            client.binary = binary
+            applied["encoding"] = "bin" if binary else "json"
+        return applied
+
+    async def sse_stream(self, last_event_id=None, name: str = "", telemetry: bool = True,
+                         topics=frozenset(), initial=()):
+        """
+        Server-Sent Events body for one read-only viewer.
+
+        Args:
+            last_event_id: Last-Event-ID of a reconnecting EventSource; the
+                replay buffer is sent first (all of it if the id is unknown,
+                e.g. after a server restart)
+            name: Label for status()
+            telemetry: Stream telemetry (unnamed "message" events with ids)
+            topics: Event bus topics to stream as named events (None = all)
+            initial: (topic, text) events sent first (retained state)
+
+        Yields:
+            SSE-formatted str chunks (id / data events, keep-alive comments)
+        """
+        listener = SSEListener(
+            name, max(self.queue_size, 16), telemetry,
+            frozenset(topics) if topics is not None else None,
+        )
+        for topic, text in initial:
+            listener.events.append((None, text, topic))
+        try:
+            last_event_id = int(last_event_id) if last_event_id not in (None, "") else None
+        except ValueError:
+            last_event_id = None
+        if last_event_id is not None and telemetry:
+            newest = self.replay[-1][0] if self.replay else 0
+            for event_id, text in self.replay:
+                if event_id > last_event_id or last_event_id > newest:
+                    listener.events.append((event_id, text, None))
+                    listener.replayed += 1
+        self.sse_listeners.append(listener)
+        print(f"✓ SSE stream opened ({name}). SSE clients: {len(self.sse_listeners)}")
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while not listener.closed:
+                if not listener.events:
+                    listener.wake.clear()
+                    try:
+                        await asyncio.wait_for(listener.wake.wait(), SSE_KEEPALIVE_S)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                    continue
+                chunk = []
+                while listener.events:
+                    event_id, text, topic = listener.events.popleft()
+                    if topic is None:
+                        chunk.append(f"id: {event_id}\ndata: {text}\n\n")
+                    else:
+                        chunk.append(f"event: {topic}\ndata: {text}\n\n")
+                listener.sent += len(chunk)
+                yield "".join(chunk)
+        finally:
+            self.sse_listeners.remove(listener)
+            print(f"✓ SSE stream closed ({name}). SSE clients: {len(self.sse_listeners)}")
+
+    def status(self) -> dict:
+        """Hub and per-client statistics for /health."""
+        return {
+            "clients": len(self.clients),
+            "encoder": JSON_ENCODER,
+            "batch_window_ms": round(self.batch_window_s * 1000.0, 1),
+            "per_message_deflate": self.per_message_deflate,
+            "published": self.published,
+            "bytes_published": self.bytes_published,
+            "last_encode_us": self.last_encode_us,
+            "last_publish_us": self.last_publish_us,
+            "per_client": [c.status() for c in self.clients.values()],
+            "sse_clients": [l.status() for l in self.sse_listeners],
+            "replay": {
+                "size": len(self.replay),
+                "first_id": self.replay[0][0] if self.replay else None,
+                "last_id": self.replay[-1][0] if self.replay else None,
+            },
+        }
+
+    # ------------------------------------------------------------------
+    def _batch_window(self, websocket) -> float:
+        query = getattr(websocket, "query_params", None) or {}
+        if "batch_ms" not in query:
+            return self.batch_window_s
+        try:
+            return min(max(float(query["batch_ms"]) / 1000.0, 0.0), MAX_BATCH_WINDOW_S)
+        except ValueError:
+            return self.batch_window_s
+
+    def _deflate_negotiated(self, websocket) -> bool:
+        headers = getattr(websocket, "headers", None) or {}
+        return self.per_message_deflate and "permessage-deflate" in headers.get("sec-websocket-extensions", "")
+
+    async def _sender(self, client: HubClient):
+        websocket = client.websocket
+        try:
+            while True:
+                if not client.control and not client.latest and not client.telemetry:
+                    client.wake.clear()
+                    await client.wake.wait()
+                    continue
+                if client.control:
+                    queued_at, payload = client.control.popleft()
+                    await self._write(client, payload, queued_at)
+                    continue
+                if client.latest:
+                    queued_at, payload = client.latest.pop(next(iter(client.latest)))
+                    await self._write(client, payload, queued_at)
+                    continue
+                if client.batch_window_s:
+                    # coalesce: wait for the window opened by the oldest message
+                    delay = client.telemetry[0][0] + client.batch_window_s - time.monotonic()
+                    if delay > 0:
+                        # woken early by any new message so control ones go out now
+                        client.wake.clear()
+                        try:
+                            await asyncio.wait_for(client.wake.wait(), delay)
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    items = list(client.telemetry)
+                    client.telemetry.clear()
+                    wait_ms = round((time.monotonic() - items[0][0]) * 1000.0, 2)
+                    client.batch_wait_ms = wait_ms
+                    client.max_batch_wait_ms = max(client.max_batch_wait_ms, wait_ms)
+                    client.batches += 1
+                    client.batched += len(items)
+                    for payload in self._batch_payloads(client, [p for _, p in items]):
+                        await self._write(client, payload, items[0][0])
+                    continue
+                queued_at, payload = client.telemetry.popleft()
+                if not isinstance(payload, str):
+                    payload = client.encoder.encode(payload)
+                await self._write(client, payload, queued_at)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            print(f"WebSocket {client.name}: send blocked > {self.send_timeout_s}s, closing")
+            await self._drop(client, close=True)
+        except Exception as e:
+            print(f"Error broadcasting to {client.name}: {e}")
+            await self._drop(client, close=False)
+
+    @staticmethod
+    def _batch_payloads(client: HubClient, payloads: list) -> List[Any]:
+        texts = [p for p in payloads if isinstance(p, str)]
+        samples = [p for p in payloads if not isinstance(p, str)]
+        frames: List[Any] = []
+        if len(texts) == 1:
+            frames.append(texts[0])
+        elif texts:
+            frames.append('{"type":"batch","items":[' + ",".join(texts) + "]}")
+        if samples:
+            # keyframes / deltas are fixed-size, so concatenation is self-delimiting
+            frames.append(b"".join(client.encoder.encode(q) for q in samples))
+        return frames
+
+    async def _write(self, client: HubClient, payload, queued_at: float):
+        t0 = time.monotonic()
+        if isinstance(payload, str):
+            await asyncio.wait_for(client.websocket.send_text(payload), self.send_timeout_s)
+        else:
+            await asyncio.wait_for(client.websocket.send_bytes(payload), self.send_timeout_s)
+        done = time.monotonic()
+        client.sent += 1
+        client.bytes_sent += len(payload)
+        client.estimate_deflate(payload)
+        client.send_ms = round((done - t0) * 1000.0, 2)
+        client.last_lag_ms = round((done - queued_at) * 1000.0, 2)
+        if client.last_lag_ms > client.max_lag_ms:
+            client.max_lag_ms = client.last_lag_ms
+
+    async def _drop(self, client: HubClient, close: bool):
+        if self.clients.get(client.websocket) is client:
+            del self.clients[client.websocket]
+            print(f"✓ WebSocket dropped ({client.name}). Active connections: {len(self.clients)}")
+        if close:
+            try:
+                await client.websocket.close(code=1011, reason="client too slow")
+            except Exception:
+                pass
+
+
+# Module-level hub instance (shared by every /ws endpoint)
+_ws_config = websocket_config()
+hub = TelemetryHub(
+    batch_window_s=float(_ws_config.get('batch_window_ms', 0)) / 1000.0,
+    per_message_deflate=bool(_ws_config.get('per_message_deflate', False)),
+)
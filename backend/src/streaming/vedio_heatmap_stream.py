@@ -5,14 +5,31 @@ Lit la matrice 8×8 via ThermalCamera, interpole en image 320×320,
 applique une colormap « jet » et renvoie un JPEG prêt à servir
 sur l'endpoint /thermal du serveur.
 
+Capture : un seul thread lit le capteur à THERMAL_CAMERA["fps"] et publie
+la dernière frame horodatée (ThermalFrame : frame_id, ts, pixels). Les
+endpoints (/thermal, /thermal/stats, poller thermal.stats) lisent cette
+frame en cache — le bus I2C est lu fps fois par seconde, quel que soit le
+nombre de clients.
+
+Encodage : le JPEG d'une frame est mis en cache par variante (taille,
+qualité, palette) jusqu'à la frame suivante. Entre deux lectures du capteur,
+les requêtes /thermal ne coûtent qu'une recherche dans ce cache — ou un
+304 Not Modified grâce à l'ETag jpeg_etag().
+
 Usage depuis le serveur FastAPI :
     from backend.src.streaming.vedio_heatmap_stream import HeatmapStreamer
     streamer = HeatmapStreamer()
     streamer.start()
-    jpeg_bytes = streamer.get_jpeg()
+    jpeg_bytes = streamer.get_jpeg(size=320, palette="ironbow")
+    frame = streamer.latest()          # frame_id, ts, pixels
 """
 
 import io
+import secrets
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
 import numpy as np
 from PIL import Image
 
@@ -33,7 +50,36 @@ def _jet_colormap(n: int = 256) -> np.ndarray:
         lut[i] = [int(r * 255), int(g * 255), int(b * 255)]
     return lut
 
+def _ramp_colormap(stops, n: int = 256) -> np.ndarray:
+    """LUT RGB (n, 3) uint8 interpolée linéairement entre des couleurs équidistantes."""
+    stops = np.asarray(stops, dtype=np.float64)
+    t = np.linspace(0.0, 1.0, n)
+    at = np.linspace(0.0, 1.0, len(stops))
+    return np.stack([np.interp(t, at, stops[:, c]) for c in range(3)], axis=1).round().astype(np.uint8)
+
 _JET_LUT = _jet_colormap(256)
+_IRONBOW_LUT = _ramp_colormap([(0, 0, 0), (32, 0, 140), (190, 0, 150), (255, 130, 0), (255, 220, 40), (255, 255, 255)])
+_RAINBOW_LUT = _ramp_colormap([(143, 0, 255), (0, 0, 255), (0, 255, 255), (0, 255, 0), (255, 255, 0), (255, 0, 0)])
+_GRAY_LUT = _ramp_colormap([(0, 0, 0), (255, 255, 255)])
+
+# Palettes du frontend (select « thermal-palette ») ; « jet » reste la palette par défaut
+PALETTES = {
+    "jet": _JET_LUT,
+    "rainbow": _RAINBOW_LUT,
+    "ironbow": _IRONBOW_LUT,
+    "grayscale": _GRAY_LUT,
+    "white-hot": _GRAY_LUT,
+}
+
+# Nombre max de variantes JPEG gardées pour la frame courante
+JPEG_CACHE_VARIANTS = 16
+
+
+class ThermalFrame(NamedTuple):
+    """Frame publiée par le thread de capture."""
+    frame_id: int          # compteur croissant (0 = aucune frame)
+    ts: float              # heure de lecture (time.time())
+    pixels: np.ndarray     # (8, 8) float32 °C — ne pas modifier
 
 
 class HeatmapStreamer:
@@ -53,30 +99,115 @@ class HeatmapStreamer:
         self.temp_max = temp_max
         self._camera = ThermalCamera()
         self._started = False
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._latest: Optional[ThermalFrame] = None
+        self._frame_id = 0      # continue après stop() / start()
+        # les frame_id repartent de 1 à chaque démarrage du serveur : l'ETag porte
+        # un identifiant d'instance pour qu'un navigateur n'obtienne pas un 304 périmé
+        self._etag_nonce = secrets.token_hex(4)
+
+        # Cache JPEG de la frame _jpeg_frame_id : (taille, qualité, palette) → bytes
+        self._jpeg_lock = threading.Lock()
+        self._jpeg_frame_id = 0
+        self._jpeg_cache: Dict[Tuple[int, int, str], bytes] = {}
+
+        # Statistiques
+        self.read_errors = 0
+        self.jpeg_encodes = 0
+        self.jpeg_hits = 0
 
     def start(self):
-        """Démarrer le capteur."""
+        """Démarrer le capteur et le thread de capture (sans effet s'il tourne déjà)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
         self._camera.open()
-        self._started = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="thermal-capture", daemon=True)
+        self._thread.start()
 
     def stop(self):
-        """Arrêter le capteur."""
+        """Arrêter le thread de capture puis le capteur."""
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
         self._camera.close()
-        self._started = False
+
+    def _capture_loop(self):
+        """Lit le capteur à camera.fps et publie chaque frame (thread unique)."""
+        period = 1.0 / max(self._camera.fps, 1)
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                pixels = self._camera.read_pixels()
+                pixels.setflags(write=False)
+                with self._new_frame:
+                    self._frame_id += 1
+                    self._latest = ThermalFrame(self._frame_id, time.time(), pixels)
+                    self._new_frame.notify_all()
+            except Exception as e:
+                self.read_errors += 1
+                if self.read_errors == 1 or self.read_errors % 100 == 0:
+                    print(f"[THERMAL] Erreur de lecture ({self.read_errors}) : {e}")
+            next_at += period
+            delay = next_at - time.monotonic()
+            if delay < 0:
+                next_at = time.monotonic()    # en retard : pas de rafale
+                delay = 0
+            self._stop.wait(delay)
 
     # ------------------------------------------------------------------ 
-    def get_frame(self) -> np.ndarray:
-        """Retourne la matrice 8×8 brute (°C)."""
+    def latest(self, timeout: float = 1.0) -> ThermalFrame:
+        """
+        Dernière frame capturée (démarre la capture au premier appel).
+
+        Raises:
+            TimeoutError: aucune frame après timeout secondes
+        """
+        if not self._started:
+            self.start()
+        with self._new_frame:
+            if self._latest is None:
+                self._new_frame.wait_for(lambda: self._latest is not None, timeout)
+            if self._latest is None:
+                raise TimeoutError("no thermal frame captured yet")
+            return self._latest
+
+    def wait_frame(self, after_id: int, timeout: float = 1.0) -> ThermalFrame:
+        """Attendre une frame plus récente que after_id (ou la dernière après timeout)."""
         if not self._started:
             self.start()
-        return self._camera.read_pixels()
+        with self._new_frame:
+            self._new_frame.wait_for(
+                lambda: self._latest is not None and self._latest.frame_id > after_id, timeout
+            )
+        return self.latest()
 
-    def get_heatmap_image(self) -> Image.Image:
+    def get_frame(self) -> np.ndarray:
+        """Retourne la matrice 8×8 brute (°C) de la dernière frame (lecture seule)."""
+        return self.latest().pixels
+
+    def get_heatmap_image(self, frame: Optional[ThermalFrame] = None, size: Optional[int] = None,
+                          palette: str = "jet") -> Image.Image:
         """
-        Lit les pixels, normalise, applique la colormap jet,
-        et redimensionne en image PIL (output_size × output_size).
+        Normalise la frame (défaut : la dernière), applique la colormap
+        (défaut : jet) et redimensionne en image PIL (size × size, défaut output_size).
+
+        Raises:
+            ValueError: palette inconnue
         """
-        pixels = self.get_frame()        # (8, 8) float32
+        lut = self._palette(palette)
+        size = size or self.output_size
+        pixels = (frame or self.latest()).pixels        # (8, 8) float32
 
         # Normaliser entre 0-255
         normed = (pixels - self.temp_min) / max(self.temp_max - self.temp_min, 0.01)
@@ -84,23 +215,80 @@ class HeatmapStreamer:
         indices = (normed * 255).astype(np.uint8)
 
         # Appliquer la colormap
-        rgb = _JET_LUT[indices]          # (8, 8, 3)
+        rgb = lut[indices]          # (8, 8, 3)
 
         # Créer l'image et redimensionner (interpolation bilinéaire)
         img = Image.fromarray(rgb, mode="RGB")
-        img = img.resize((self.output_size, self.output_size), Image.BILINEAR)
+        img = img.resize((size, size), Image.BILINEAR)
         return img
 
-    def get_jpeg(self, quality: int = 85) -> bytes:
+    def get_jpeg(self, quality: int = 85, frame: Optional[ThermalFrame] = None,
+                 size: Optional[int] = None, palette: str = "jet") -> bytes:
         """
         Retourne l'image heatmap encodée en JPEG (bytes).
         C'est ce que le endpoint /thermal renvoie au frontend.
+
+        Chaque variante (size, quality, palette) n'est encodée qu'une fois par
+        frame ; le cache est vidé à l'arrivée d'une frame plus récente.
+
+        Raises:
+            ValueError: palette inconnue
         """
-        img = self.get_heatmap_image()
+        frame = frame or self.latest()
+        key = (size or self.output_size, quality, palette)
+        with self._jpeg_lock:
+            if frame.frame_id == self._jpeg_frame_id and key in self._jpeg_cache:
+                self.jpeg_hits += 1
+                return self._jpeg_cache[key]
+
+        # Encodage hors verrou (deux requêtes simultanées peuvent encoder la même variante)
+        img = self.get_heatmap_image(frame, size=key[0], palette=palette)
         buf = io.BytesIO()
         img.save(buf, format="JPEG", quality=quality)
-        return buf.getvalue()
+        jpeg = buf.getvalue()
+
+        with self._jpeg_lock:
+            self.jpeg_encodes += 1
+            if frame.frame_id > self._jpeg_frame_id:
+                self._jpeg_frame_id = frame.frame_id
+                self._jpeg_cache = {}
+            if frame.frame_id == self._jpeg_frame_id and len(self._jpeg_cache) < JPEG_CACHE_VARIANTS:
+                self._jpeg_cache[key] = jpeg
+        return jpeg
+
+    def jpeg_etag(self, frame: ThermalFrame, size: int, quality: int, palette: str) -> str:
+        """ETag (entre guillemets) du JPEG d'une frame pour une variante donnée."""
+        return f'"{self._etag_nonce}-{frame.frame_id}-{size}-{quality}-{palette}"'
+
+    @staticmethod
+    def _palette(name: str) -> np.ndarray:
+        try:
+            return PALETTES[name]
+        except KeyError:
+            raise ValueError(f"unknown palette: {name} (known: {', '.join(PALETTES)})") from None
 
     def get_stats(self) -> dict:
-        """Retourne les stats de la dernière lecture."""
-        return self._camera.get_temperature_stats()
\ No newline at end of file
+        """Retourne les stats de la dernière frame (sans relire le capteur)."""
+        frame = self.latest()
+        pixels = frame.pixels
+        return {
+            "min_temp": float(np.min(pixels)),
+            "max_temp": float(np.max(pixels)),
+            "avg_temp": float(np.mean(pixels)),
+            "pixels": pixels.tolist(),
+            "frame_id": frame.frame_id,
+            "ts": frame.ts,
+        }
+
+    def status(self) -> dict:
+        """État de la capture pour /health."""
+        frame = self._latest
+        return {
+            "running": self._started,
+            "fps": self._camera.fps,
+            "frame_id": frame.frame_id if frame else 0,
+            "age_s": round(time.time() - frame.ts, 3) if frame else None,
+            "read_errors": self.read_errors,
+            "jpeg_encodes": self.jpeg_encodes,
+            "jpeg_hits": self.jpeg_hits,
+        }
\ No newline at end of file
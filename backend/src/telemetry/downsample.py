@@ -0,0 +1,103 @@
+"""
+Downsampling - Reduce a telemetry series to a chartable number of points
+
+Both methods return the *indices* of the points to keep (sorted, first and
+last point always included), so timestamps and values are taken from the
+same rows:
+
+  - lttb:   Largest-Triangle-Three-Buckets (Steinarsson 2013). Keeps the
+            visual shape of the curve; bucket averages and triangle areas are
+            NumPy operations, only the per-bucket selection is sequential.
+  - minmax: Min and max of every bucket, fully vectorized (reduceat). Keeps
+            every spike, cheaper than LTTB on very long windows.
+
+Series must be free of NaNs (the caller masks them out).
+"""
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection.
+
+    Args:
+        x: Increasing abscissa (timestamps)
+        y: Values
+        n_out: Number of points to keep (>= 3)
+
+    Returns:
+        int64 indices into x / y
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n, dtype=np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets over the points between the fixed first and last one
+    n_buckets = n_out - 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # third triangle vertex of bucket b: average of bucket b + 1 (last point for the last bucket)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for b in range(n_buckets):
+        lo, hi = edges[b], edges[b + 1]
+        xa, ya = x[a], y[a]
+        # twice the triangle area (a, candidate, next bucket average)
+        area = np.abs((xa - next_x[b]) * (y[lo:hi] - ya) - (xa - x[lo:hi]) * (next_y[b] - ya))
+        a = lo + int(area.argmax())
+        out[b + 1] = a
+    return out
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min / max bucketing: the lowest and highest point of (n_out - 2) // 2 buckets.
+
+    Args:
+        x: Increasing abscissa (only its length is used)
+        y: Values
+        n_out: Maximum number of points to keep (>= 4)
+
+    Returns:
+        int64 indices into x / y
+    """
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n, dtype=np.int64)
+    y = np.asarray(y)
+
+    # two points per bucket, plus the first and last point
+    n_buckets = (n_out - 2) // 2
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+    lows = np.minimum.reduceat(y, edges[:-1])
+    highs = np.maximum.reduceat(y, edges[:-1])
+
+    # first occurrence of the bucket's min / max
+    is_low = np.flatnonzero(y == lows[bucket])
+    is_high = np.flatnonzero(y == highs[bucket])
+    first_low = is_low[np.unique(bucket[is_low], return_index=True)[1]]
+    first_high = is_high[np.unique(bucket[is_high], return_index=True)[1]]
+
+    keep = np.union1d(first_low, first_high)
+    if keep[0] != 0:
+        keep = np.insert(keep, 0, 0)
+    if keep[-1] != n - 1:
+        keep = np.append(keep, n - 1)
+    return keep.astype(np.int64)
+
+
+METHODS = {
+    "lttb": lttb,
+    "minmax": minmax,
+}
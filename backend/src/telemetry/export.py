@@ -0,0 +1,280 @@
+"""
+Flight Export - Columnar and track exports of recorded flights
+
+Turns a FlightLog (recorder.py) into files for offline analysis without a
+JSON step:
+
+  npy   one <column>.npy per field (write_npy_columns(), CLI), or a single
+        column streamed over HTTP
+  npz   the selected columns in one uncompressed .npz
+        (pandas: pd.DataFrame(dict(np.load("flight.npz"))))
+  csv   one line per record
+  gpx   GPS track (<trkpt> with elevation and UTC time)
+  kml   LineString of the track (Google Earth)
+
+Every exporter is a generator of bytes chunks walking the memory-mapped
+segments CHUNK_ROWS records at a time, so memory use does not depend on the
+flight length and the API hands it straight to a StreamingResponse. The
+record count needed by the .npy header comes from the segment index, not
+from a pass over the data. GPX / KML skip rows without a position.
+
+CLI:
+    python -m backend.src.telemetry.export 20250101-120000 -f npy -o /tmp/flight
+    python -m backend.src.telemetry.export 20250101-120000 -f csv > flight.csv
+"""
+
+import argparse
+import io
+import sys
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backend.src.telemetry.recorder import FlightLog, open_flight
+from backend.src.telemetry.store import HISTORY_FIELDS, TELEMETRY_DTYPE
+
+
+CHUNK_ROWS = 4096
+
+FORMATS = {
+    # format: (media type, file extension)
+    "npy": ("application/octet-stream", "npy"),
+    "npz": ("application/zip", "npz"),
+    "csv": ("text/csv", "csv"),
+    "gpx": ("application/gpx+xml", "gpx"),
+    "kml": ("application/vnd.google-earth.kml+xml", "kml"),
+}
+
+COLUMNS = TELEMETRY_DTYPE.names
+
+
+def resolve_fields(fields: Optional[Iterable[str]]) -> List[str]:
+    """
+    Column names for an export (HISTORY_FIELDS aliases allowed, default: all).
+
+    Raises:
+        ValueError: unknown field
+    """
+    if not fields:
+        return list(COLUMNS)
+    columns = []
+    for field in fields:
+        column = HISTORY_FIELDS.get(field, field)
+        if column not in COLUMNS:
+            raise ValueError(f"unknown field: {field}")
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def _chunks(log: FlightLog, t0: Optional[float], t1: Optional[float]) -> Iterator[np.ndarray]:
+    for records in log.telemetry(t0, t1):
+        for start in range(0, len(records), CHUNK_ROWS):
+            yield records[start:start + CHUNK_ROWS]
+
+
+def _count(log: FlightLog, t0: Optional[float], t1: Optional[float]) -> int:
+    return sum(len(records) for records in log.telemetry(t0, t1))
+
+
+def _npy_header(dtype: np.dtype, rows: int) -> bytes:
+    out = io.BytesIO()
+    np.lib.format.write_array_header_1_0(out, {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": (rows,),
+    })
+    return out.getvalue()
+
+
+# ----------------------------------------------------------------------
+# Columnar
+# ----------------------------------------------------------------------
+def iter_npy(log: FlightLog, column: str, t0: Optional[float] = None,
+             t1: Optional[float] = None) -> Iterator[bytes]:
+    """One column as a .npy file."""
+    yield _npy_header(TELEMETRY_DTYPE.fields[column][0], _count(log, t0, t1))
+    for chunk in _chunks(log, t0, t1):
+        yield chunk[column].tobytes()
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, non-seekable sink for zipfile; drained after each write."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def iter_npz(log: FlightLog, columns: List[str], t0: Optional[float] = None,
+             t1: Optional[float] = None) -> Iterator[bytes]:
+    """Selected columns as an uncompressed .npz (zip of .npy members)."""
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        for column in columns:
+            with archive.open(f"{column}.npy", "w", force_zip64=True) as member:
+                for piece in iter_npy(log, column, t0, t1):
+                    member.write(piece)
+                    yield sink.take()
+            yield sink.take()
+    yield sink.take()
+
+
+def write_npy_columns(log: FlightLog, out_dir, columns: Optional[List[str]] = None,
+                      t0: Optional[float] = None, t1: Optional[float] = None) -> List[Path]:
+    """Write one <column>.npy per column into out_dir (np.load(..., mmap_mode='r') friendly)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for column in columns or COLUMNS:
+        path = out_dir / f"{column}.npy"
+        with open(path, "wb") as f:
+            for piece in iter_npy(log, column, t0, t1):
+                f.write(piece)
+        paths.append(path)
+    return paths
+
+
+# ----------------------------------------------------------------------
+# Text formats
+# ----------------------------------------------------------------------
+def _csv_format(column: str) -> str:
+    if column == "ts":
+        return "%.3f"
+    if column in ("lat", "lon"):
+        return "%.7f"
+    if TELEMETRY_DTYPE.fields[column][0].kind in "iu":
+        return "%d"
+    return "%.6g"
+
+
+def iter_csv(log: FlightLog, columns: List[str], t0: Optional[float] = None,
+             t1: Optional[float] = None) -> Iterator[bytes]:
+    """Selected columns as CSV (header line first)."""
+    if "ts" not in columns:
+        columns = ["ts", *columns]
+    yield (",".join(columns) + "\n").encode()
+    fmt = ",".join(_csv_format(c) for c in columns)
+    for chunk in _chunks(log, t0, t1):
+        table = np.column_stack([chunk[c].astype(np.float64) for c in columns])
+        out = io.StringIO()
+        np.savetxt(out, table, fmt=fmt)
+        yield out.getvalue().encode()
+
+
+def _track(chunk: np.ndarray) -> np.ndarray:
+    """Rows of a chunk with a usable position."""
+    lat, lon = chunk["lat"], chunk["lon"]
+    valid = np.isfinite(lat) & np.isfinite(lon) & ((lat != 0.0) | (lon != 0.0))
+    return chunk[valid]
+
+
+def iter_gpx(log: FlightLog, t0: Optional[float] = None, t1: Optional[float] = None) -> Iterator[bytes]:
+    """GPS track as GPX 1.1 (elevation = GPS altitude)."""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx version="1.1" creator="AquaWing" xmlns="http://www.topografix.com/GPX/1/1">\n'
+        f'<trk><name>{log.flight_id}</name><trkseg>\n'
+    ).encode()
+    for chunk in _chunks(log, t0, t1):
+        rows = _track(chunk)
+        if not len(rows):
+            continue
+        times = np.datetime_as_string((rows["ts"] * 1000).astype("datetime64[ms]"), unit="ms")
+        yield "".join(
+            f'<trkpt lat="{lat:.7f}" lon="{lon:.7f}"><ele>{ele:.2f}</ele><time>{t}Z</time></trkpt>\n'
+            for lat, lon, ele, t in zip(rows["lat"].tolist(), rows["lon"].tolist(),
+                                        rows["gps_alt_m"].tolist(), times.tolist())
+        ).encode()
+    yield b"</trkseg></trk>\n</gpx>\n"
+
+
+def iter_kml(log: FlightLog, t0: Optional[float] = None, t1: Optional[float] = None) -> Iterator[bytes]:
+    """Track as a KML LineString (altitude above the take-off point)."""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>\n'
+        f'<name>{log.flight_id}</name>\n'
+        '<Placemark><name>Track</name><LineString><altitudeMode>relativeToGround</altitudeMode>\n'
+        '<coordinates>\n'
+    ).encode()
+    for chunk in _chunks(log, t0, t1):
+        rows = _track(chunk)
+        yield "".join(
+            f"{lon:.7f},{lat:.7f},{alt:.2f}\n"
+            for lat, lon, alt in zip(rows["lat"].tolist(), rows["lon"].tolist(), rows["altitude_m"].tolist())
+        ).encode()
+    yield b"</coordinates></LineString></Placemark>\n</Document></kml>\n"
+
+
+def export_stream(log: FlightLog, fmt: str, fields: Optional[Iterable[str]] = None,
+                  t0: Optional[float] = None, t1: Optional[float] = None) -> Tuple[Iterator[bytes], str, str]:
+    """
+    Pick the exporter for a format.
+
+    Returns:
+        (bytes iterator, media type, file name)
+
+    Raises:
+        ValueError: unknown format or field, npy with more than one field
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format: {fmt} (known: {', '.join(FORMATS)})")
+    media_type, ext = FORMATS[fmt]
+    columns = resolve_fields(fields)
+    name = f"{log.flight_id}.{ext}"
+    if fmt == "npy":
+        if len(columns) != 1:
+            raise ValueError("npy exports a single field (use npz for several)")
+        return iter_npy(log, columns[0], t0, t1), media_type, f"{log.flight_id}-{columns[0]}.npy"
+    if fmt == "npz":
+        return iter_npz(log, columns, t0, t1), media_type, name
+    if fmt == "csv":
+        return iter_csv(log, columns, t0, t1), media_type, name
+    if fmt == "gpx":
+        return iter_gpx(log, t0, t1), media_type, name
+    return iter_kml(log, t0, t1), media_type, name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export an AquaWing flight recording")
+    parser.add_argument("flight", help="flight id (backend/logs/flights/<id>) or recording directory")
+    parser.add_argument("-f", "--format", default="npy", choices=list(FORMATS))
+    parser.add_argument("--fields", default="", help="comma-separated columns (default: all)")
+    parser.add_argument("-o", "--output", help="output directory (npy) or file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    path = Path(args.flight)
+    log = FlightLog(path) if path.is_dir() else open_flight(args.flight)
+    fields = [f for f in args.fields.split(",") if f]
+    with log:
+        if args.format == "npy" and len(resolve_fields(fields)) != 1:
+            if not args.output:
+                parser.error("npy with several fields needs -o <directory>")
+            for p in write_npy_columns(log, args.output, resolve_fields(fields)):
+                print(p)
+            return
+        stream, _, _ = export_stream(log, args.format, fields)
+        out = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            for piece in stream:
+                out.write(piece)
+        finally:
+            if args.output:
+                out.close()
+
+
+if __name__ == "__main__":
+    main()
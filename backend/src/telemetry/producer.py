@@ -0,0 +1,210 @@
+"""
+Telemetry Producer - The one task that feeds /ws clients
+
+Started by the "start_flight" WebSocket command and stopped by server
+shutdown. "abort" / "rtl" only stop it while it publishes demo telemetry
+(stop_demo()): with the flight-controller link up, the operator keeps live
+telemetry during the safety manoeuvre. There is exactly one producer per vehicle (one
+vehicle per process, like telemetry_store), so repeated start_flight clicks
+or several operators never multiply the broadcast rate: start() on a
+running producer is a no-op.
+
+Every tick (websocket.telemetry_interval_ms in config/system.yaml) the
+producer publishes the latest telemetry row to the TelemetryHub:
+
+  - source "fc":   the flight-controller link is up, rows come from
+                   TELEMETRY_DATA frames; the producer only publishes, and
+                   a tick with no new row since the last one publishes
+                   nothing (counted as stale_ticks)
+  - source "demo": no hardware, the producer appends a simulated orbit
+                   around Tunis to the store first (to that row only: the
+                   demo position never replaces latched GPS fixes)
+"""
+
+import asyncio
+import math
+import time
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+from backend.src.telemetry.store import TelemetryStore, telemetry_store
+from backend.src.streaming.telemetry_hub import TelemetryHub, hub
+
+
+# Demo telemetry base (Tunis)
+DEMO_BASE_LAT = 36.8065
+DEMO_BASE_LON = 10.1815
+DEMO_RADIUS_DEG = 0.005
+DEMO_TURN_RATE_DPS = 4.0
+
+_DEFAULT_INTERVAL_S = 0.5
+
+
+def _config_interval_s() -> float:
+    """websocket.telemetry_interval_ms from config/system.yaml."""
+    cfg_path = Path(__file__).parent.parent.parent.parent / 'config' / 'system.yaml'
+    try:
+        with open(cfg_path, 'r') as f:
+            cfg = yaml.safe_load(f) or {}
+        interval_ms = cfg.get('websocket', {}).get('telemetry_interval_ms')
+        if interval_ms:
+            return float(interval_ms) / 1000.0
+    except Exception as e:
+        print(f"Warning: could not read telemetry interval from {cfg_path}: {e}")
+    return _DEFAULT_INTERVAL_S
+
+
+class TelemetryProducer:
+    """
+    Lifecycle-managed telemetry broadcast task (start / stop / status).
+    """
+
+    def __init__(
+        self,
+        store: TelemetryStore,
+        hub: TelemetryHub,
+        link=None,
+        interval_s: Optional[float] = None,
+    ):
+        """
+        Args:
+            store: Telemetry ring buffer to publish from
+            hub: Broadcaster
+            link: ManagedLink of the flight controller (None: always demo)
+            interval_s: Publish period (default: config/system.yaml)
+        """
+        self.store = store
+        self.hub = hub
+        self.link = link
+        self.interval_s = interval_s if interval_s is not None else _config_interval_s()
+
+        self.started_by: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.ticks = 0
+        self.stale_ticks = 0        # fc ticks without a new row (nothing published)
+        self.source: Optional[str] = None
+        self._published_count = 0   # store.count at the last publish
+        self._demo_t0 = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, started_by: str = "") -> bool:
+        """
+        Start broadcasting (no-op if already running).
+
+        Returns:
+            True if a new task was started
+        """
+        loop = asyncio.get_running_loop()
+        if self.is_running() and self._task.get_loop() is loop:
+            return False
+        self.started_by = started_by
+        self.started_at = time.time()
+        self.ticks = 0
+        self.stale_ticks = 0
+        self._published_count = self.store.count   # rows from before the start are not news
+        self._demo_t0 = time.monotonic()
+        self._task = loop.create_task(self._run(), name="telemetry-producer")
+        print(f"Telemetry producer started by {started_by or 'server'} ({self.interval_s * 1000:.0f} ms)")
+        return True
+
+    async def stop(self) -> bool:
+        """
+        Stop broadcasting and wait for the task to finish.
+
+        Returns:
+            True if a running task was stopped
+        """
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return False
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        print(f"Telemetry producer stopped after {self.ticks} ticks")
+        return True
+
+    async def stop_demo(self) -> bool:
+        """
+        Stop only if the producer is publishing simulated telemetry (no FC link).
+
+        Returns:
+            True if a running task was stopped
+        """
+        if self.link is not None and self.link.is_connected():
+            return False
+        return await self.stop()
+
+    def status(self) -> dict:
+        """Producer state for /health and WS acks."""
+        return {
+            "running": self.is_running(),
+            "source": self.source if self.is_running() else None,
+            "interval_ms": round(self.interval_s * 1000.0, 1),
+            "ticks": self.ticks,
+            "stale_ticks": self.stale_ticks,
+            "started_by": self.started_by,
+            "started_at": self.started_at,
+        }
+
+    # ------------------------------------------------------------------
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        while True:
+            self._tick()
+            next_at += self.interval_s
+            delay = next_at - loop.time()
+            if delay < 0:
+                next_at = loop.time()   # fell behind: don't burst
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def _tick(self):
+        if self.link is not None and self.link.is_connected():
+            self.source = "fc"
+        else:
+            self.source = "demo"
+            self._append_demo()
+        self.ticks += 1
+        if self.store.count == self._published_count:
+            # connected but no TELEMETRY_DATA since the last tick: don't
+            # republish the same row as if it were fresh
+            self.stale_ticks += 1
+            return
+        self._published_count = self.store.count
+        self.hub.publish(self.store.latest_message())
+
+    def _append_demo(self):
+        t = time.monotonic() - self._demo_t0
+        angle = (t * DEMO_TURN_RATE_DPS) % 360.0
+        # latch=False: the simulated position must not replace real GPS fixes
+        self.store.append(
+            latch=False,
+            lat=DEMO_BASE_LAT + DEMO_RADIUS_DEG * math.cos(math.radians(angle)),
+            lon=DEMO_BASE_LON + DEMO_RADIUS_DEG * math.sin(math.radians(angle)),
+            altitude_m=15.0 + 5.0 * math.sin(math.radians(t * 2.0)),
+            yaw_deg=angle,
+            course_deg=angle,
+            ground_speed_mps=2.5,
+            battery_percent=85.0,
+        )
+
+
+def _fc_link():
+    try:
+        from backend.src.uart.link_manager import link_manager
+        return link_manager.fc
+    except ImportError:
+        return None
+
+
+# Module-level producer (single vehicle per process)
+telemetry_producer = TelemetryProducer(telemetry_store, hub, link=_fc_link())
@@ -0,0 +1,685 @@
+"""
+Flight Recorder - Append-only binary log of telemetry, commands and alerts
+
+The ring buffer (store.py) only keeps the last hour in RAM and the text logs
+(utils/logger.py) are not machine-readable. The recorder persists every
+telemetry row plus the command results and alerts of the EventBus, one
+directory per recording:
+
+  backend/logs/flights/<flight_id>/
+    tlm-000001.seg    telemetry segments
+    evt-000001.seg    command / alert segments
+    index.json        segments with first / last ts and record count
+
+A segment is a 64-byte header followed by fixed-size little-endian records,
+so record k lives at HEADER_SIZE + k * record_size and a whole segment is a
+single np.frombuffer() over an mmap:
+
+  header     4s magic "AWFR", u8 version, u8 kind (0 = tlm, 1 = evt),
+             u16 reserved, u32 record size, f8 creation time
+  telemetry  u32 crc + one TELEMETRY_DTYPE row (store.py)
+  event      u32 crc, f8 ts, u8 kind (EVENT_TOPICS), u16 length,
+             EVENT_TEXT_SIZE bytes of JSON ({"type": <topic>, ...payload})
+
+crc is the CRC-32 of the rest of the record.
+
+Writing: every flush_interval_s the rows added to the ring buffer since the
+last flush are copied out (the store's write path is untouched) and appended
+together with the queued events by os.write in the default executor. Files
+are fsync'ed and index.json rewritten every fsync_interval_s; segments roll
+over at segment_mb. The flight directory is only created when the first
+record arrives.
+
+Power loss: a record is either complete with a valid CRC or part of a torn
+tail (short, zero-filled or garbage). FlightLog ignores a torn tail, and
+recover_flight() - run by the recorder on start for every flight that was
+not closed cleanly - truncates each segment to its last valid record and
+rebuilds index.json from the segments.
+
+Reading: FlightLog maps the segments read-only. telemetry() returns NumPy
+views straight onto the page cache (no copy, no parsing) and seek() finds a
+timestamp with the segment index and a binary search on the ts column.
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import yaml
+
+from backend.src.streaming.event_bus import Topic, event_bus
+from backend.src.streaming.telemetry_hub import encode_json
+from backend.src.telemetry.store import TELEMETRY_DTYPE, TelemetryStore, telemetry_store
+
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+DEFAULT_DIRECTORY = PROJECT_ROOT / 'backend' / 'logs' / 'flights'
+
+MAGIC = b'AWFR'
+VERSION = 1
+HEADER_SIZE = 64
+_HEADER = struct.Struct('<4sBBHId')
+
+KIND_TELEMETRY = 0
+KIND_EVENT = 1
+_PREFIX = {KIND_TELEMETRY: 'tlm', KIND_EVENT: 'evt'}
+
+# EventBus topics that are recorded (value of the record's kind byte = index)
+EVENT_TOPICS = (Topic.COMMAND, Topic.ALERT)
+EVENT_TEXT_SIZE = 241
+
+
+def _with_crc(dtype: np.dtype) -> np.dtype:
+    """Prefix a packed structured dtype with a u32 crc field."""
+    names = ['crc', *dtype.names]
+    formats = ['<u4'] + [dtype.fields[n][0] for n in dtype.names]
+    offsets = [0] + [4 + dtype.fields[n][1] for n in dtype.names]
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                     'itemsize': 4 + dtype.itemsize})
+
+
+TELEMETRY_RECORD = _with_crc(TELEMETRY_DTYPE)
+EVENT_RECORD = _with_crc(np.dtype({
+    'names': ['ts', 'kind', 'length', 'text'],
+    'formats': ['<f8', 'u1', '<u2', f'S{EVENT_TEXT_SIZE}'],
+    'offsets': [0, 8, 9, 11],
+    'itemsize': 11 + EVENT_TEXT_SIZE,
+}))
+RECORD_DTYPES = {KIND_TELEMETRY: TELEMETRY_RECORD, KIND_EVENT: EVENT_RECORD}
+
+
+def recorder_config() -> dict:
+    """The recorder section of config/system.yaml ({} if unreadable)."""
+    cfg_path = PROJECT_ROOT / 'config' / 'system.yaml'
+    try:
+        with open(cfg_path, 'r') as f:
+            return (yaml.safe_load(f) or {}).get('recorder') or {}
+    except Exception as e:
+        print(f"Warning: could not read recorder config from {cfg_path}: {e}")
+        return {}
+
+
+def _seal(records: np.ndarray):
+    """Fill in the crc of every record (in place)."""
+    raw = records.view(np.uint8).reshape(len(records), records.dtype.itemsize)
+    crcs = records['crc']
+    for i in range(len(records)):
+        crcs[i] = zlib.crc32(raw[i, 4:])
+
+
+def _valid_count(records: np.ndarray) -> int:
+    """Number of records before the torn tail (last valid CRC)."""
+    raw = records.view(np.uint8).reshape(len(records), records.dtype.itemsize)
+    n = len(records)
+    while n and zlib.crc32(raw[n - 1, 4:]) != records['crc'][n - 1]:
+        n -= 1
+    return n
+
+
+def _segments(path: Path, kind: int) -> List[Path]:
+    return sorted(path.glob(f'{_PREFIX[kind]}-*.seg'))
+
+
+def _read_header(path: Path) -> Optional[Tuple[int, int, float]]:
+    """(kind, record_size, created) of a segment, None if missing or torn."""
+    with open(path, 'rb') as f:
+        head = f.read(HEADER_SIZE)
+    if len(head) < HEADER_SIZE:
+        return None
+    magic, version, kind, _, record_size, created = _HEADER.unpack_from(head)
+    if magic != MAGIC or version != VERSION or kind not in RECORD_DTYPES:
+        return None
+    return kind, record_size, created
+
+
+class _Segment:
+    """A segment open for appending (writer side)."""
+
+    __slots__ = ("kind", "path", "fd", "records", "first_ts", "last_ts")
+
+    def __init__(self, kind: int, path: Path, fd: int):
+        self.kind = kind
+        self.path = path
+        self.fd = fd
+        self.records = 0
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+
+    def entry(self) -> dict:
+        return {
+            "file": self.path.name,
+            "kind": _PREFIX[self.kind],
+            "records": self.records,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+        }
+
+
+def _write_index(path: Path, index: dict):
+    """Atomically replace <flight>/index.json."""
+    tmp = path / 'index.json.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path / 'index.json')
+
+
+# ----------------------------------------------------------------------
+# Reader
+# ----------------------------------------------------------------------
+class FlightLog:
+    """
+    Read-only, memory-mapped view of a recorded flight.
+
+    Usage:
+        with FlightLog('backend/logs/flights/20250101-120000') as log:
+            seg, i = log.seek(t0 + 45 * 60)
+            for rows in log.telemetry(t0, t1):
+                alt = rows['altitude_m']          # view, no copy
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if not self.path.is_dir():
+            raise FileNotFoundError(f"no flight recording at {self.path}")
+        self.flight_id = self.path.name
+        self._maps: List[mmap.mmap] = []
+        self.torn_records = 0
+        self._tlm = self._map(KIND_TELEMETRY)
+        self._evt = self._map(KIND_EVENT)
+        # segment index for seek(): first / last ts and record offset of each telemetry segment
+        self.first_ts = np.array([s['ts'][0] for s in self._tlm], dtype=np.float64)
+        self.last_ts = np.array([s['ts'][-1] for s in self._tlm], dtype=np.float64)
+        self.offsets = np.cumsum([0] + [len(s) for s in self._tlm])
+
+    def _map(self, kind: int) -> List[np.ndarray]:
+        views = []
+        dtype = RECORD_DTYPES[kind]
+        for path in _segments(self.path, kind):
+            header = _read_header(path)
+            if header is None or header[1] != dtype.itemsize:
+                print(f"Flight log: skipping unreadable segment {path}")
+                continue
+            size = path.stat().st_size
+            if size <= HEADER_SIZE:
+                continue
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(mm)
+            records = np.frombuffer(mm, dtype=dtype, count=(size - HEADER_SIZE) // dtype.itemsize,
+                                    offset=HEADER_SIZE)
+            valid = _valid_count(records)
+            self.torn_records += len(records) - valid
+            if valid:
+                views.append(records[:valid])
+        return views
+
+    def close(self):
+        self._tlm = self._evt = []
+        for mm in self._maps:
+            try:
+                mm.close()
+            except BufferError:
+                pass    # a caller still holds a view; unmapped when it is released
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of telemetry records."""
+        return int(self.offsets[-1])
+
+    @property
+    def segments(self) -> List[np.ndarray]:
+        """Telemetry records of each segment (views, oldest first)."""
+        return list(self._tlm)
+
+    def time_span(self) -> Tuple[Optional[float], Optional[float]]:
+        if not self._tlm:
+            return None, None
+        return float(self.first_ts[0]), float(self.last_ts[-1])
+
+    def seek(self, ts: float) -> Tuple[int, int]:
+        """
+        First telemetry record with ts >= the given time.
+
+        Returns:
+            (segment, record) - (len(segments), 0) past the end
+        """
+        seg = int(np.searchsorted(self.last_ts, ts, 'left'))
+        if seg == len(self._tlm):
+            return seg, 0
+        return seg, int(np.searchsorted(self._tlm[seg]['ts'], ts, 'left'))
+
+    def position(self, seg: int, record: int) -> int:
+        """Global record number of (segment, record)."""
+        return int(self.offsets[seg]) + record
+
+    def telemetry(self, t0: Optional[float] = None, t1: Optional[float] = None) -> List[np.ndarray]:
+        """Telemetry records with t0 <= ts <= t1, one view per segment."""
+        seg, start = (0, 0) if t0 is None else self.seek(t0)
+        out = []
+        for records in self._tlm[seg:]:
+            if t1 is not None:
+                if records['ts'][start] > t1:
+                    break
+                stop = int(np.searchsorted(records['ts'], t1, 'right'))
+            else:
+                stop = len(records)
+            out.append(records[start:stop])
+            start = 0
+        return out
+
+    def events(self, t0: Optional[float] = None, t1: Optional[float] = None,
+               topics: Optional[Iterable[str]] = None) -> List[dict]:
+        """Decoded command / alert events ({"ts", "type", ...payload}), oldest first."""
+        kinds = None
+        if topics is not None:
+            kinds = [i for i, t in enumerate(EVENT_TOPICS) if t.value in topics]
+        out = []
+        for records in self._evt:
+            ts = records['ts']
+            mask = np.ones(len(records), dtype=bool)
+            if t0 is not None:
+                mask &= ts >= t0
+            if t1 is not None:
+                mask &= ts <= t1
+            if kinds is not None:
+                mask &= np.isin(records['kind'], kinds)
+            for rec in records[mask]:
+                text = rec['text'][:rec['length']]
+                try:
+                    event = json.loads(text)
+                except ValueError:
+                    event = {"type": EVENT_TOPICS[rec['kind']].value, "raw": text.decode('utf-8', 'replace')}
+                event["ts"] = float(rec['ts'])
+                out.append(event)
+        return out
+
+    def event_records(self) -> List[np.ndarray]:
+        """Raw event records of each segment (views)."""
+        return list(self._evt)
+
+
+def open_flight(flight_id: str, directory=None) -> FlightLog:
+    """
+    FlightLog of a recorded flight by id (directory name).
+
+    Raises:
+        ValueError: not a plain directory name
+        FileNotFoundError: no such flight
+    """
+    if not flight_id or Path(flight_id).name != flight_id or flight_id.startswith('.'):
+        raise ValueError(f"invalid flight id: {flight_id}")
+    return FlightLog(Path(directory or DEFAULT_DIRECTORY) / flight_id)
+
+
+def recover_flight(path) -> dict:
+    """
+    Truncate every segment of a flight to its last complete record and
+    rebuild index.json from the segments (after a power loss).
+
+    Returns:
+        The new index
+    """
+    path = Path(path)
+    index = {"flight_id": path.name, "closed": True, "recovered": True, "segments": []}
+    for kind, dtype in RECORD_DTYPES.items():
+        for seg_path in _segments(path, kind):
+            header = _read_header(seg_path)
+            if header is None or header[1] != dtype.itemsize:
+                seg_path.rename(seg_path.with_suffix('.seg.bad'))
+                print(f"Flight recorder: moved unreadable segment {seg_path} aside")
+                continue
+            size = seg_path.stat().st_size
+            records = np.fromfile(seg_path, dtype=dtype, count=(size - HEADER_SIZE) // dtype.itemsize,
+                                  offset=HEADER_SIZE)
+            valid = _valid_count(records)
+            keep = HEADER_SIZE + valid * dtype.itemsize
+            if keep != size:
+                os.truncate(seg_path, keep)
+                print(f"Flight recorder: {seg_path.name} truncated to {valid} records "
+                      f"({size - keep} bytes of torn tail)")
+            index["segments"].append({
+                "file": seg_path.name,
+                "kind": _PREFIX[kind],
+                "records": valid,
+                "first_ts": float(records['ts'][0]) if valid else None,
+                "last_ts": float(records['ts'][valid - 1]) if valid else None,
+            })
+    _write_index(path, index)
+    return index
+
+
+def list_flights(directory=None) -> List[dict]:
+    """Summaries (index.json) of the recorded flights, oldest first."""
+    directory = Path(directory or DEFAULT_DIRECTORY)
+    if not directory.is_dir():
+        return []
+    flights = []
+    for path in sorted(p for p in directory.iterdir() if p.is_dir()):
+        try:
+            with open(path / 'index.json', 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {"flight_id": path.name, "closed": False, "segments": []}
+        tlm = [s for s in index["segments"] if s["kind"] == 'tlm' and s["records"]]
+        flights.append({
+            "flight_id": path.name,
+            "closed": index.get("closed", False),
+            "telemetry_records": sum(s["records"] for s in tlm),
+            "event_records": sum(s["records"] for s in index["segments"] if s["kind"] == 'evt'),
+            "first_ts": tlm[0]["first_ts"] if tlm else None,
+            "last_ts": tlm[-1]["last_ts"] if tlm else None,
+        })
+    return flights
+
+
+# ----------------------------------------------------------------------
+# Writer
+# ----------------------------------------------------------------------
+class FlightRecorder:
+    """
+    Background task appending the telemetry ring buffer and EventBus
+    command / alert events to segment files.
+    """
+
+    def __init__(
+        self,
+        store: TelemetryStore,
+        directory=None,
+        enabled: bool = True,
+        segment_mb: float = 16.0,
+        flush_interval_s: float = 0.5,
+        fsync_interval_s: float = 5.0,
+    ):
+        """
+        Args:
+            store: Telemetry ring buffer to record
+            directory: Parent directory of the flight recordings
+            enabled: False = start() does nothing
+            segment_mb: Segment size before rolling over
+            flush_interval_s: Period of the copy / append task
+            fsync_interval_s: Period of fsync + index.json rewrite
+        """
+        self.store = store
+        self.directory = Path(directory or DEFAULT_DIRECTORY)
+        self.enabled = enabled
+        self.segment_bytes = int(segment_mb * 1024 * 1024)
+        self.flush_interval_s = flush_interval_s
+        self.fsync_interval_s = fsync_interval_s
+
+        self.flight_id: Optional[str] = None
+        self.path: Optional[Path] = None
+        self._open: Dict[int, Optional[_Segment]] = {KIND_TELEMETRY: None, KIND_EVENT: None}
+        self._closed: List[dict] = []
+        self._store_count = 0
+        self._events: List[Tuple[float, int, bytes]] = []
+        self._last_sync = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wake: Optional[asyncio.Event] = None
+        self._writing: Optional[asyncio.Future] = None     # executor write in progress
+        self._handlers = {
+            topic: (lambda payload, kind=i: self.record_event(kind, payload))
+            for i, topic in enumerate(EVENT_TOPICS)
+        }
+
+        # Statistics
+        self.records = {"telemetry": 0, "events": 0}
+        self.bytes_written = 0
+        self.dropped_rows = 0       # ring buffer overwritten before a flush
+        self.truncated_events = 0
+        self.write_errors = 0
+        self._last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    def record_event(self, kind: int, payload: dict):
+        """Queue one command / alert event (EventBus callback, never blocks)."""
+        topic = EVENT_TOPICS[kind]
+        text = encode_json({"type": topic.value, **payload}).encode('utf-8')
+        if len(text) > EVENT_TEXT_SIZE:
+            # keep the required keys, cut the message
+            self.truncated_events += 1
+            short = {k: payload[k] for k in ("cmd", "status", "level", "link") if k in payload}
+            short["msg"] = str(payload.get("msg", ""))[:120]
+            short["truncated"] = True
+            text = encode_json({"type": topic.value, **short}).encode('utf-8')[:EVENT_TEXT_SIZE]
+        self._events.append((time.time(), kind, text))
+
+    async def start(self):
+        """Start recording (server startup); recovers flights left open by a power loss."""
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        await loop.run_in_executor(None, self._recover_open_flights)
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._store_count = self.store.count
+        for topic, handler in self._handlers.items():
+            event_bus.subscribe(topic, handler)
+        self._task = loop.create_task(self._run(), name="flight-recorder")
+
+    async def stop(self):
+        """Flush, fsync and close the current flight (server shutdown)."""
+        self._stopping = True
+        for topic, handler in self._handlers.items():
+            event_bus.unsubscribe(topic, handler)
+        task, self._task = self._task, None
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            # not cancelled: a cancel would abandon a write still running in the
+            # executor while the final flush and close start in other threads
+            self._wake.set()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            await self.flush(sync=True)
+        if self.path is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._close_flight)
+            print(f"Flight recorder: closed {self.flight_id} "
+                  f"({self.records['telemetry']} telemetry, {self.records['events']} event records)")
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> dict:
+        """Recorder state for /health and /api/flights."""
+        return {
+            "enabled": self.enabled,
+            "running": self.is_running(),
+            "flight_id": self.flight_id,
+            "records": dict(self.records),
+            "bytes": self.bytes_written,
+            "segments": len(self._closed) + sum(1 for s in self._open.values() if s is not None),
+            "dropped_rows": self.dropped_rows,
+            "truncated_events": self.truncated_events,
+            "write_errors": self.write_errors,
+        }
+
+    async def flush(self, sync: bool = False):
+        """
+        Append everything recorded since the last flush.
+
+        One executor write at a time (the segment fds are not shared between
+        threads); cancelling flush() does not abandon a write in progress,
+        the next flush() waits for it.
+        """
+        while self._writing is not None and not self._writing.done():
+            await asyncio.wait([self._writing])
+        rows = self._take_rows()
+        events, self._events = self._events, []
+        due = sync or time.monotonic() - self._last_sync >= self.fsync_interval_s
+        if rows is None and not events and not (due and self.path is not None):
+            return
+        self._writing = asyncio.get_running_loop().run_in_executor(None, self._write, rows, events, due)
+        try:
+            await asyncio.shield(self._writing)
+            self._last_error = None
+        except OSError as e:
+            self.write_errors += 1
+            if str(e) != self._last_error:     # disk full / SD card gone: log once
+                print(f"Flight recorder: write error: {e}")
+                self._last_error = str(e)
+
+    # ------------------------------------------------------------------
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                break           # stop() does the final flush
+            try:
+                await self.flush()
+            except Exception as e:
+                # a bug in _write must not end the recording silently
+                self.write_errors += 1
+                if str(e) != self._last_error:
+                    print(f"Flight recorder: flush failed: {e!r}")
+                    self._last_error = str(e)
+
+    def _take_rows(self) -> Optional[np.ndarray]:
+        new = self.store.count - self._store_count
+        if new <= 0:
+            return None
+        if new > len(self.store):
+            self.dropped_rows += new - len(self.store)
+            new = len(self.store)
+        self._store_count = self.store.count
+        rows = self.store.last(new)
+        records = np.empty(new, dtype=TELEMETRY_RECORD)
+        records.view(np.uint8).reshape(new, TELEMETRY_RECORD.itemsize)[:, 4:] = \
+            rows.view(np.uint8).reshape(new, TELEMETRY_DTYPE.itemsize)
+        return records
+
+    def _write(self, rows: Optional[np.ndarray], events: List[Tuple[float, int, bytes]], sync: bool):
+        """Executor side: seal, append, fsync."""
+        if rows is not None:
+            _seal(rows)
+            self._append(KIND_TELEMETRY, rows)
+        if events:
+            records = np.zeros(len(events), dtype=EVENT_RECORD)
+            for i, (ts, kind, text) in enumerate(events):
+                records[i] = (0, ts, kind, len(text), text)
+            _seal(records)
+            self._append(KIND_EVENT, records)
+        if sync and self.path is not None:
+            for seg in self._open.values():
+                if seg is not None:
+                    os.fsync(seg.fd)
+            _write_index(self.path, self._index(closed=False))
+            self._last_sync = time.monotonic()
+
+    def _append(self, kind: int, records: np.ndarray):
+        per_segment = max(1, (self.segment_bytes - HEADER_SIZE) // records.dtype.itemsize)
+        start = 0
+        while start < len(records):
+            seg = self._open[kind]
+            if seg is None or seg.records >= per_segment:
+                seg = self._new_segment(kind)
+            chunk = records[start:start + per_segment - seg.records]
+            data = memoryview(chunk.tobytes())
+            while data:
+                data = data[os.write(seg.fd, data):]
+            ts = chunk['ts']
+            if seg.first_ts is None:
+                seg.first_ts = float(ts[0])
+            seg.last_ts = float(ts[-1])
+            seg.records += len(chunk)
+            self.bytes_written += chunk.nbytes
+            self.records["telemetry" if kind == KIND_TELEMETRY else "events"] += len(chunk)
+            start += len(chunk)
+
+    def _new_segment(self, kind: int) -> _Segment:
+        if self.path is None:
+            self._open_flight()
+        old = self._open[kind]
+        if old is not None:
+            os.fsync(old.fd)
+            os.close(old.fd)
+            self._closed.append(old.entry())
+        number = sum(1 for e in self._closed if e["kind"] == _PREFIX[kind]) + 1
+        path = self.path / f'{_PREFIX[kind]}-{number:06d}.seg'
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_EXCL, 0o644)
+        header = _HEADER.pack(MAGIC, VERSION, kind, 0, RECORD_DTYPES[kind].itemsize, time.time())
+        os.write(fd, header.ljust(HEADER_SIZE, b'\0'))
+        self._sync_dir()
+        seg = _Segment(kind, path, fd)
+        self._open[kind] = seg
+        return seg
+
+    def _open_flight(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        base = time.strftime('%Y%m%d-%H%M%S')
+        flight_id, n = base, 1
+        while (self.directory / flight_id).exists():
+            n += 1
+            flight_id = f'{base}-{n}'
+        self.path = self.directory / flight_id
+        self.path.mkdir()
+        self.flight_id = flight_id
+        print(f"Flight recorder: recording to {self.path}")
+
+    def _sync_dir(self):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _index(self, closed: bool) -> dict:
+        segments = self._closed + [s.entry() for s in self._open.values() if s is not None]
+        return {"flight_id": self.flight_id, "closed": closed, "segments": segments}
+
+    def _close_flight(self):
+        for kind, seg in self._open.items():
+            if seg is not None:
+                os.fsync(seg.fd)
+                os.close(seg.fd)
+        _write_index(self.path, self._index(closed=True))
+        self._closed = []
+        self._open = {KIND_TELEMETRY: None, KIND_EVENT: None}
+        self.path = None
+
+    def _recover_open_flights(self):
+        if not self.directory.is_dir():
+            return
+        for flight in list_flights(self.directory):
+            if not flight["closed"]:
+                print(f"Flight recorder: recovering {flight['flight_id']} (not closed cleanly)")
+                recover_flight(self.directory / flight["flight_id"])
+
+
+def _recorder_from_config() -> FlightRecorder:
+    cfg = recorder_config()
+    directory = cfg.get('directory')
+    if directory and not Path(directory).is_absolute():
+        directory = PROJECT_ROOT / directory
+    return FlightRecorder(
+        telemetry_store,
+        directory=directory,
+        enabled=bool(cfg.get('enabled', True)),
+        segment_mb=float(cfg.get('segment_mb', 16)),
+        flush_interval_s=float(cfg.get('flush_interval_ms', 500)) / 1000.0,
+        fsync_interval_s=float(cfg.get('fsync_interval_s', 5)),
+    )
+
+
+# Module-level recorder (one vehicle per process, like telemetry_store)
+flight_recorder = _recorder_from_config()
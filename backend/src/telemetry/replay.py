@@ -0,0 +1,283 @@
+"""
+Flight Replay - Play a recorded flight through the live TelemetryHub
+
+For mission debugging and operator training: telemetry of a flight recorded
+by the FlightRecorder (recorder.py) is published to the same hub as the live
+producer, so /ws, SSE and binary clients see it exactly like a flight.
+Recorded command results and alerts are pushed at their time as events.
+
+Scheduling: replay time advances as
+
+    replay_ts = anchor_ts + (loop.time() - anchor_loop) * speed
+
+and the task sleeps until the next record is due (loop.call_later on a
+future, no polling). pause / resume / seek / speed changes move the anchor
+and wake the task. At most one message is published per publish_interval_s
+(the producer's rate): when several records are due - 50× playback of a
+50 Hz recording - only the latest one is sent, found with a binary search on
+the segment's ts column, so the cost does not grow with the speed.
+
+Seek goes through FlightLog.seek() (segment index + binary search on the
+memory-mapped records), so jumping to minute 45 does not read the first 44.
+"""
+
+import asyncio
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from backend.src.streaming.telemetry_hub import TelemetryHub, encode_json, hub
+from backend.src.telemetry.producer import TelemetryProducer, telemetry_producer
+from backend.src.telemetry.recorder import FlightLog, flight_recorder, open_flight
+from backend.src.telemetry.store import to_message
+
+
+MIN_SPEED = 1.0
+MAX_SPEED = 50.0
+
+
+class FlightReplay:
+    """
+    One replay at a time (start / pause / resume / seek / set_speed / stop).
+    """
+
+    def __init__(
+        self,
+        hub: TelemetryHub,
+        producer: Optional[TelemetryProducer] = None,
+        directory=None,
+        publish_interval_s: float = 0.1,
+    ):
+        """
+        Args:
+            hub: Broadcaster to publish to
+            producer: Live producer (a replay is refused while it runs)
+            directory: Flight recordings (default: recorder.DEFAULT_DIRECTORY)
+            publish_interval_s: Minimum time between two published messages
+        """
+        self.hub = hub
+        self.producer = producer
+        self.directory = directory
+        self.publish_interval_s = publish_interval_s
+
+        self.log: Optional[FlightLog] = None
+        self.speed = 1.0
+        self.paused = False
+        self.finished = False
+        self._segments: List[np.ndarray] = []
+        self._events: List[dict] = []
+        self._event_ts = np.zeros(0)
+        self._seg = 0
+        self._pos = 0
+        self._next_event = 0
+        self._anchor_ts = 0.0
+        self._anchor_loop = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.published = 0
+        self.skipped = 0        # records not sent because a newer one was due
+        self.started_at: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------------
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, flight_id: str, speed: float = 1.0, offset_s: float = 0.0):
+        """
+        Start replaying a flight (replaces a running replay).
+
+        Raises:
+            ValueError: invalid flight id / speed, or empty recording
+            FileNotFoundError: no such flight
+            RuntimeError: the live telemetry producer is running
+        """
+        if self.producer is not None and self.producer.is_running():
+            raise RuntimeError("live telemetry is running; stop the flight before replaying")
+        speed = self._check_speed(speed)
+        log = open_flight(flight_id, self.directory)
+        if not len(log):
+            log.close()
+            raise ValueError(f"flight '{flight_id}' has no telemetry")
+        await self.stop()
+
+        self.log = log
+        self._segments = log.segments
+        self._events = log.events()
+        self._event_ts = np.array([e["ts"] for e in self._events], dtype=np.float64)
+        self.speed = speed
+        self.paused = False
+        self.finished = False
+        self.published = 0
+        self.skipped = 0
+        self.started_at = time.time()
+        self._loop = asyncio.get_running_loop()
+        self._seek(self.log.first_ts[0] + offset_s)
+        self._task = self._loop.create_task(self._run(), name="flight-replay")
+        print(f"Flight replay: {flight_id} at {speed:g}x from +{offset_s:.0f} s")
+
+    def pause(self):
+        if self.log is None or self.paused:
+            return
+        self._anchor_ts = self._replay_ts()
+        self.paused = True
+        self._wake()
+
+    def resume(self):
+        if self.log is None or not self.paused:
+            return
+        self._anchor_loop = self._loop.time()
+        self.paused = False
+        self._wake()
+
+    def seek(self, offset_s: float):
+        """Jump to offset_s seconds after the start of the flight."""
+        if self.log is None:
+            raise ValueError("no replay loaded")
+        self._seek(self.log.first_ts[0] + max(0.0, offset_s))
+        self._wake()
+
+    def set_speed(self, speed: float):
+        speed = self._check_speed(speed)
+        if self.log is not None:
+            self._anchor_ts = self._replay_ts()
+            self._anchor_loop = self._loop.time()
+        self.speed = speed
+        self._wake()
+
+    async def stop(self):
+        """Stop the replay and release the recording."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            if task.get_loop() is asyncio.get_running_loop():
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        if self.log is not None:
+            self._segments = []
+            self.log.close()
+            self.log = None
+
+    def status(self) -> dict:
+        """Replay state for /api/replay and /health."""
+        if self.log is None:
+            return {"loaded": False, "running": False}
+        start, end = self.log.time_span()
+        position = min(max(self._replay_ts(), start), end)
+        return {
+            "loaded": True,
+            "running": self.is_running(),
+            "flight_id": self.log.flight_id,
+            "speed": self.speed,
+            "paused": self.paused,
+            "finished": self.finished,
+            "position_s": round(position - start, 3),
+            "duration_s": round(end - start, 3),
+            "published": self.published,
+            "skipped": self.skipped,
+        }
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _check_speed(speed: float) -> float:
+        speed = float(speed)
+        if not MIN_SPEED <= speed <= MAX_SPEED:
+            raise ValueError(f"speed must be between {MIN_SPEED:g} and {MAX_SPEED:g}")
+        return speed
+
+    def _replay_ts(self) -> float:
+        if self.paused:
+            return self._anchor_ts
+        elapsed = self._loop.time() - self._anchor_loop
+        return self._anchor_ts + elapsed * self.speed
+
+    def _seek(self, ts: float):
+        self._seg, self._pos = self.log.seek(ts)
+        self._next_event = int(np.searchsorted(self._event_ts, ts, 'left'))
+        self._anchor_ts = ts
+        self._anchor_loop = self._loop.time()
+        self.finished = False
+        # show the new position right away (also while paused)
+        if self._seg < len(self._segments):
+            self._publish(self._segments[self._seg][self._pos])
+
+    def _wake(self):
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    async def _sleep(self, delay: Optional[float]):
+        """Sleep until delay elapsed or a control call (delay None: until a control call)."""
+        loop = asyncio.get_running_loop()
+        self._wakeup = loop.create_future()
+        handle = None
+        if delay is not None:
+            handle = loop.call_later(delay, self._wake)
+        try:
+            await self._wakeup
+        finally:
+            if handle is not None:
+                handle.cancel()
+            self._wakeup = None
+
+    def _publish(self, record: np.void):
+        row = dict(zip(record.dtype.names, record.item()))     # + crc, ignored by to_message
+        self.hub.publish(to_message(row))
+        self.published += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_publish = -float('inf')
+        while True:
+            if self.paused or self.finished:
+                await self._sleep(None)
+                continue
+            if self._seg >= len(self._segments):
+                self.finished = True
+                print(f"Flight replay: {self.log.flight_id} finished ({self.published} messages)")
+                continue
+
+            now_ts = self._replay_ts()
+            self._publish_events(now_ts)
+            records = self._segments[self._seg]
+            ts = records['ts']
+            due = int(np.searchsorted(ts, now_ts, 'right'))   # records[pos:due] are due
+            if due > self._pos and loop.time() - last_publish >= self.publish_interval_s:
+                self.skipped += due - 1 - self._pos
+                self._publish(records[due - 1])
+                last_publish = loop.time()
+                self._pos = due
+            if self._pos >= len(records):
+                self._seg += 1
+                self._pos = 0
+                continue
+
+            # sleep until the next record is due, but not before the rate limit allows it
+            next_ts = ts[self._pos]
+            if self._next_event < len(self._event_ts):
+                next_ts = min(next_ts, self._event_ts[self._next_event])
+            delay = max((next_ts - now_ts) / self.speed,
+                        last_publish + self.publish_interval_s - loop.time(), 0.0)
+            await self._sleep(delay)
+
+    def _publish_events(self, now_ts: float):
+        while self._next_event < len(self._events) and self._event_ts[self._next_event] <= now_ts:
+            event = dict(self._events[self._next_event])
+            event["replay"] = True
+            self.hub.publish_event(event["type"], encode_json(event))
+            self._next_event += 1
+
+
+# Module-level replay (shares the live hub)
+flight_replay = FlightReplay(
+    hub,
+    producer=telemetry_producer,
+    directory=flight_recorder.directory,
+    publish_interval_s=telemetry_producer.interval_s,
+)
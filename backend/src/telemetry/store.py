@@ -0,0 +1,460 @@
+"""
+Telemetry Store - Live telemetry in a preallocated NumPy ring buffer
+
+The STM32 pushes TELEMETRY_DATA frames at 50-100 Hz. Instead of building a
+dict and a pydantic model per sample, every frame is copied byte-for-byte
+into one row of a structured NumPy array whose layout matches the wire
+format (see protocol.TELEMETRY_FIELDS). GPS fixes (10 Hz) and link health
+(heartbeat RTT / loss, 5 Hz) are latched and carried into every new row.
+
+Readers (/api/telemetry, the WebSocket broadcaster, history queries) look at
+the latest row or a slice of the ring; Python objects are only created when
+a response is actually built.
+
+Retention: at 50-100 Hz the live ring (72000 rows) holds 12-24 minutes.
+Long chart windows come from a second, decimated ring (``archive``, one row
+per ARCHIVE_INTERVAL_S, 24 h by default) filled as rows are written;
+history() switches to it when the window starts before the live ring.
+
+Time index: rows are appended in receive order, so ``ts`` is sorted within
+the ring and time windows are found by binary search (time_range()). If the
+wall clock steps backwards (NTP sync after boot) the ring falls back to a
+linear scan until the out-of-order rows have been overwritten.
+
+Row layout:
+    ts                     float64  host receive time (unix seconds)
+    time_ms ... armed      FC block, identical to the TELEMETRY_DATA payload
+    lat, lon, ...          GPS block
+    link_rtt_ms, ...       FC link block (heartbeat.py)
+"""
+
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from backend.src.telemetry.downsample import METHODS as DOWNSAMPLE_METHODS
+from backend.src.uart.protocol import MessageType, TELEMETRY_FIELDS, TELEMETRY_FORMAT
+
+
+# struct format char → little-endian NumPy type
+_STRUCT_TO_NUMPY = {
+    'B': 'u1', 'b': 'i1', 'H': '<u2', 'h': '<i2',
+    'I': '<u4', 'i': '<i4', 'f': '<f4', 'd': '<f8',
+}
+
+
+def _fc_formats() -> list:
+    codes = [c for c in TELEMETRY_FORMAT.lstrip('<') if not c.isspace()]
+    return [_STRUCT_TO_NUMPY[c] for c in codes]
+
+
+def _packed_dtype(fields: list) -> np.dtype:
+    """Build a packed (no padding) structured dtype from (name, format) pairs."""
+    names, formats, offsets = [], [], []
+    offset = 0
+    for name, fmt in fields:
+        names.append(name)
+        formats.append(fmt)
+        offsets.append(offset)
+        offset += np.dtype(fmt).itemsize
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': offset})
+
+
+FC_FIELDS = list(zip(TELEMETRY_FIELDS, _fc_formats()))
+GPS_FIELDS = [
+    ('lat', '<f8'),
+    ('lon', '<f8'),
+    ('gps_alt_m', '<f4'),
+    ('ground_speed_mps', '<f4'),
+    ('course_deg', '<f4'),
+    ('gps_fix', 'u1'),
+    ('num_satellites', 'u1'),
+]
+
+LINK_FIELDS = [
+    ('link_rtt_ms', '<f4'),     # last heartbeat round trip, NaN before the first reply
+    ('link_loss_pct', '<f4'),   # heartbeat loss over the monitor window
+]
+
+TELEMETRY_DTYPE = _packed_dtype([('ts', '<f8')] + FC_FIELDS + GPS_FIELDS + LINK_FIELDS)
+
+_FC_OFFSET = TELEMETRY_DTYPE.fields['time_ms'][1]
+_FC_SIZE = sum(np.dtype(f).itemsize for _, f in FC_FIELDS)
+_LATCHED_OFFSET = _FC_OFFSET + _FC_SIZE      # GPS + link blocks
+GPS_DTYPE = _packed_dtype(GPS_FIELDS)
+LATCHED_DTYPE = _packed_dtype(GPS_FIELDS + LINK_FIELDS)
+
+# History series names (as in the /ws message) → ring columns
+HISTORY_FIELDS = {
+    'alt': 'altitude_m',
+    'climb': 'climb_mps',
+    'speed': 'ground_speed_mps',
+    'heading': 'course_deg',
+    'battery': 'battery_percent',
+    'voltage': 'battery_voltage_v',
+    'roll': 'roll_deg',
+    'pitch': 'pitch_deg',
+    'yaw': 'yaw_deg',
+    'gps_alt': 'gps_alt_m',
+    'satellites': 'num_satellites',
+    'rtt_ms': 'link_rtt_ms',
+    'link_loss': 'link_loss_pct',
+}
+
+
+ARCHIVE_INTERVAL_S = 1.0
+
+
+class TelemetryStore:
+    """
+    Fixed-capacity ring buffer of telemetry rows.
+
+    All writes happen on the event loop thread (UART frame callbacks, demo
+    loop), so no locking is needed.
+    """
+
+    def __init__(self, capacity: int = 72000, archive_capacity: int = 0,
+                 archive_interval_s: float = ARCHIVE_INTERVAL_S):
+        """
+        Args:
+            capacity: Number of rows kept (72000: 12 min at 100 Hz, 24 min at 50 Hz)
+            archive_capacity: Rows of the decimated ring (0 = no archive)
+            archive_interval_s: Minimum ts step between two archived rows
+        """
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self._raw = self._buf.view(np.uint8).reshape(capacity, TELEMETRY_DTYPE.itemsize)
+        self._latched = np.zeros(1, dtype=LATCHED_DTYPE)
+        self._latched[0]['link_rtt_ms'] = np.nan
+        self._latched_raw = self._latched.view(np.uint8)
+        self._names = TELEMETRY_DTYPE.names
+        self._next = 0
+        self.count = 0          # rows written since start (monotonic)
+        self.short_frames = 0
+        self.clock_steps = 0    # rows whose ts went backwards
+        self._last_ts = float('-inf')
+        self._unsorted_until = 0
+
+        # Decimated copy of the ring for long history windows
+        self.archive: Optional[TelemetryStore] = (
+            TelemetryStore(archive_capacity) if archive_capacity > 0 else None
+        )
+        self.archive_interval_s = archive_interval_s
+        self._archive_due = float('-inf')
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+    def write_fc_payload(self, payload, ts: Optional[float] = None) -> int:
+        """
+        Copy a raw TELEMETRY_DATA payload into a new row.
+
+        Args:
+            payload: bytes / memoryview with the wire payload
+            ts: Receive time (default: now)
+
+        Returns:
+            Row sequence number, or -1 if the payload was too short
+        """
+        if len(payload) < _FC_SIZE:
+            self.short_frames += 1
+            return -1
+        i = self._next
+        raw = self._raw[i]
+        raw[_FC_OFFSET:_LATCHED_OFFSET] = np.frombuffer(payload, dtype=np.uint8, count=_FC_SIZE)
+        raw[_LATCHED_OFFSET:] = self._latched_raw
+        ts = time.time() if ts is None else ts
+        self._buf['ts'][i] = ts
+        self._check_order(ts)
+        return self._advance()
+
+    def on_fc_frame(self, frame):
+        """AsyncUARTLink handler for MessageType.TELEMETRY_DATA frames."""
+        if frame.msg_type == MessageType.TELEMETRY_DATA:
+            self.write_fc_payload(frame.payload)
+
+    def on_gps_update(self, update: dict):
+        """AsyncUARTLink handler for GPSParser updates (NMEA / UBX)."""
+        fields = {k: v for k, v in update.items() if k in GPS_DTYPE.names and v is not None}
+        if fields:
+            self.update_gps(**fields)
+
+    def append(self, ts: Optional[float] = None, latch: bool = True, **fields) -> int:
+        """
+        Append a row from keyword fields (simulation / manual updates).
+
+        Unspecified FC fields carry over from the previous row; the GPS and
+        link blocks come from the latched values unless given explicitly.
+
+        Args:
+            latch: Also latch the GPS / link fields given here for the
+                following rows (False: this row only, e.g. a simulated
+                position that must not replace real GPS fixes)
+
+        Returns:
+            Row sequence number
+        """
+        i = self._next
+        raw = self._raw[i]
+        if self.count:
+            raw[_FC_OFFSET:_LATCHED_OFFSET] = self._raw[(i - 1) % self.capacity][_FC_OFFSET:_LATCHED_OFFSET]
+        else:
+            raw[_FC_OFFSET:_LATCHED_OFFSET] = 0
+        raw[_LATCHED_OFFSET:] = self._latched_raw
+        row = self._buf[i]
+        ts = time.time() if ts is None else ts
+        row['ts'] = ts
+        self._check_order(ts)
+        latched = {}
+        for name, value in fields.items():
+            row[name] = value
+            if name in LATCHED_DTYPE.names:
+                latched[name] = value
+        if latched and latch:
+            self._latch(latched, patch_latest=False)     # this row already has them
+        return self._advance()
+
+    def update_gps(self, **fields):
+        """
+        Latch new GPS values (lat, lon, gps_alt_m, ground_speed_mps,
+        course_deg, gps_fix, num_satellites). They are copied into every
+        following row and patched into the latest one.
+        """
+        self._latch(fields)
+
+    def update_link(self, rtt_ms: float, loss_pct: float):
+        """Latch FC link health (HeartbeatMonitor), same rules as update_gps()."""
+        self._latch({'link_rtt_ms': rtt_ms, 'link_loss_pct': loss_pct})
+
+    def _latch(self, fields: dict, patch_latest: bool = True):
+        latched = self._latched[0]
+        for name, value in fields.items():
+            latched[name] = value
+        if patch_latest and self.count:
+            self._raw[(self._next - 1) % self.capacity][_LATCHED_OFFSET:] = self._latched_raw
+
+    def _check_order(self, ts: float):
+        if ts < self._last_ts:
+            # binary search is off until this row has left the ring
+            self.clock_steps += 1
+            self._unsorted_until = self.count + self.capacity
+        self._last_ts = ts
+
+    def _advance(self) -> int:
+        if self.archive is not None:
+            self._archive_row(self._next)
+        seq = self.count
+        self.count += 1
+        self._next = (self._next + 1) % self.capacity
+        return seq
+
+    def _archive_row(self, i: int):
+        ts = self._buf['ts'][i]
+        if self._archive_due - self.archive_interval_s <= ts < self._archive_due:
+            return
+        # first row of every interval (a backwards clock step restarts the grid)
+        self._archive_due = ts + self.archive_interval_s
+        archive = self.archive
+        archive._raw[archive._next] = self._raw[i]
+        archive._check_order(float(ts))
+        archive._advance()
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def latest(self) -> Optional[np.void]:
+        """Latest row (a view into the ring), or None if empty."""
+        if not self.count:
+            return None
+        return self._buf[(self._next - 1) % self.capacity]
+
+    def latest_dict(self) -> Optional[dict]:
+        """Latest row as {field: python value}."""
+        row = self.latest()
+        if row is None:
+            return None
+        return dict(zip(self._names, row.item()))
+
+    def gps(self) -> dict:
+        """Latched GPS fix."""
+        latched = self._latched[0]
+        return {name: latched[name].item() for name in GPS_DTYPE.names}
+
+    def last(self, n: int) -> np.ndarray:
+        """Copy of the last ``n`` rows, oldest first."""
+        n = min(n, len(self))
+        if n <= 0:
+            return self._buf[:0].copy()
+        idx = np.arange(self._next - n, self._next) % self.capacity
+        return self._buf[idx]
+
+    def ordered(self) -> np.ndarray:
+        """All stored rows, oldest first (copy)."""
+        return self.last(len(self))
+
+    def _segments(self) -> Tuple[slice, slice]:
+        """Physical slices of the stored rows, oldest first (second may be empty)."""
+        n = len(self)
+        start = (self._next - n) % self.capacity
+        if start + n <= self.capacity:
+            return slice(start, start + n), slice(0, 0)
+        return slice(start, self.capacity), slice(0, self._next)
+
+    def time_range(self, t0: Optional[float] = None, t1: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Rows with t0 <= ts <= t1 as a logical range [lo, hi) (0 = oldest row).
+
+        Binary search on the ts column (no copy); linear scan while rows
+        from before a clock step are still in the ring.
+        """
+        n = len(self)
+        if not n:
+            return 0, 0
+        ts = self._buf['ts']
+        first, second = self._segments()
+        if self.count < self._unsorted_until:
+            order = np.concatenate([ts[first], ts[second]])
+            hits = np.flatnonzero(
+                (order >= (-np.inf if t0 is None else t0)) & (order <= (np.inf if t1 is None else t1))
+            )
+            return (int(hits[0]), int(hits[-1]) + 1) if len(hits) else (0, 0)
+
+        def search(value, side):
+            pos = int(np.searchsorted(ts[first], value, side))
+            if pos == first.stop - first.start and second.stop:
+                pos += int(np.searchsorted(ts[second], value, side))
+            return pos
+
+        lo = 0 if t0 is None else search(t0, 'left')
+        hi = n if t1 is None else search(t1, 'right')
+        return lo, max(lo, hi)
+
+    def columns(self, names: Iterable[str], lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """Copies of the given columns for logical rows [lo, hi), oldest first."""
+        first, second = self._segments()
+        split = first.stop - first.start
+        out = {}
+        for name in names:
+            column = self._buf[name]
+            if hi <= split:
+                out[name] = column[first.start + lo:first.start + hi].copy()
+            elif lo >= split:
+                out[name] = column[lo - split:hi - split].copy()
+            else:
+                out[name] = np.concatenate([column[first.start + lo:first.stop], column[:hi - split]])
+        return out
+
+    def history(
+        self,
+        t0: Optional[float] = None,
+        t1: Optional[float] = None,
+        fields: Iterable[str] = ('alt', 'battery'),
+        max_points: int = 500,
+        method: str = 'lttb',
+    ) -> dict:
+        """
+        Downsampled series for charts (/api/telemetry/history).
+
+        Served from the decimated archive when the window starts before the
+        oldest row of the live ring and the archive reaches further back.
+
+        Args:
+            t0, t1: Window in unix seconds (None = oldest / newest row)
+            fields: HISTORY_FIELDS names or ring column names
+            max_points: Points per series after downsampling
+            method: 'lttb' or 'minmax' (downsample.py)
+
+        Returns:
+            {"from", "to", "method", "raw_points", "archive",
+             "series": {field: {"t": [...], "v": [...]}}}
+
+        Raises:
+            ValueError: unknown field or method
+        """
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"unknown method: {method} (known: {', '.join(DOWNSAMPLE_METHODS)})")
+        columns = {}
+        for field in fields:
+            column = HISTORY_FIELDS.get(field, field)
+            if column not in self._names or column == 'ts':
+                raise ValueError(f"unknown field: {field} (known: {', '.join(HISTORY_FIELDS)})")
+            columns[field] = column
+
+        source = self._history_source(t0)
+        lo, hi = source.time_range(t0, t1)
+        data = source.columns(['ts', *columns.values()], lo, hi)
+        ts = data['ts']
+        downsample = DOWNSAMPLE_METHODS[method]
+        series = {}
+        for field, column in columns.items():
+            values = data[column].astype(np.float64)
+            valid = np.isfinite(values)
+            t, v = (ts, values) if valid.all() else (ts[valid], values[valid])
+            keep = downsample(t, v, max_points)
+            series[field] = {
+                "t": np.round(t[keep], 3).tolist(),
+                "v": np.round(v[keep], 3).tolist(),
+            }
+        return {
+            "from": float(ts[0]) if len(ts) else t0,
+            "to": float(ts[-1]) if len(ts) else t1,
+            "method": method,
+            "raw_points": hi - lo,
+            "archive": source is not self,
+            "series": series,
+        }
+
+    def _history_source(self, t0: Optional[float]) -> 'TelemetryStore':
+        archive = self.archive
+        if archive is None or not len(archive) or not self.count:
+            return self
+        oldest = self.oldest_ts()
+        if (t0 is None or t0 < oldest) and archive.oldest_ts() < oldest:
+            return archive
+        return self
+
+    def oldest_ts(self) -> Optional[float]:
+        """ts of the oldest stored row (None if empty)."""
+        if not self.count:
+            return None
+        return float(self._buf['ts'][(self._next - len(self)) % self.capacity])
+
+    def latest_message(self) -> Optional[dict]:
+        """
+        Latest row in the compact format pushed to /ws clients
+        (lat, lon, alt, heading, speed, battery, ts + attitude).
+        """
+        row = self.latest_dict()
+        if row is None:
+            return None
+        return to_message(row)
+
+
+def to_message(row: dict) -> dict:
+    """Convert a row dict into the /ws telemetry message format."""
+    heading = row['course_deg'] if row['gps_fix'] else row['yaw_deg']
+    # float32 columns are rounded so JSON does not carry float32 noise
+    return {
+        "lat": row['lat'],
+        "lon": row['lon'],
+        "alt": round(row['altitude_m'], 2),
+        "heading": round(heading % 360.0, 2),
+        "speed": round(row['ground_speed_mps'], 2),
+        "battery": round(row['battery_percent'], 1),
+        "voltage": round(row['battery_voltage_v'], 2),
+        "roll": round(row['roll_deg'], 2),
+        "pitch": round(row['pitch_deg'], 2),
+        "yaw": round(row['yaw_deg'], 2),
+        "armed": bool(row['armed']),
+        "rtt_ms": None if row['link_rtt_ms'] != row['link_rtt_ms'] else round(row['link_rtt_ms'], 2),
+        "link_loss": round(row['link_loss_pct'], 1),
+        "ts": int(row['ts']),
+    }
+
+
+# Module-level store (single vehicle, single process): live ring + 24 h at 1 Hz
+telemetry_store = TelemetryStore(archive_capacity=86400)
@@ -4,7 +4,7 @@ UART Module - Serial Communication with Drone Hardware
 This package handles UART/serial communication with drone hardware via:
 - UART protocol definitions
 - Serial link management
-- Message encoding/decoding
+- Message framing (SOF + length + CRC16) and streaming decoding
 
-TODO: Implement real protocol and hardware communication
+TODO: Implement real hardware communication
 """
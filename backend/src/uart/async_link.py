@@ -0,0 +1,300 @@
+"""
+Async UART Link - Event-loop native serial communication
+
+Wraps UARTLink for use from asyncio code (FastAPI routes, WebSocket
+handlers, background tasks) without ever blocking the event loop:
+
+- The serial file descriptor is registered with ``loop.add_reader()``; the
+  loop calls back only when bytes are available and the read never blocks.
+  On event loops without fd readers (Windows proactor) a daemon reader
+  thread is used instead.
+- Writes go straight to the non-blocking fd; whatever the kernel does not
+  accept immediately is buffered and flushed with ``loop.add_writer()``.
+- Received bytes are fed to a streaming decoder (FrameDecoder by default)
+  and every decoded frame is delivered to registered callbacks and to an
+  ``asyncio.Queue``.
+
+When the port cannot be opened the link stays in simulated mode, exactly
+like UARTLink: sends are logged and reported as successful.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.src.uart.protocol import Frame, FrameDecoder
+from backend.src.uart.uart_link import UARTLink
+
+
+class AsyncUARTLink:
+    """
+    Non-blocking UART link delivering decoded frames to asyncio consumers.
+
+    Usage:
+        link = AsyncUARTLink()                 # FLIGHT_CONTROLLER
+        await link.open()
+        link.add_handler(on_telemetry, MessageType.TELEMETRY_DATA)
+        await link.send(encode_message(...))
+        frame = await link.recv()
+    """
+
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        port: Optional[str] = None,
+        baudrate: Optional[int] = None,
+        decoder=None,
+        queue_size: int = 256,
+        read_size: int = 4096,
+    ):
+        """
+        Args:
+            config: Cabling config dict (FLIGHT_CONTROLLER or GPS). None => FLIGHT_CONTROLLER.
+            port: Override port (optional)
+            baudrate: Override baudrate (optional)
+            decoder: Object with ``feed(bytes) -> iterable`` (default: FrameDecoder)
+            queue_size: Max frames held for recv() before the oldest is dropped (0 disables the queue)
+            read_size: Max bytes per read() call
+        """
+        # timeout=0: the fd is only read when the loop says it is readable
+        self.link = UARTLink(config=config, port=port, baudrate=baudrate, timeout=0)
+        self.label = self.link.label
+        self.decoder = decoder if decoder is not None else FrameDecoder()
+        self.read_size = read_size
+        self.queue_size = queue_size
+        self.frames: Optional[asyncio.Queue] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._tx = bytearray()
+        self._handlers: Dict[Optional[int], List[Callable]] = {}
+        self._disconnect_callbacks: List[Callable] = []
+
+        # Statistics
+        self.bytes_rx = 0
+        self.bytes_tx = 0
+        self.frames_rx = 0
+        self.queue_drops = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def open(self) -> bool:
+        """
+        Open the serial port and start receiving.
+
+        Returns:
+            True if the hardware port is open, False if running simulated.
+        """
+        self._loop = asyncio.get_running_loop()
+        if self.frames is None and self.queue_size > 0:
+            self.frames = asyncio.Queue(maxsize=self.queue_size)
+        if self.is_open():
+            return True
+
+        # pyserial's open() configures termios; keep it off the loop thread
+        ok = await self._loop.run_in_executor(None, self.link.open)
+        if not ok:
+            return False
+
+        if hasattr(self.decoder, "reset"):
+            self.decoder.reset()
+        self._tx.clear()
+        self._fd = self.link.serial.fileno()
+        try:
+            os.set_blocking(self._fd, False)
+            self._loop.add_reader(self._fd, self._on_readable)
+        except (NotImplementedError, AttributeError, ValueError):
+            self._fd = None
+            self.link.serial.timeout = 0.1   # blocking reads in the thread
+            self._thread = threading.Thread(
+                target=self._reader_thread, name=f"uart-rx-{self.label}", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def close(self):
+        """Stop receiving and close the serial port."""
+        self._detach()
+        self.link.close()
+        self._thread = None
+
+    def is_open(self) -> bool:
+        """Check if the hardware port is open."""
+        return self.link.serial is not None and getattr(self.link.serial, "is_open", False)
+
+    def on_disconnect(self, callback: Callable[[Exception], None]):
+        """Register a callback invoked (on the loop) when the port fails."""
+        self._disconnect_callbacks.append(callback)
+
+    # ------------------------------------------------------------------
+    # Receive side
+    # ------------------------------------------------------------------
+    def add_handler(self, callback: Callable, msg_type: Optional[int] = None):
+        """
+        Register a callback for decoded frames.
+
+        Callbacks run synchronously on the event loop and must not block.
+        A Frame's payload is a view into the decoder buffer, valid only for
+        the duration of the callback.
+
+        Args:
+            callback: ``callback(frame)``
+            msg_type: Only deliver frames of this MessageType (None = all)
+        """
+        self._handlers.setdefault(msg_type, []).append(callback)
+
+    def remove_handler(self, callback: Callable, msg_type: Optional[int] = None):
+        """Unregister a callback added with add_handler()."""
+        handlers = self._handlers.get(msg_type, [])
+        if callback in handlers:
+            handlers.remove(callback)
+
+    async def recv(self):
+        """Wait for the next decoded frame (payload copied to bytes)."""
+        if self.frames is None:
+            raise RuntimeError("AsyncUARTLink queue disabled (queue_size=0) or link never opened")
+        return await self.frames.get()
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, self.read_size)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._lost(e)
+            return
+        if not data:
+            self._lost(OSError("serial port closed"))
+            return
+        self._dispatch(data)
+
+    def _reader_thread(self):
+        serial_port = self.link.serial
+        while serial_port is not None and serial_port.is_open:
+            try:
+                data = serial_port.read(serial_port.in_waiting or 1)
+            except Exception as e:
+                if self._loop is not None and not self._loop.is_closed():
+                    self._loop.call_soon_threadsafe(self._lost, e)
+                return
+            if data and self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._dispatch, data)
+
+    def _dispatch(self, data: bytes):
+        self.bytes_rx += len(data)
+        for item in self.decoder.feed(data):
+            self.frames_rx += 1
+            msg_type = getattr(item, "msg_type", None)
+            for callback in self._handlers.get(msg_type, ()):
+                self._call(callback, item)
+            if msg_type is not None:
+                for callback in self._handlers.get(None, ()):
+                    self._call(callback, item)
+            if self.frames is not None:
+                if isinstance(item, Frame):
+                    item = Frame(item.msg_type, item.seq, bytes(item.payload))
+                if self.frames.full():
+                    self.frames.get_nowait()
+                    self.queue_drops += 1
+                self.frames.put_nowait(item)
+
+    def _call(self, callback: Callable, item):
+        try:
+            callback(item)
+        except Exception as e:
+            print(f"[{self.label}] frame handler error: {e}")
+
+    # ------------------------------------------------------------------
+    # Transmit side
+    # ------------------------------------------------------------------
+    async def send(self, data: bytes) -> bool:
+        """
+        Queue bytes for transmission without blocking the event loop.
+
+        Returns:
+            True if the bytes were written or buffered (or simulated).
+        """
+        return self.send_nowait(data)
+
+    def send_nowait(self, data: bytes) -> bool:
+        """Synchronous variant of send() for use inside loop callbacks."""
+        if not self.is_open():
+            # Simulated send, same behaviour as UARTLink.send()
+            return self.link.send(data)
+
+        if self._fd is None:
+            # Reader-thread mode: fd readers/writers unavailable
+            ok = self.link.send(data)
+            if ok:
+                self.bytes_tx += len(data)
+            return ok
+
+        if self._tx:
+            # Preserve ordering behind bytes still waiting for the writer
+            self._tx += data
+            return True
+        try:
+            written = os.write(self._fd, data)
+        except (BlockingIOError, InterruptedError):
+            written = 0
+        except OSError as e:
+            self._lost(e)
+            return False
+        self.bytes_tx += written
+        if written < len(data):
+            self._tx += memoryview(data)[written:]
+            self._loop.add_writer(self._fd, self._on_writable)
+        return True
+
+    def pending_tx(self) -> int:
+        """Bytes accepted by send() but not yet handed to the kernel."""
+        return len(self._tx)
+
+    def _on_writable(self):
+        try:
+            written = os.write(self._fd, self._tx)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._lost(e)
+            return
+        self.bytes_tx += written
+        del self._tx[:written]
+        if not self._tx:
+            self._loop.remove_writer(self._fd)
+
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        """Link statistics."""
+        stats = {
+            "label": self.label,
+            "port": self.link.port,
+            "open": self.is_open(),
+            "bytes_rx": self.bytes_rx,
+            "bytes_tx": self.bytes_tx,
+            "frames_rx": self.frames_rx,
+            "queue_drops": self.queue_drops,
+            "pending_tx": len(self._tx),
+        }
+        if hasattr(self.decoder, "stats"):
+            stats["decoder"] = self.decoder.stats()
+        return stats
+
+    def _detach(self):
+        if self._fd is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+        self._fd = None
+        self._tx.clear()
+
+    def _lost(self, exc: Exception):
+        print(f"[{self.label}] serial link lost on {self.link.port}: {exc}")
+        self.close()
+        for callback in self._disconnect_callbacks:
+            try:
+                callback(exc)
+            except Exception as e:
+                print(f"[{self.label}] disconnect callback error: {e}")
@@ -0,0 +1,241 @@
+"""
+UART Benchmarks - Codec and serial link throughput / latency
+
+Measures the Pi side of the flight-controller link so codec regressions show
+up as numbers:
+
+  encode      encode_into() of TELEMETRY_DATA frames into a reused buffer
+  decode      FrameDecoder.feed() over a stream cut into 256-byte chunks
+  gps_parse   GPSParser.feed() over NMEA GGA+RMC sentences
+  pty_rx      simulator → PTY → AsyncUARTLink → frame handler (full RX path)
+  ack_rtt     command → scheduler → PTY → simulator → ACK → future resolved
+
+Each result reports frames/s, bytes/s and CPU µs per frame (process time);
+ack_rtt also reports p50/p99 round-trip latency.
+
+CLI:
+    python -m backend.src.uart.bench                 # all benchmarks
+    python -m backend.src.uart.bench encode decode -n 200000 --json
+
+The same functions are called from tests/test_bench.py with small counts.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import tty
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from backend.src.uart.gps_parser import GPSParser
+from backend.src.uart.protocol import MAX_FRAME_SIZE, FrameDecoder, MessageType, encode_into
+
+
+_TELEMETRY_VALUES = (1234, 1.0, -2.0, 90.0, 12.5, 0.5, 11.75, 77.0, 1000, 1010, 1020, 1030, 2, 1)
+
+
+def _result(name: str, frames: int, nbytes: int, wall_s: float, cpu_s: float, latencies_ms=None) -> dict:
+    result = {
+        "name": name,
+        "frames": frames,
+        "seconds": round(wall_s, 4),
+        "frames_per_s": round(frames / wall_s, 1) if wall_s > 0 else None,
+        "bytes_per_s": round(nbytes / wall_s, 1) if wall_s > 0 else None,
+        "cpu_us_per_frame": round(cpu_s / frames * 1e6, 3) if frames else None,
+    }
+    if latencies_ms is not None and len(latencies_ms):
+        p50, p99 = np.percentile(latencies_ms, [50, 99])
+        result["p50_ms"] = round(float(p50), 3)
+        result["p99_ms"] = round(float(p99), 3)
+    return result
+
+
+def _telemetry_stream(frames: int) -> bytes:
+    buf = bytearray(MAX_FRAME_SIZE)
+    n = encode_into(buf, MessageType.TELEMETRY_DATA, _TELEMETRY_VALUES)
+    one = bytes(buf[:n])
+    return one * frames
+
+
+# ============================================================================
+# CPU-only benchmarks
+# ============================================================================
+
+def bench_encode(frames: int = 100000) -> dict:
+    """encode_into() TELEMETRY_DATA frames into one reused buffer."""
+    buf = bytearray(MAX_FRAME_SIZE)
+    nbytes = 0
+    t0, c0 = time.perf_counter(), time.process_time()
+    for i in range(frames):
+        nbytes += encode_into(buf, MessageType.TELEMETRY_DATA, _TELEMETRY_VALUES, seq=i & 0xFF)
+    return _result("encode", frames, nbytes, time.perf_counter() - t0, time.process_time() - c0)
+
+
+def bench_decode(frames: int = 100000, chunk: int = 256) -> dict:
+    """FrameDecoder.feed() over a telemetry stream in ``chunk``-byte reads."""
+    stream = _telemetry_stream(frames)
+    decoder = FrameDecoder()
+    count = 0
+    view = memoryview(stream)
+    t0, c0 = time.perf_counter(), time.process_time()
+    for i in range(0, len(stream), chunk):
+        count += len(decoder.feed(view[i:i + chunk]))
+    result = _result("decode", count, len(stream), time.perf_counter() - t0, time.process_time() - c0)
+    if count != frames:
+        raise AssertionError(f"decoded {count} of {frames} frames")
+    return result
+
+
+def bench_gps_parse(frames: int = 20000, chunk: int = 64) -> dict:
+    """GPSParser.feed() over NMEA GGA+RMC pairs (one fix = two sentences)."""
+    from backend.src.uart.simulator import UARTSimulator, VehicleModel
+
+    sentences = UARTSimulator()._nmea(VehicleModel().state())
+    stream = sentences * frames
+    parser = GPSParser()
+    count = 0
+    view = memoryview(stream)
+    t0, c0 = time.perf_counter(), time.process_time()
+    for i in range(0, len(stream), chunk):
+        count += len(parser.feed(view[i:i + chunk]))
+    return _result("gps_parse", count, len(stream), time.perf_counter() - t0, time.process_time() - c0)
+
+
+# ============================================================================
+# PTY benchmarks (Linux / macOS)
+# ============================================================================
+
+async def _bench_pty_rx(frames: int) -> dict:
+    from backend.src.uart.async_link import AsyncUARTLink
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    link = AsyncUARTLink(config={"port": os.ttyname(slave), "baudrate": 115200, "label": "FC bench"}, queue_size=0)
+    received = 0
+    done = asyncio.Event()
+
+    def on_frame(frame):
+        nonlocal received
+        received += 1
+        if received >= frames:
+            done.set()
+
+    link.add_handler(on_frame, MessageType.TELEMETRY_DATA)
+    stream = _telemetry_stream(frames)
+    loop = asyncio.get_running_loop()
+    try:
+        if not await link.open():
+            raise RuntimeError("cannot open PTY")
+        t0, c0 = time.perf_counter(), time.process_time()
+        # Blocking writes in a worker thread: the PTY buffer is small and
+        # the loop thread must stay free to read
+        writer = loop.run_in_executor(None, _write_all, master, stream)
+        await asyncio.wait_for(done.wait(), timeout=max(10.0, frames / 1000))
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+        await writer
+    finally:
+        link.close()
+        os.close(master)
+        os.close(slave)
+    return _result("pty_rx", received, len(stream), wall, cpu)
+
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view[:4096])
+        view = view[written:]
+
+
+async def _bench_ack_rtt(commands: int) -> dict:
+    from backend.src.uart.link_manager import ManagedLink
+    from backend.src.uart.scheduler import CommandScheduler, Priority
+    from backend.src.uart.simulator import UARTSimulator
+
+    sim = UARTSimulator(fc_rate_hz=0, gps_rate_hz=0)
+    await sim.start()
+    link = ManagedLink("bench", {"port": sim.fc_port, "baudrate": 115200, "label": "FC bench"}, queue_size=0)
+    scheduler = CommandScheduler(link, max_bytes_per_s=1e9)
+    latencies: List[float] = []
+    nbytes = 0
+    try:
+        link.ensure_started()
+        if not await link.wait_connected(2.0):
+            raise RuntimeError("cannot open simulator PTY")
+        t0, c0 = time.perf_counter(), time.process_time()
+        for i in range(commands):
+            start = time.perf_counter()
+            result = await scheduler.submit(MessageType.SET_SPEED, {"value": float(i)}, Priority.CONTROL)
+            if result["status"] != "acked":
+                raise AssertionError(f"command {i}: {result}")
+            latencies.append((time.perf_counter() - start) * 1000.0)
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+        nbytes = link.link.bytes_tx + link.link.bytes_rx
+    finally:
+        await scheduler.stop()
+        await link.stop()
+        await sim.stop()
+    return _result("ack_rtt", commands, nbytes, wall, cpu, latencies)
+
+
+def bench_pty_rx(frames: int = 20000) -> dict:
+    """Full RX path through a PTY into AsyncUARTLink frame handlers."""
+    return asyncio.run(_bench_pty_rx(frames))
+
+
+def bench_ack_rtt(commands: int = 1000) -> dict:
+    """Sequential command → ACK round trips against the PTY simulator."""
+    return asyncio.run(_bench_ack_rtt(commands))
+
+
+BENCHMARKS: Dict[str, Callable[[int], dict]] = {
+    "encode": bench_encode,
+    "decode": bench_decode,
+    "gps_parse": bench_gps_parse,
+    "pty_rx": bench_pty_rx,
+    "ack_rtt": bench_ack_rtt,
+}
+
+# Default iteration counts (CLI)
+_DEFAULT_COUNTS = {"encode": 100000, "decode": 100000, "gps_parse": 20000, "pty_rx": 20000, "ack_rtt": 1000}
+
+
+def run(names: Optional[List[str]] = None, count: Optional[int] = None) -> List[dict]:
+    """Run the selected benchmarks (all by default)."""
+    results = []
+    for name in names or list(BENCHMARKS):
+        results.append(BENCHMARKS[name](count or _DEFAULT_COUNTS[name]))
+    return results
+
+
+def _format(results: List[dict]) -> str:
+    header = f"{'benchmark':<10} {'frames':>8} {'frames/s':>12} {'bytes/s':>12} {'cpu us/fr':>10} {'p50 ms':>8} {'p99 ms':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['name']:<10} {r['frames']:>8} {r['frames_per_s']:>12,.0f} {r['bytes_per_s']:>12,.0f} "
+            f"{r['cpu_us_per_frame']:>10.2f} {r.get('p50_ms', ''):>8} {r.get('p99_ms', ''):>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AquaWing UART codec / link benchmarks")
+    parser.add_argument("benchmarks", nargs="*", metavar="NAME",
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("-n", "--count", type=int, default=None, help="frames / commands per benchmark")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = run(args.benchmarks or None, args.count)
+    print(json.dumps(results, indent=2) if args.json else _format(results))
+
+
+if __name__ == "__main__":
+    main()
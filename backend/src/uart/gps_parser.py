@@ -0,0 +1,265 @@
+"""
+GPS Parser - Streaming NMEA / UBX decoder for the NEO-M8N
+
+Feeds on raw chunks from the GPS UART (config.cablage.GPS, miniUART ttyS0)
+and returns position updates. Plugs into AsyncUARTLink as its decoder:
+
+    link = AsyncUARTLink(config=GPS, decoder=GPSParser())
+
+Supported messages:
+  - NMEA GGA (fix quality, satellites, altitude), RMC (position, speed,
+    course), VTG (course, speed) from any talker (GP, GN, GL...)
+  - UBX NAV-PVT (class 0x01, id 0x07), the single binary message that
+    carries everything above at up to 10 Hz
+
+Checksums are computed without per-line regexes: the NMEA XOR is folded on
+one big integer (a handful of C-level operations per sentence) and the UBX
+Fletcher checksum uses sum()/accumulate() over the payload.
+
+Each update is a dict with the keys it actually carries, named like the
+GPS columns of the telemetry store (lat, lon, gps_alt_m, ground_speed_mps,
+course_deg, gps_fix, num_satellites) plus "source".
+"""
+
+import struct
+from itertools import accumulate
+from typing import List, Optional
+
+
+_KNOTS_TO_MPS = 0.514444
+_KMH_TO_MPS = 1.0 / 3.6
+
+_UBX_SYNC = b'\xB5\x62'
+_UBX_NAV_PVT = (0x01, 0x07)
+# iTOW, year, month, day, hour, min, sec, valid, tAcc, nano, fixType, flags,
+# flags2, numSV, lon, lat, height, hMSL, hAcc, vAcc, velN, velE, velD,
+# gSpeed, headMot, sAcc, headAcc, pDOP
+_NAV_PVT = struct.Struct('<I H B B B B B B I i B B B B i i i i I I i i i i i I I H')
+
+_MAX_NMEA = 120          # NMEA 0183 sentences are at most 82 chars
+_MAX_UBX_PAYLOAD = 1024
+
+
+def nmea_checksum(body) -> int:
+    """XOR of all bytes between '$' and '*'."""
+    width = len(body)
+    x = int.from_bytes(body, 'little')
+    # Fold the integer onto itself; halves stay byte-aligned so the result
+    # is the XOR of every byte.
+    while width > 1:
+        half = (width + 1) // 2
+        x = (x & ((1 << (half * 8)) - 1)) ^ (x >> (half * 8))
+        width = half
+    return x
+
+
+def ubx_checksum(data) -> tuple:
+    """UBX Fletcher-8 (CK_A, CK_B) over class, id, length and payload."""
+    return sum(data) & 0xFF, sum(accumulate(data)) & 0xFF
+
+
+def _nmea_coord(value: bytes, hemi: bytes) -> Optional[float]:
+    """Convert NMEA ddmm.mmmm / dddmm.mmmm to signed decimal degrees."""
+    if not value:
+        return None
+    dot = value.find(b'.')
+    deg_len = (dot if dot >= 0 else len(value)) - 2
+    deg = float(value[:deg_len]) + float(value[deg_len:]) / 60.0
+    return -deg if hemi in (b'S', b'W') else deg
+
+
+class GPSParser:
+    """
+    Incremental NMEA + UBX parser.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+
+        # Statistics
+        self.sentences = 0
+        self.ubx_frames = 0
+        self.checksum_errors = 0
+        self.bytes_dropped = 0
+
+    def reset(self):
+        """Discard any buffered partial sentence."""
+        self._buf.clear()
+
+    def stats(self) -> dict:
+        """Parser statistics."""
+        return {
+            "sentences": self.sentences,
+            "ubx_frames": self.ubx_frames,
+            "checksum_errors": self.checksum_errors,
+            "bytes_dropped": self.bytes_dropped,
+            "buffered": len(self._buf),
+        }
+
+    def feed(self, data) -> List[dict]:
+        """
+        Append received bytes and extract complete updates.
+
+        Args:
+            data: Bytes-like chunk from the GPS UART
+
+        Returns:
+            List of update dicts (possibly empty)
+        """
+        buf = self._buf
+        buf += data
+        updates: List[dict] = []
+        pos = 0
+        end = len(buf)
+        while pos < end:
+            nmea = buf.find(b'$', pos)
+            ubx = buf.find(_UBX_SYNC, pos)
+            if nmea < 0 and ubx < 0:
+                # keep a trailing 0xB5, it may start a UBX sync
+                keep = 1 if buf[end - 1] == 0xB5 else 0
+                self.bytes_dropped += end - pos - keep
+                pos = end - keep
+                break
+            if ubx >= 0 and (nmea < 0 or ubx < nmea):
+                self.bytes_dropped += ubx - pos
+                pos = ubx
+                consumed = self._parse_ubx(buf, pos, end, updates)
+            else:
+                self.bytes_dropped += nmea - pos
+                pos = nmea
+                consumed = self._parse_nmea(buf, pos, end, updates)
+            if consumed == 0:
+                break           # incomplete, wait for more bytes
+            pos += consumed
+        if pos:
+            del buf[:pos]
+        return updates
+
+    # ------------------------------------------------------------------
+    # NMEA
+    # ------------------------------------------------------------------
+    def _parse_nmea(self, buf: bytearray, pos: int, end: int, updates: List[dict]) -> int:
+        limit = min(end, pos + _MAX_NMEA)
+        eol = buf.find(b'\n', pos, limit)
+        stop = eol if eol >= 0 else limit
+        # another '$' or a UBX sync before the terminator: this '$' was noise
+        # (a stray byte during resync must not swallow the frame behind it)
+        restart = [i for i in (buf.find(b'$', pos + 1, stop), buf.find(_UBX_SYNC, pos + 1, stop)) if i >= 0]
+        if restart:
+            self.bytes_dropped += min(restart) - pos
+            return min(restart) - pos
+        if eol < 0:
+            if end - pos >= _MAX_NMEA:
+                self.bytes_dropped += 1
+                return 1        # no terminator in time: skip this '$'
+            return 0
+        star = buf.rfind(b'*', pos, eol)
+        if star < 0 or eol - star < 3:
+            self.checksum_errors += 1
+            return eol + 1 - pos
+        try:
+            expected = int(buf[star + 1:star + 3], 16)
+        except ValueError:
+            expected = -1
+        body = bytes(buf[pos + 1:star])
+        if nmea_checksum(body) != expected:
+            self.checksum_errors += 1
+            return eol + 1 - pos
+        self.sentences += 1
+        fields = body.split(b',')
+        kind = fields[0][2:]
+        try:
+            if kind == b'GGA':
+                update = self._gga(fields)
+            elif kind == b'RMC':
+                update = self._rmc(fields)
+            elif kind == b'VTG':
+                update = self._vtg(fields)
+            else:
+                update = None
+        except (ValueError, IndexError):
+            update = None
+        if update:
+            updates.append(update)
+        return eol + 1 - pos
+
+    @staticmethod
+    def _gga(f: list) -> dict:
+        quality = int(f[6] or 0)
+        update = {"source": "GGA", "gps_fix": 1 if quality > 0 else 0, "num_satellites": int(f[7] or 0)}
+        if quality > 0:
+            update["lat"] = _nmea_coord(f[2], f[3])
+            update["lon"] = _nmea_coord(f[4], f[5])
+            if f[9]:
+                update["gps_alt_m"] = float(f[9])
+        return update
+
+    @staticmethod
+    def _rmc(f: list) -> dict:
+        if f[2] != b'A':
+            return {"source": "RMC", "gps_fix": 0}
+        update = {
+            "source": "RMC",
+            "lat": _nmea_coord(f[3], f[4]),
+            "lon": _nmea_coord(f[5], f[6]),
+        }
+        if f[7]:
+            update["ground_speed_mps"] = float(f[7]) * _KNOTS_TO_MPS
+        if f[8]:
+            update["course_deg"] = float(f[8])
+        return update
+
+    @staticmethod
+    def _vtg(f: list) -> Optional[dict]:
+        update = {"source": "VTG"}
+        if f[1]:
+            update["course_deg"] = float(f[1])
+        if len(f) > 7 and f[7]:
+            update["ground_speed_mps"] = float(f[7]) * _KMH_TO_MPS
+        elif f[5]:
+            update["ground_speed_mps"] = float(f[5]) * _KNOTS_TO_MPS
+        return update if len(update) > 1 else None
+
+    # ------------------------------------------------------------------
+    # UBX
+    # ------------------------------------------------------------------
+    def _parse_ubx(self, buf: bytearray, pos: int, end: int, updates: List[dict]) -> int:
+        if end - pos < 6:
+            return 0
+        length = buf[pos + 4] | (buf[pos + 5] << 8)
+        if length > _MAX_UBX_PAYLOAD:
+            self.bytes_dropped += 1
+            return 1
+        total = 8 + length
+        if end - pos < total:
+            return 0
+        view = memoryview(buf)
+        try:
+            ck_a, ck_b = ubx_checksum(view[pos + 2:pos + 6 + length])
+            if ck_a != buf[pos + 6 + length] or ck_b != buf[pos + 7 + length]:
+                self.checksum_errors += 1
+                self.bytes_dropped += 1
+                return 1        # resync on the next sync word
+            self.ubx_frames += 1
+            if (buf[pos + 2], buf[pos + 3]) == _UBX_NAV_PVT and length >= _NAV_PVT.size:
+                updates.append(self._nav_pvt(view, pos + 6))
+        finally:
+            view.release()
+        return total
+
+    @staticmethod
+    def _nav_pvt(view: memoryview, offset: int) -> dict:
+        (_itow, _year, _month, _day, _hour, _minute, _sec, _valid, _tacc, _nano,
+         fix_type, flags, _flags2, num_sv, lon, lat, _height, h_msl, _hacc, _vacc,
+         _vel_n, _vel_e, _vel_d, g_speed, head_mot, _sacc, _headacc, _pdop) = _NAV_PVT.unpack_from(view, offset)
+        fix_ok = bool(flags & 0x01) and fix_type in (2, 3, 4)
+        update = {"source": "NAV-PVT", "gps_fix": 1 if fix_ok else 0, "num_satellites": num_sv}
+        if fix_ok:
+            update.update({
+                "lat": lat / 1e7,
+                "lon": lon / 1e7,
+                "gps_alt_m": h_msl / 1000.0,
+                "ground_speed_mps": g_speed / 1000.0,
+                "course_deg": head_mot / 1e5,
+            })
+        return update
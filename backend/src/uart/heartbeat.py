@@ -0,0 +1,228 @@
+"""
+Heartbeat Monitor - FC link health over MessageType.HEARTBEAT
+
+Sends a HEARTBEAT frame on the flight-controller link every ``interval_s``;
+the STM32 echoes it back unchanged. From the echoes the monitor derives:
+
+  - round-trip time (last, mean, p95 over a sliding window)
+  - loss rate (heartbeats not answered within ``reply_timeout_s``)
+  - link lost / restored events: no echo for ``lost_after_s`` (or the port
+    closing) raises "lost" within ``lost_after_s + interval_s``; the next
+    echo raises "restored"
+
+Heartbeats bypass the CommandScheduler: they carry seq 0 (no ACK) and are
+matched on their own ``id`` field.
+
+Payload (protocol.CODECS[HEARTBEAT]): id uint32, time_ms uint32 (host clock).
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from backend.src.uart.protocol import CODECS, MessageType, encode_message
+
+
+_HEARTBEAT = CODECS[MessageType.HEARTBEAT]
+
+
+class LinkHealth:
+    """Link health states."""
+    IDLE = "idle"        # no echo received yet
+    OK = "ok"
+    LOST = "lost"
+
+
+class HeartbeatMonitor:
+    """
+    Periodic heartbeat exchange on a ManagedLink.
+
+    Usage:
+        monitor = HeartbeatMonitor(link_manager.fc)
+        monitor.on_link_lost(lambda info: ...)
+        monitor.start()
+    """
+
+    def __init__(
+        self,
+        link,
+        interval_s: float = 0.2,
+        reply_timeout_s: float = 0.5,
+        lost_after_s: float = 1.0,
+        window: int = 50,
+    ):
+        """
+        Args:
+            link: ManagedLink (needs send(), is_connected(), add_handler())
+            interval_s: Heartbeat period
+            reply_timeout_s: An echo later than this counts as lost
+            lost_after_s: Silence before the link is declared lost
+            window: Heartbeats kept for RTT / loss statistics
+        """
+        self.link = link
+        self.interval_s = interval_s
+        self.reply_timeout_s = reply_timeout_s
+        self.lost_after_s = lost_after_s
+
+        self.state = LinkHealth.IDLE
+        self.last_rtt_ms: Optional[float] = None
+        self.lost_events = 0
+        self.sent = 0
+        self.received = 0
+
+        self._rtts: Deque[float] = deque(maxlen=window)
+        self._results: Deque[bool] = deque(maxlen=window)
+        self._pending: Dict[int, float] = {}
+        self._next_id = 1
+        self._t0 = time.monotonic()
+        self._last_reply_at: Optional[float] = None
+        self._watch_since: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lost_callbacks: List[Callable[[dict], None]] = []
+        self._restored_callbacks: List[Callable[[dict], None]] = []
+        self._update_callbacks: List[Callable[["HeartbeatMonitor"], None]] = []
+
+        link.add_handler(self._on_heartbeat, MessageType.HEARTBEAT)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def on_link_lost(self, callback: Callable[[dict], None]):
+        """Register ``callback(info)`` for link-lost events."""
+        self._lost_callbacks.append(callback)
+
+    def on_link_restored(self, callback: Callable[[dict], None]):
+        """Register ``callback(info)`` for link-restored events."""
+        self._restored_callbacks.append(callback)
+
+    def on_update(self, callback: Callable[["HeartbeatMonitor"], None]):
+        """Register ``callback(monitor)`` called after every echo / expiry."""
+        self._update_callbacks.append(callback)
+
+    def start(self):
+        """Start the heartbeat task on the running loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._pending.clear()
+        self._watch_since = None
+        self._task = loop.create_task(self._run(), name="uart-heartbeat")
+
+    async def stop(self):
+        """Stop sending heartbeats."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def loss_pct(self) -> float:
+        """Heartbeat loss over the window, in percent."""
+        if not self._results:
+            return 0.0
+        return 100.0 * self._results.count(False) / len(self._results)
+
+    def status(self) -> dict:
+        """Link health for /health and the UI."""
+        rtts = np.fromiter(self._rtts, dtype=np.float64, count=len(self._rtts))
+        return {
+            "state": self.state,
+            "rtt_ms": self.last_rtt_ms,
+            "rtt_mean_ms": round(float(rtts.mean()), 3) if len(rtts) else None,
+            "rtt_p95_ms": round(float(np.percentile(rtts, 95)), 3) if len(rtts) else None,
+            "loss_pct": round(self.loss_pct(), 1),
+            "sent": self.sent,
+            "received": self.received,
+            "lost_events": self.lost_events,
+            "silence_s": round(time.monotonic() - self._last_reply_at, 2) if self._last_reply_at else None,
+        }
+
+    # ------------------------------------------------------------------
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            self._expire(now)
+            if self.link.is_connected():
+                if self._watch_since is None:
+                    self._watch_since = now
+                await self._send(now)
+            else:
+                self._watch_since = None
+            self._check_lost(now)
+            await asyncio.sleep(self.interval_s)
+
+    async def _send(self, now: float):
+        hb_id = self._next_id
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF or 1
+        time_ms = int((now - self._t0) * 1000) & 0xFFFFFFFF
+        self._pending[hb_id] = now
+        self.sent += 1
+        await self.link.send(encode_message(MessageType.HEARTBEAT, (hb_id, time_ms)))
+
+    def _expire(self, now: float):
+        expired = [i for i, sent_at in self._pending.items() if now - sent_at > self.reply_timeout_s]
+        for hb_id in expired:
+            del self._pending[hb_id]
+            self._results.append(False)
+        if expired:
+            self._notify_update()
+
+    def _check_lost(self, now: float):
+        if self.state == LinkHealth.LOST:
+            return
+        if not self.link.is_connected():
+            if self.state == LinkHealth.OK:
+                self._set_lost("port closed")
+            return
+        since = self._last_reply_at if self._last_reply_at and self.state == LinkHealth.OK else self._watch_since
+        if since is not None and now - since > self.lost_after_s:
+            self._set_lost(f"no heartbeat echo for {now - since:.1f} s")
+
+    def _set_lost(self, reason: str):
+        self.state = LinkHealth.LOST
+        self.lost_events += 1
+        self._pending.clear()
+        info = {"link": self.link.name, "reason": reason, "at": time.time(), "loss_pct": round(self.loss_pct(), 1)}
+        print(f"[HEARTBEAT] {self.link.name} link lost: {reason}")
+        self._emit(self._lost_callbacks, info)
+
+    def _on_heartbeat(self, frame):
+        if len(frame.payload) < _HEARTBEAT.size:
+            return
+        hb_id, _time_ms = _HEARTBEAT.unpack_from(frame.payload)
+        sent_at = self._pending.pop(hb_id, None)
+        if sent_at is None:
+            return              # late echo, already counted as lost
+        now = time.monotonic()
+        rtt_ms = round((now - sent_at) * 1000.0, 3)
+        self.received += 1
+        self.last_rtt_ms = rtt_ms
+        self._rtts.append(rtt_ms)
+        self._results.append(True)
+        self._last_reply_at = now
+        if self.state != LinkHealth.OK:
+            was_lost = self.state == LinkHealth.LOST
+            self.state = LinkHealth.OK
+            if was_lost:
+                print(f"[HEARTBEAT] {self.link.name} link restored (rtt {rtt_ms} ms)")
+                self._emit(self._restored_callbacks, {"link": self.link.name, "at": time.time(), "rtt_ms": rtt_ms})
+        self._notify_update()
+
+    def _notify_update(self):
+        for callback in self._update_callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"[HEARTBEAT] update callback error: {e}")
+
+    def _emit(self, callbacks: List[Callable], info: dict):
+        for callback in callbacks:
+            try:
+                callback(info)
+            except Exception as e:
+                print(f"[HEARTBEAT] event callback error: {e}")
@@ -0,0 +1,242 @@
+"""
+UART Link Manager - Process-wide serial links
+
+Owns exactly one AsyncUARTLink per physical UART (config/cablage.py):
+  - FLIGHT_CONTROLLER → link_manager.fc
+  - GPS               → link_manager.gps (NMEA/UBX, see gps_parser.py)
+
+Every API route and WebSocket command goes through these shared links
+instead of constructing its own UARTLink, so the port is opened once and
+stays open. Commands to the STM32 are submitted to link_manager.commands
+(CommandScheduler) rather than written to the link directly, and
+link_manager.heartbeat (HeartbeatMonitor) tracks FC round-trip time / loss.
+
+Each ManagedLink:
+  - opens lazily, on first use (or on server startup)
+  - reconnects automatically with exponential backoff when the port is
+    missing or disappears (USB unplug, STM32 reset...)
+  - reports its connection state for /health and the Systems page
+
+While the hardware is not connected, send() falls back to the simulated
+send of UARTLink so the rest of the system keeps working on a dev machine.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+from config.cablage import FLIGHT_CONTROLLER, GPS
+
+from backend.src.uart.async_link import AsyncUARTLink
+from backend.src.uart.gps_parser import GPSParser
+from backend.src.uart.heartbeat import HeartbeatMonitor
+from backend.src.uart.scheduler import CommandScheduler
+
+
+class LinkState:
+    """Connection state constants."""
+    IDLE = "idle"                    # never used yet (lazy)
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    DISCONNECTED = "disconnected"    # waiting for the next reconnect attempt
+    DISABLED = "disabled"            # "enabled": False in cablage config
+    STOPPED = "stopped"
+
+
+class ManagedLink:
+    """
+    A shared AsyncUARTLink with lazy open and automatic reconnect.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: Dict[str, Any],
+        decoder=None,
+        queue_size: int = 256,
+        min_backoff_s: float = 0.5,
+        max_backoff_s: float = 30.0,
+    ):
+        """
+        Args:
+            name: Short link name ("fc", "gps")
+            config: Cabling config dict
+            decoder: Stream decoder passed to AsyncUARTLink (default: FrameDecoder)
+            queue_size: recv() queue size passed to AsyncUARTLink (0 = handlers only)
+            min_backoff_s: First reconnect delay
+            max_backoff_s: Reconnect delay ceiling
+        """
+        self.name = name
+        self.config = config
+        self.link = AsyncUARTLink(config=config, decoder=decoder, queue_size=queue_size)
+        self.min_backoff_s = min_backoff_s
+        self.max_backoff_s = max_backoff_s
+
+        self.state = LinkState.IDLE if config.get("enabled", True) else LinkState.DISABLED
+        self.attempts = 0
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+        self.connected_since: Optional[float] = None
+        self.next_retry_at: Optional[float] = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._lost: Optional[asyncio.Event] = None
+        self._connected: Optional[asyncio.Event] = None
+        self.link.on_disconnect(self._on_link_lost)
+
+    # ------------------------------------------------------------------
+    def ensure_started(self):
+        """Start the connect/reconnect task on the running loop (idempotent)."""
+        if self.state == LinkState.DISABLED:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        if self._task is not None and self._task.get_loop() is not loop:
+            # Previous loop is gone (tests, reloads): drop its state
+            self.link.close()
+        self._lost = asyncio.Event()
+        self._connected = asyncio.Event()
+        self._task = loop.create_task(self._run(), name=f"uart-link-{self.name}")
+
+    async def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the hardware port is open. Returns False on timeout."""
+        self.ensure_started()
+        if self._connected is None:
+            return False
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self):
+        """Cancel reconnection and close the port."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        self.link.close()
+        if self.state != LinkState.DISABLED:
+            self.state = LinkState.STOPPED
+        self.connected_since = None
+
+    def is_connected(self) -> bool:
+        """True when the hardware port is open."""
+        return self.state == LinkState.CONNECTED and self.link.is_open()
+
+    async def send(self, data: bytes) -> bool:
+        """
+        Send over the shared link (simulated while disconnected).
+
+        Returns:
+            True if written/buffered or simulated
+        """
+        self.ensure_started()
+        return await self.link.send(data)
+
+    def add_handler(self, callback, msg_type: Optional[int] = None):
+        """Register a frame callback (survives reconnects)."""
+        self.link.add_handler(callback, msg_type)
+
+    def status(self) -> dict:
+        """Connection state for /health and the UI."""
+        now = time.time()
+        return {
+            "name": self.name,
+            "label": self.link.label,
+            "port": self.link.link.port,
+            "state": self.state,
+            "connected": self.is_connected(),
+            "uptime_s": round(now - self.connected_since, 1) if self.connected_since else 0.0,
+            "attempts": self.attempts,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "next_retry_in_s": round(max(0.0, self.next_retry_at - now), 1)
+            if self.next_retry_at and self.state == LinkState.DISCONNECTED else None,
+            "stats": self.link.stats(),
+        }
+
+    # ------------------------------------------------------------------
+    async def _run(self):
+        backoff = self.min_backoff_s
+        was_connected = False
+        try:
+            while True:
+                self.state = LinkState.CONNECTING
+                self.attempts += 1
+                ok = await self.link.open()
+                if ok:
+                    if was_connected:
+                        self.reconnects += 1
+                    was_connected = True
+                    self.state = LinkState.CONNECTED
+                    self.connected_since = time.time()
+                    self.next_retry_at = None
+                    self.last_error = None
+                    backoff = self.min_backoff_s
+                    self._lost.clear()
+                    self._connected.set()
+                    await self._lost.wait()
+                    self._connected.clear()
+                    self.connected_since = None
+                else:
+                    self.last_error = f"cannot open {self.link.link.port}"
+                self.state = LinkState.DISCONNECTED
+                self.next_retry_at = time.time() + backoff
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff_s)
+        except asyncio.CancelledError:
+            self._connected.clear()
+            raise
+
+    def _on_link_lost(self, exc: Exception):
+        self.last_error = str(exc)
+        if self._lost is not None:
+            self._lost.set()
+
+
+class LinkManager:
+    """
+    Process-wide owner of the flight controller and GPS links.
+    """
+
+    def __init__(self, fc_config: Dict[str, Any] = None, gps_config: Dict[str, Any] = None):
+        self.fc = ManagedLink("fc", fc_config or FLIGHT_CONTROLLER)
+        # GPS updates are consumed by handlers only, no recv() queue
+        self.gps = ManagedLink("gps", gps_config or GPS, decoder=GPSParser(), queue_size=0)
+        self.commands = CommandScheduler(self.fc)
+        self.heartbeat = HeartbeatMonitor(self.fc)
+
+    def links(self) -> Dict[str, ManagedLink]:
+        return {"fc": self.fc, "gps": self.gps}
+
+    async def start(self):
+        """Start connecting all enabled links (non-blocking)."""
+        for link in self.links().values():
+            link.ensure_started()
+        if self.fc.state != LinkState.DISABLED:
+            self.heartbeat.start()
+
+    async def stop(self):
+        """Close all links (server shutdown)."""
+        await self.commands.stop()
+        await self.heartbeat.stop()
+        for link in self.links().values():
+            await link.stop()
+
+    def status(self) -> dict:
+        """State of every link."""
+        status = {name: link.status() for name, link in self.links().items()}
+        status["fc"]["commands"] = self.commands.status()
+        status["fc"]["heartbeat"] = self.heartbeat.status()
+        return status
+
+
+# Module-level link manager instance (one serial owner per process)
+link_manager = LinkManager()
@@ -4,11 +4,27 @@ UART Protocol Definition
 Defines the wire protocol for communication with drone hardware.
 Includes message framing, checksums, and message types.
 
-TODO: Define real protocol based on hardware
+Frame layout (all multi-byte fields little-endian):
+
+    [0xAA][0x55][len:1][msg_type:1][seq:1][payload:len][crc16:2]
+
+- ``len`` is the payload length (0-255)
+- ``crc16`` is CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) computed over
+  ``len``, ``msg_type``, ``seq`` and the payload. It is the same CRC the
+  STM32 HAL CRC unit / a 256-entry table produces on the MCU side.
+
+A corrupted byte only costs the frame it lands in: the decoder drops that
+frame and resynchronises on the next start-of-frame marker.
+
+Payload layouts live in CODECS (one precompiled struct per MessageType);
+encode_into() packs a frame straight into a caller-owned buffer and
+Codec.unpack_from() reads fields from received memoryviews.
 """
 
 
+import binascii
 import struct
+from typing import List, NamedTuple
 
 
 class MessageType:
@@ -18,12 +34,85 @@ class MessageType:
     TAKEOFF = 0x03
     LAND = 0x04
     MOVE = 0x05
+    RTL = 0x06
+    HOVER = 0x07
+    SET_SPEED = 0x08
+    ABORT = 0x09
     STATUS_REQUEST = 0x10
     TELEMETRY_DATA = 0x11
     PID_UPDATE = 0x20
+    MISSION_CLEAR = 0x30
+    MISSION_ITEM = 0x31
+    ACK = 0x80
     HEARTBEAT = 0xFF
 
 
+class AckStatus:
+    """Status byte carried by an ACK frame."""
+    OK = 0x00
+    REJECTED = 0x01
+    BAD_PAYLOAD = 0x02
+    BUSY = 0x03
+
+
+# Framing constants
+SOF = b'\xAA\x55'
+HEADER_SIZE = 5          # SOF(2) + len(1) + msg_type(1) + seq(1)
+CRC_SIZE = 2
+FRAME_OVERHEAD = HEADER_SIZE + CRC_SIZE
+MAX_PAYLOAD = 255
+MAX_FRAME_SIZE = FRAME_OVERHEAD + MAX_PAYLOAD
+
+_CRC_INIT = 0xFFFF
+
+
+def crc16(data) -> int:
+    """CRC-16/CCITT-FALSE of ``data`` (bytes, bytearray or memoryview)."""
+    return binascii.crc_hqx(data, _CRC_INIT)
+
+
+def _write_header_crc(buf, offset: int, msg_type: int, length: int, seq: int) -> int:
+    """Fill SOF/header/CRC around a payload already at offset+HEADER_SIZE."""
+    buf[offset] = 0xAA
+    buf[offset + 1] = 0x55
+    buf[offset + 2] = length
+    buf[offset + 3] = msg_type & 0xFF
+    buf[offset + 4] = seq & 0xFF
+    end = offset + HEADER_SIZE + length
+    crc = crc16(memoryview(buf)[offset + 2:end])
+    buf[end] = crc & 0xFF
+    buf[end + 1] = crc >> 8
+    return FRAME_OVERHEAD + length
+
+
+def encode_frame(msg_type: int, payload=b'', seq: int = 0) -> bytes:
+    """
+    Wrap a raw payload into a complete frame.
+
+    Args:
+        msg_type: MessageType constant
+        payload: Raw payload bytes (max 255)
+        seq: Sequence number (0-255)
+
+    Returns:
+        Framed bytes ready for UARTLink.send()
+
+    Raises:
+        ValueError: if the payload does not fit in a single frame
+    """
+    length = len(payload)
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"payload too large for one frame ({length} > {MAX_PAYLOAD})")
+    frame = bytearray(FRAME_OVERHEAD + length)
+    frame[HEADER_SIZE:HEADER_SIZE + length] = payload
+    _write_header_crc(frame, 0, msg_type, length, seq)
+    return bytes(frame)
+
+
+# ============================================================================
+# Payload codecs
+# ============================================================================
+
 _AXIS_CODE = {
     'pitch': 0x01,
     'roll': 0x02,
@@ -32,59 +121,359 @@ _AXIS_CODE = {
 }
 
 
-def encode_message(msg_type: int, payload: bytes = b'') -> bytes:
+class Codec:
+    """
+    Precompiled payload layout of one MessageType.
+
+    Wraps a ``struct.Struct`` (format parsed once at import) with field names
+    so payloads can be packed from dicts / tuples straight into a send
+    buffer and unpacked from received memoryviews without intermediate
+    copies.
     """
-    Lightweight encoder for messages used in this project.
 
-    Format (simple, for STM32 prototyping):
-      [msg_type:1][payload...]
+    __slots__ = ("msg_type", "struct", "size", "fields", "scales", "enums", "_enums_rev")
+
+    def __init__(self, msg_type: int, fmt: str, fields: tuple, scales: dict = None, enums: dict = None):
+        """
+        Args:
+            msg_type: MessageType constant
+            fmt: struct format (little-endian, no padding)
+            fields: Field names in wire order
+            scales: {field: factor} for fixed-point fields (wire = round(value * factor))
+            enums: {field: {name: code}} for fields sent as a code byte
+        """
+        self.msg_type = msg_type
+        self.struct = struct.Struct(fmt)
+        self.size = self.struct.size
+        self.fields = fields
+        self.scales = scales or {}
+        self.enums = enums or {}
+        self._enums_rev = {f: {v: k for k, v in m.items()} for f, m in self.enums.items()}
+
+    def values_from_dict(self, payload: dict) -> tuple:
+        """
+        Convert a dict payload into wire-order values.
+
+        Raises:
+            ValueError: missing field, unknown enum name or non-numeric value
+        """
+        missing = [name for name in self.fields if name not in payload]
+        if missing:
+            raise ValueError(f"0x{self.msg_type:02X} payload missing field(s): {', '.join(missing)}")
+        values = []
+        for name in self.fields:
+            value = payload[name]
+            if name in self.enums:
+                if value not in self.enums[name] and value not in self._enums_rev[name]:
+                    raise ValueError(f"unknown {name}: {value!r} (known: {', '.join(self.enums[name])})")
+                value = self.enums[name].get(value, value)
+            elif name in self.scales:
+                value = int(round(float(value) * self.scales[name]))
+            values.append(value)
+        return tuple(values)
+
+    def pack_into(self, buf, offset: int, payload) -> int:
+        """
+        Pack ``payload`` (dict or wire-order tuple) into ``buf`` at ``offset``.
+
+        Returns:
+            Number of bytes written
+        """
+        values = self.values_from_dict(payload) if isinstance(payload, dict) else payload
+        try:
+            self.struct.pack_into(buf, offset, *values)
+        except (struct.error, TypeError) as e:
+            raise ValueError(f"0x{self.msg_type:02X} payload: {e}") from None
+        return self.size
 
-    Special handling for PID_UPDATE: payload = [axis_code:1][kp:4][ki:4][kd:4] (float32 LE)
+    def unpack_from(self, buf, offset: int = 0) -> tuple:
+        """Unpack wire-order values from a bytes-like object / memoryview."""
+        return self.struct.unpack_from(buf, offset)
 
-    Returns raw bytes suitable for UARTLink.send(). This is NOT a production
-    framing protocol (no CRC/ESCaping) — good enough for local prototyping.
+    def to_dict(self, buf, offset: int = 0) -> dict:
+        """Unpack into a dict, undoing fixed-point scaling and enum codes."""
+        out = dict(zip(self.fields, self.struct.unpack_from(buf, offset)))
+        for name, factor in self.scales.items():
+            out[name] = out[name] / factor
+        for name, rev in self._enums_rev.items():
+            out[name] = rev.get(out[name], out[name])
+        return out
+
+
+# Telemetry pushed by the STM32 (50-100 Hz). Field order is the wire order.
+TELEMETRY_FIELDS = (
+    'time_ms',          # I  MCU uptime (ms)
+    'roll_deg',         # f
+    'pitch_deg',        # f
+    'yaw_deg',          # f
+    'altitude_m',       # f  baro altitude
+    'climb_mps',        # f  vertical speed
+    'battery_voltage_v',  # f
+    'battery_percent',  # f
+    'motor1',           # H  ESC command (0-1000)
+    'motor2',           # H
+    'motor3',           # H
+    'motor4',           # H
+    'mode',             # B  flight mode code
+    'armed',            # B  0/1
+)
+TELEMETRY_FORMAT = '<I f f f f f f f H H H H B B'
+
+_LATLON_E7 = {'lat': 1e7, 'lon': 1e7}
+
+CODECS = {
+    c.msg_type: c for c in (
+        Codec(MessageType.ARM, '<', ()),
+        Codec(MessageType.DISARM, '<', ()),
+        Codec(MessageType.TAKEOFF, '<f', ('alt',)),
+        Codec(MessageType.LAND, '<', ()),
+        Codec(MessageType.MOVE, '<i i f', ('lat', 'lon', 'alt'), scales=_LATLON_E7),
+        Codec(MessageType.RTL, '<', ()),
+        Codec(MessageType.HOVER, '<', ()),
+        Codec(MessageType.SET_SPEED, '<f', ('value',)),
+        Codec(MessageType.ABORT, '<', ()),
+        Codec(MessageType.STATUS_REQUEST, '<', ()),
+        Codec(MessageType.TELEMETRY_DATA, TELEMETRY_FORMAT, TELEMETRY_FIELDS),
+        Codec(MessageType.PID_UPDATE, '<B f f f', ('axis', 'kp', 'ki', 'kd'), enums={'axis': _AXIS_CODE}),
+        Codec(MessageType.MISSION_CLEAR, '<', ()),
+        Codec(MessageType.MISSION_ITEM, '<H i i f f', ('index', 'lat', 'lon', 'alt', 'speed'), scales=_LATLON_E7),
+        Codec(MessageType.ACK, '<B B', ('seq', 'status')),
+        Codec(MessageType.HEARTBEAT, '<I I', ('id', 'time_ms')),
+    )
+}
+
+ACK_STRUCT = CODECS[MessageType.ACK].struct            # acked seq, AckStatus
+TELEMETRY_STRUCT = CODECS[MessageType.TELEMETRY_DATA].struct
+
+
+def encode_into(buf, msg_type: int, payload=b'', seq: int = 0, offset: int = 0) -> int:
     """
-    try:
-        if msg_type == MessageType.PID_UPDATE and isinstance(payload, dict):
-            axis = payload.get('axis')
-            kp = float(payload.get('kp', 0.0))
-            ki = float(payload.get('ki', 0.0))
-            kd = float(payload.get('kd', 0.0))
-            axis_code = _AXIS_CODE.get(axis, 0x00)
-            # pack: msg_type (B), axis_code (B), kp, ki, kd (3f little-endian)
-            return struct.pack('<B B f f f', msg_type, axis_code, kp, ki, kd)
-        # default: simple header + raw payload
-        if isinstance(payload, (bytes, bytearray)):
-            return bytes([msg_type]) + bytes(payload)
-        # if payload is str/dict/etc. convert to utf-8
-        return bytes([msg_type]) + str(payload).encode('utf-8')
-    except Exception as e:
-        print(f"protocol.encode_message error: {e}")
-        return bytes([msg_type]) + b''
+    Encode a complete frame directly into a preallocated buffer.
 
+    Dict / tuple payloads are packed with the MessageType's codec;
+    bytes-like payloads are copied as-is (already encoded).
 
-def decode_message(data: bytes) -> tuple:
+    Args:
+        buf: Writable buffer (bytearray / memoryview) with room for the frame
+        msg_type: MessageType constant
+        payload: dict, wire-order tuple or raw bytes
+        seq: Sequence number (0-255)
+        offset: Where the frame starts in ``buf``
+
+    Returns:
+        Frame length in bytes
+
+    Raises:
+        ValueError: unknown message type for a structured payload, payload
+            that does not match the codec (missing field, bad value, raw
+            bytes of the wrong size), or payload too large
     """
-    Minimal decoder — returns (msg_type, payload_bytes).
+    body = offset + HEADER_SIZE
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        length = len(payload)
+        if length > MAX_PAYLOAD:
+            raise ValueError(f"payload too large for one frame ({length} > {MAX_PAYLOAD})")
+        codec = CODECS.get(msg_type)
+        if codec is not None and length != codec.size:
+            raise ValueError(f"0x{msg_type:02X} payload is {length} bytes, expected {codec.size}")
+        buf[body:body + length] = payload
+    else:
+        codec = CODECS.get(msg_type)
+        if codec is None:
+            raise ValueError(f"no codec for message type 0x{msg_type:02X}")
+        length = codec.pack_into(buf, body, payload)
+    return _write_header_crc(buf, offset, msg_type, length, seq)
+
+
+def encode_message(msg_type: int, payload=b'', seq: int = 0) -> bytes:
     """
-    if not data:
-        return None, b''
-    msg_type = data[0]
-    return msg_type, data[1:]
+    Encode a message into a complete frame.
+
+    Dict / tuple payloads use the codec registered in CODECS for msg_type,
+    e.g. PID_UPDATE: {'axis': 'pitch', 'kp': .., 'ki': .., 'kd': ..} →
+    [axis_code:1][kp:4][ki:4][kd:4] (float32 LE).
+
+    Returns framed bytes suitable for UARTLink.send().
+
+    Raises:
+        ValueError: see encode_into() — a malformed command is never sent
+    """
+    buf = bytearray(MAX_FRAME_SIZE)     # per call: reachable from threadpool endpoints
+    n = encode_into(buf, msg_type, payload, seq)
+    return bytes(buf[:n])
+
 
+def decode_payload(msg_type: int, payload) -> dict:
+    """
+    Decode a received payload (bytes or memoryview) into a dict.
+
+    Raises:
+        ValueError: unknown message type or short payload
+    """
+    codec = CODECS.get(msg_type)
+    if codec is None:
+        raise ValueError(f"no codec for message type 0x{msg_type:02X}")
+    if len(payload) < codec.size:
+        raise ValueError(f"short payload for 0x{msg_type:02X}: {len(payload)} < {codec.size}")
+    return codec.to_dict(payload)
 
 
 def decode_message(data: bytes) -> tuple:
     """
-    Decode a received message.
-    
+    Decode a single complete frame.
+
     Args:
-        data: Raw message bytes
-        
+        data: Raw frame bytes (as produced by encode_message)
+
     Returns:
-        Tuple of (message_type, payload)
-        
-    TODO: Implement real protocol decoding
+        Tuple of (message_type, payload). (None, b'') if the frame is
+        truncated, malformed or fails its CRC.
     """
-    print(f"TODO: Implement protocol decoding for data: {data.hex()}")
-    return None, b''
+    if not data or len(data) < FRAME_OVERHEAD or data[0:2] != SOF:
+        return None, b''
+    length = data[2]
+    if len(data) < FRAME_OVERHEAD + length:
+        return None, b''
+    end = HEADER_SIZE + length
+    received = data[end] | (data[end + 1] << 8)
+    if crc16(memoryview(data)[2:end]) != received:
+        return None, b''
+    return data[3], bytes(data[HEADER_SIZE:end])
+
+
+class Frame(NamedTuple):
+    """A decoded frame. ``payload`` is a view into the decoder's buffer."""
+    msg_type: int
+    seq: int
+    payload: memoryview
+
+
+class FrameDecoder:
+    """
+    Incremental frame decoder for a byte stream.
+
+    Feed it whatever chunks the serial port returns; it accumulates them in a
+    preallocated buffer and returns every complete, CRC-valid frame. Scanning
+    for the start-of-frame marker and CRC computation both run in C
+    (``bytearray.find`` / ``binascii.crc_hqx``), and payloads are returned as
+    memoryviews over the internal buffer, so no per-frame copy is made.
+
+    Payload views are only valid until the next call to ``feed()``; copy them
+    with ``bytes(frame.payload)`` if they need to outlive it.
+    """
+
+    def __init__(self, buffer_size: int = 4096):
+        """
+        Args:
+            buffer_size: Size of the receive buffer (at least 2 max frames)
+        """
+        size = max(buffer_size, 2 * MAX_FRAME_SIZE)
+        self._buf = bytearray(size)
+        self._mv = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+
+        # Statistics
+        self.frames_ok = 0
+        self.crc_errors = 0
+        self.bytes_dropped = 0
+
+    def reset(self):
+        """Discard any buffered partial frame."""
+        self._start = 0
+        self._end = 0
+
+    def buffered(self) -> int:
+        """Number of bytes waiting for the rest of a frame."""
+        return self._end - self._start
+
+    def stats(self) -> dict:
+        """Decoder statistics."""
+        return {
+            "frames_ok": self.frames_ok,
+            "crc_errors": self.crc_errors,
+            "bytes_dropped": self.bytes_dropped,
+            "buffered": self.buffered(),
+        }
+
+    def feed(self, data) -> List[Frame]:
+        """
+        Append received bytes and extract complete frames.
+
+        Args:
+            data: Bytes-like chunk from the serial port (any size)
+
+        Returns:
+            List of decoded frames (possibly empty)
+        """
+        frames: List[Frame] = []
+        src = memoryview(data)
+        self._compact()
+        capacity = len(self._buf)
+        while len(src):
+            room = capacity - self._end
+            if room == 0:
+                # Buffer full of garbage that never resolved into a frame
+                self.bytes_dropped += self._end - self._start
+                self.reset()
+                room = capacity
+            n = min(room, len(src))
+            self._mv[self._end:self._end + n] = src[:n]
+            self._end += n
+            src = src[n:]
+            if len(src):
+                # More input than room: frames returned so far must stay
+                # valid, so keep them out of the region compaction rewrites.
+                self._parse(frames)
+                if frames:
+                    frames = [Frame(f.msg_type, f.seq, memoryview(bytes(f.payload))) for f in frames]
+                self._compact()
+        self._parse(frames)
+        return frames
+
+    # ------------------------------------------------------------------
+    def _compact(self):
+        """Move a pending partial frame to the front of the buffer."""
+        start = self._start
+        if start == 0:
+            return
+        pending = self._end - start
+        if pending:
+            self._mv[0:pending] = self._mv[start:self._end]
+        self._start = 0
+        self._end = pending
+
+    def _parse(self, frames: List[Frame]):
+        buf = self._buf
+        end = self._end
+        pos = self._start
+        while True:
+            i = buf.find(SOF, pos, end)
+            if i < 0:
+                # Keep a trailing 0xAA: it may be the first half of a SOF
+                keep = 1 if end > pos and buf[end - 1] == SOF[0] else 0
+                self.bytes_dropped += end - pos - keep
+                pos = end - keep
+                break
+            if i > pos:
+                self.bytes_dropped += i - pos
+                pos = i
+            if end - i < HEADER_SIZE:
+                break
+            length = buf[i + 2]
+            payload_end = i + HEADER_SIZE + length
+            if end - i < FRAME_OVERHEAD + length:
+                break
+            received = buf[payload_end] | (buf[payload_end + 1] << 8)
+            if crc16(self._mv[i + 2:payload_end]) != received:
+                # Corrupted (or a false SOF inside a payload): skip this
+                # marker and resync on the next one.
+                self.crc_errors += 1
+                self.bytes_dropped += 1
+                pos = i + 1
+                continue
+            frames.append(Frame(buf[i + 3], buf[i + 4], self._mv[i + HEADER_SIZE:payload_end]))
+            self.frames_ok += 1
+            pos = payload_end + CRC_SIZE
+        self._start = pos
+
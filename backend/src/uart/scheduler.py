@@ -0,0 +1,381 @@
+"""
+Command Scheduler - Prioritized, acknowledged commands to the STM32
+
+Every outbound command to the flight controller goes through one
+CommandScheduler so that the 115200-baud link is never saturated and
+safety commands are never stuck behind bulk traffic:
+
+- Priority lanes: SAFETY (abort, rtl) > CONTROL (arm, pid, speed...) > BULK
+  (mission upload). The highest non-empty lane is always served first and
+  SAFETY commands bypass the send window and the byte-rate limit. While a
+  SAFETY command is unacknowledged, the CONTROL and BULK lanes both wait: a
+  MOVE or TAKEOFF must not reach the STM32 in the middle of an abort.
+- Sequence numbers: a command gets an 8-bit sequence number on its first
+  transmission and keeps it for every retry, so the STM32 can recognise a
+  retransmission (and not run a TAKEOFF twice) and a late ACK of the first
+  attempt still completes the command. The STM32 answers with an ACK frame
+  echoing the number.
+- ACK timeout + bounded retries per command; the caller's future resolves
+  with the outcome (acked / nacked / timeout / superseded / simulated).
+- Coalescing: a command submitted with a ``key`` replaces any queued,
+  not-yet-sent command with the same key (ten PID updates for the pitch
+  axis during a slider drag become one frame). Retries of an in-flight
+  command are dropped when a newer command with the same key is waiting.
+
+While the link is not connected to hardware, commands are sent through the
+simulated path and resolve immediately with status "simulated".
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Optional
+
+from backend.src.uart.protocol import ACK_STRUCT, AckStatus, MessageType, encode_message
+
+
+class Priority:
+    """Outbound lanes, lower value = served first."""
+    SAFETY = 0
+    CONTROL = 1
+    BULK = 2
+
+
+_LANES = (Priority.SAFETY, Priority.CONTROL, Priority.BULK)
+
+
+class CommandStatus:
+    """Outcome of a scheduled command."""
+    ACKED = "acked"
+    NACKED = "nacked"
+    TIMEOUT = "timeout"
+    SUPERSEDED = "superseded"
+    CANCELLED = "cancelled"
+    SIMULATED = "simulated"
+
+
+class Command:
+    """A queued command and its delivery state."""
+
+    __slots__ = (
+        "msg_type", "payload", "priority", "key", "future",
+        "seq", "attempts", "submitted_at", "sent_at", "deadline",
+    )
+
+    def __init__(self, msg_type: int, payload, priority: int, key: Optional[Hashable], future: asyncio.Future):
+        self.msg_type = msg_type
+        self.payload = payload
+        self.priority = priority
+        self.key = key
+        self.future = future
+        self.seq = 0
+        self.attempts = 0
+        self.submitted_at = time.monotonic()
+        self.sent_at = 0.0
+        self.deadline = 0.0
+
+
+class CommandScheduler:
+    """
+    Outbound command scheduler for one ManagedLink.
+
+    Usage:
+        scheduler = CommandScheduler(link_manager.fc)
+        fut = scheduler.submit(MessageType.ABORT, priority=Priority.SAFETY)
+        result = await fut        # {"status": "acked", "seq": 12, ...}
+    """
+
+    def __init__(
+        self,
+        link,
+        window: int = 4,
+        ack_timeout_s: float = 0.25,
+        max_retries: int = 3,
+        max_bytes_per_s: Optional[float] = None,
+    ):
+        """
+        Args:
+            link: ManagedLink (needs send(), is_connected(), add_handler())
+            window: Max commands awaiting ACK at once (SAFETY excluded)
+            ack_timeout_s: Time to wait for an ACK before retrying
+            max_retries: Retransmissions after the first attempt
+            max_bytes_per_s: Byte budget for CONTROL/BULK traffic
+                (default: half of the link's raw capacity)
+        """
+        self.link = link
+        self.window = window
+        self.ack_timeout_s = ack_timeout_s
+        self.max_retries = max_retries
+        if max_bytes_per_s is None:
+            baudrate = link.config.get("baudrate", 115200) if hasattr(link, "config") else 115200
+            max_bytes_per_s = baudrate / 10 * 0.5
+        self.max_bytes_per_s = max_bytes_per_s
+
+        self._lanes: Dict[int, Deque[Command]] = {p: deque() for p in _LANES}
+        self._by_key: Dict[Hashable, Command] = {}
+        self._inflight: Dict[int, Command] = {}
+        self._next_seq = 1
+        self._budget = max_bytes_per_s * 0.1
+        self._budget_at = time.monotonic()
+
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        # Statistics
+        self.sent = 0
+        self.retries = 0
+        self.acked = 0
+        self.timeouts = 0
+        self.coalesced = 0
+        self.last_latency_ms: Optional[float] = None
+
+        link.add_handler(self._on_ack, MessageType.ACK)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def submit(
+        self,
+        msg_type: int,
+        payload: Any = b'',
+        priority: int = Priority.CONTROL,
+        key: Optional[Hashable] = None,
+    ) -> asyncio.Future:
+        """
+        Queue a command.
+
+        Args:
+            msg_type: MessageType constant
+            payload: Payload accepted by encode_message (bytes or dict)
+            priority: Priority lane
+            key: Coalescing key; a queued command with the same key is
+                replaced and both submitters get the same future
+
+        Returns:
+            Future resolving to a result dict (see CommandStatus)
+
+        Raises:
+            ValueError: payload does not encode for msg_type (nothing queued)
+        """
+        encode_message(msg_type, payload)       # validate now, not in the scheduler loop
+        self._ensure_started()
+        if key is not None:
+            queued = self._by_key.get(key)
+            if queued is not None and queued.attempts == 0 and not queued.future.done():
+                queued.msg_type = msg_type
+                queued.payload = payload
+                self.coalesced += 1
+                if priority < queued.priority:
+                    self._lanes[queued.priority].remove(queued)
+                    queued.priority = priority
+                    self._lanes[priority].append(queued)
+                    self._wake.set()
+                return queued.future
+
+        cmd = Command(msg_type, payload, priority, key, asyncio.get_running_loop().create_future())
+        self._lanes[priority].append(cmd)
+        if key is not None:
+            self._by_key[key] = cmd
+        self._wake.set()
+        return cmd.future
+
+    def cancel_lane(self, priority: int) -> int:
+        """
+        Drop every queued (not yet sent) command of a lane, e.g. the pending
+        mission upload when an ABORT is issued.
+
+        Returns:
+            Number of commands cancelled
+        """
+        lane = self._lanes[priority]
+        count = len(lane)
+        while lane:
+            self._finish(lane.popleft(), CommandStatus.CANCELLED)
+        return count
+
+    async def stop(self):
+        """Cancel the scheduler task and fail everything pending."""
+        if self._task is not None and not self._task.done():
+            # wait_for() may swallow a cancel that races with a wake-up
+            # (ACK just received), so the loop also checks this flag
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._stopping = False
+        for priority in _LANES:
+            self.cancel_lane(priority)
+        for cmd in list(self._inflight.values()):
+            self._finish(cmd, CommandStatus.CANCELLED)
+        self._inflight.clear()
+
+    def status(self) -> dict:
+        """Queue depth and delivery statistics."""
+        return {
+            "queued": {name: len(self._lanes[p]) for name, p in
+                       (("safety", Priority.SAFETY), ("control", Priority.CONTROL), ("bulk", Priority.BULK))},
+            "inflight": len(self._inflight),
+            "sent": self.sent,
+            "retries": self.retries,
+            "acked": self.acked,
+            "timeouts": self.timeouts,
+            "coalesced": self.coalesced,
+            "last_latency_ms": self.last_latency_ms,
+        }
+
+    # ------------------------------------------------------------------
+    # Scheduler loop
+    # ------------------------------------------------------------------
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        if self._task is not None and self._task.get_loop() is not loop:
+            # Previous loop is gone: its futures can never be awaited again
+            for priority in _LANES:
+                self._lanes[priority].clear()
+            self._inflight.clear()
+            self._by_key.clear()
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run(), name="uart-command-scheduler")
+
+    async def _run(self):
+        while not self._stopping:
+            now = time.monotonic()
+            self._expire(now)
+            delay = await self._pump(now)
+
+            deadlines = [c.deadline for c in self._inflight.values()]
+            if deadlines:
+                wait = max(0.0, min(deadlines) - time.monotonic())
+                delay = wait if delay is None else min(delay, wait)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _pump(self, now: float) -> Optional[float]:
+        """
+        Send as many queued commands as lanes, window and byte budget allow.
+
+        Returns:
+            Seconds until the byte budget allows the next frame, or None.
+        """
+        self._refill(now)
+        for priority in _LANES:
+            lane = self._lanes[priority]
+            while lane:
+                cmd = lane[0]
+                if cmd.future.done():
+                    lane.popleft()
+                    continue
+                if cmd.attempts and self._superseded(cmd):
+                    lane.popleft()
+                    self._finish(cmd, CommandStatus.SUPERSEDED)
+                    continue
+                if priority != Priority.SAFETY and len(self._inflight) >= self.window:
+                    return None
+                # A retry reuses the sequence number of the first attempt
+                data = encode_message(cmd.msg_type, cmd.payload, seq=cmd.seq or self._next_seq)
+                if priority != Priority.SAFETY and self._budget < len(data):
+                    return (len(data) - self._budget) / self.max_bytes_per_s
+                if not cmd.seq:
+                    self._next_seq = self._next_seq % 255 + 1   # 1..255, 0 means "no ACK expected"
+                lane.popleft()
+                await self._transmit(cmd, data)
+            if priority == Priority.SAFETY and self._inflight and any(
+                    c.priority == Priority.SAFETY for c in self._inflight.values()):
+                # Hold CONTROL and BULK (not just bulk traffic) until safety
+                # commands are acked: nothing may override an abort / RTL
+                return None
+        return None
+
+    async def _transmit(self, cmd: Command, data: bytes):
+        cmd.seq = data[4]
+        cmd.attempts += 1
+        cmd.sent_at = time.monotonic()
+        if cmd.priority != Priority.SAFETY:
+            self._budget -= len(data)
+        ok = await self.link.send(data)
+        self.sent += 1
+        if not self.link.is_connected():
+            self._finish(cmd, CommandStatus.SIMULATED if ok else CommandStatus.TIMEOUT)
+            return
+        cmd.deadline = cmd.sent_at + self.ack_timeout_s
+        self._inflight[cmd.seq] = cmd
+
+    def _expire(self, now: float):
+        for seq, cmd in list(self._inflight.items()):
+            if cmd.deadline > now:
+                continue
+            del self._inflight[seq]
+            if self._superseded(cmd):
+                self._finish(cmd, CommandStatus.SUPERSEDED)
+            elif cmd.attempts > self.max_retries or cmd.future.done():
+                self.timeouts += 1
+                self._finish(cmd, CommandStatus.TIMEOUT)
+            else:
+                # Retry ahead of everything else in its lane
+                self.retries += 1
+                cmd.sent_at = 0.0
+                self._lanes[cmd.priority].appendleft(cmd)
+
+    def _superseded(self, cmd: Command) -> bool:
+        """A newer command with the same key is waiting."""
+        newer = self._by_key.get(cmd.key) if cmd.key is not None else None
+        return newer is not None and newer is not cmd
+
+    def _refill(self, now: float):
+        elapsed = now - self._budget_at
+        self._budget_at = now
+        burst = self.max_bytes_per_s * 0.1
+        self._budget = min(burst, self._budget + elapsed * self.max_bytes_per_s)
+
+    # ------------------------------------------------------------------
+    def _on_ack(self, frame):
+        if len(frame.payload) < ACK_STRUCT.size:
+            return
+        acked_seq, status = ACK_STRUCT.unpack_from(frame.payload)
+        cmd = self._inflight.pop(acked_seq, None)
+        if cmd is None:
+            # Late ACK of an earlier attempt whose retry is still queued
+            cmd = self._queued_retry(acked_seq)
+            if cmd is None:
+                return
+            self._lanes[cmd.priority].remove(cmd)
+        if cmd.sent_at:
+            self.last_latency_ms = round((time.monotonic() - cmd.sent_at) * 1000.0, 2)
+        if status == AckStatus.OK:
+            self.acked += 1
+            self._finish(cmd, CommandStatus.ACKED, status)
+        else:
+            self._finish(cmd, CommandStatus.NACKED, status)
+        if self._wake is not None:
+            self._wake.set()
+
+    def _queued_retry(self, seq: int) -> Optional[Command]:
+        for lane in self._lanes.values():
+            for cmd in lane:
+                if cmd.attempts and cmd.seq == seq:
+                    return cmd
+        return None
+
+    def _finish(self, cmd: Command, status: str, ack_code: Optional[int] = None):
+        if cmd.key is not None and self._by_key.get(cmd.key) is cmd:
+            del self._by_key[cmd.key]
+        if cmd.future.done():
+            return
+        result = {
+            "status": status,
+            "seq": cmd.seq,
+            "attempts": cmd.attempts,
+            "latency_ms": round((time.monotonic() - cmd.submitted_at) * 1000.0, 2),
+        }
+        if ack_code is not None:
+            result["ack_code"] = ack_code
+        cmd.future.set_result(result)
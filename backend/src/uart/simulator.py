@@ -0,0 +1,411 @@
+"""
+UART Simulator - Hardware-in-the-loop stand-in for the STM32 and NEO-M8N
+
+Opens one pseudo-terminal per UART and plays the other end of the wire:
+
+  - Flight controller PTY: speaks the framed protocol (protocol.py). Pushes
+    TELEMETRY_DATA at ``fc_rate_hz``, ACKs every command carrying a sequence
+    number and echoes HEARTBEAT frames.
+  - GPS PTY: emits NMEA GGA+RMC (or UBX NAV-PVT) at ``gps_rate_hz``.
+
+The backend opens the slave side exactly like a real serial port, so the
+whole serial → decode → store → broadcast path is exercised (no
+"[UART SIM]" prints). Point the links at the simulator with the
+environment overrides of config/cablage.py:
+
+    python -m backend.src.uart.simulator --fc-rate 100 --gps-rate 10
+    # prints: export AQUAWING_FC_PORT=/dev/pts/N AQUAWING_GPS_PORT=/dev/pts/M
+
+Linux / macOS only (os.openpty).
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import struct
+import time
+import tty
+from typing import Optional
+
+from backend.src.uart.gps_parser import nmea_checksum, ubx_checksum
+from backend.src.uart.protocol import (
+    MAX_FRAME_SIZE, AckStatus, FrameDecoder, MessageType, encode_into,
+)
+
+
+# Simulated vehicle
+HOME_LAT = 36.8065
+HOME_LON = 10.1815
+ORBIT_RADIUS_M = 50.0
+ORBIT_SPEED_MPS = 5.0
+_EARTH_RADIUS_M = 6371000.0
+
+# Flight mode codes reported in TELEMETRY_DATA.mode
+MODE_STABILIZE = 0
+MODE_GUIDED = 1
+MODE_AUTO = 2
+MODE_RTL = 3
+MODE_LAND = 4
+
+_NAV_PVT_LEN = 92
+
+
+def _open_pty():
+    """Open a raw PTY pair. Returns (master_fd, slave_fd, slave_path)."""
+    master, slave = os.openpty()
+    tty.setraw(slave)           # no echo / line discipline on the "wire"
+    os.set_blocking(master, False)
+    return master, slave, os.ttyname(slave)
+
+
+def _nmea_coord(value: float, lat: bool) -> tuple:
+    hemi = ('N' if value >= 0 else 'S') if lat else ('E' if value >= 0 else 'W')
+    value = abs(value)
+    deg = int(value)
+    minutes = (value - deg) * 60.0
+    text = f"{deg:02d}{minutes:07.4f}" if lat else f"{deg:03d}{minutes:07.4f}"
+    return text, hemi
+
+
+def _nmea_sentence(body: str) -> bytes:
+    data = body.encode()
+    return b'$' + data + b'*%02X\r\n' % nmea_checksum(data)
+
+
+class VehicleModel:
+    """
+    Minimal kinematic model: orbit around home while armed and airborne.
+    """
+
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.armed = False
+        self.mode = MODE_STABILIZE
+        self.altitude_m = 0.0
+        self.target_alt_m = 0.0
+        self.battery_percent = 100.0
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.t0
+
+    def state(self) -> dict:
+        """Current simulated state."""
+        t = self.elapsed()
+        angle = t * ORBIT_SPEED_MPS / ORBIT_RADIUS_M
+        north = ORBIT_RADIUS_M * math.cos(angle)
+        east = ORBIT_RADIUS_M * math.sin(angle)
+        lat = HOME_LAT + math.degrees(north / _EARTH_RADIUS_M)
+        lon = HOME_LON + math.degrees(east / (_EARTH_RADIUS_M * math.cos(math.radians(HOME_LAT))))
+        course = (math.degrees(angle) + 90.0) % 360.0
+        self.battery_percent = max(0.0, 100.0 - t * 0.01)
+        return {
+            "t": t,
+            "lat": lat,
+            "lon": lon,
+            "course_deg": course,
+            "speed_mps": ORBIT_SPEED_MPS,
+            "roll_deg": 5.0 * math.sin(t),
+            "pitch_deg": 2.0 * math.cos(t),
+        }
+
+    def step_altitude(self, dt: float) -> float:
+        """Move altitude toward the target at 2 m/s. Returns climb rate."""
+        error = self.target_alt_m - self.altitude_m
+        climb = max(-2.0, min(2.0, error / max(dt, 1e-3)))
+        self.altitude_m += climb * dt
+        return climb
+
+    def on_command(self, msg_type: int, payload) -> int:
+        """Apply a command. Returns the AckStatus to send back."""
+        if msg_type == MessageType.ARM:
+            self.armed = True
+        elif msg_type == MessageType.DISARM:
+            if self.altitude_m > 0.5:
+                return AckStatus.REJECTED
+            self.armed = False
+        elif msg_type == MessageType.TAKEOFF:
+            if not self.armed:
+                return AckStatus.REJECTED
+            if len(payload) < 4:
+                return AckStatus.BAD_PAYLOAD
+            self.target_alt_m = struct.unpack_from('<f', payload)[0]
+            self.mode = MODE_GUIDED
+        elif msg_type in (MessageType.LAND, MessageType.ABORT):
+            self.target_alt_m = 0.0
+            self.mode = MODE_LAND
+        elif msg_type == MessageType.RTL:
+            self.mode = MODE_RTL
+        elif msg_type == MessageType.MISSION_ITEM:
+            self.mode = MODE_AUTO
+        return AckStatus.OK
+
+
+class UARTSimulator:
+    """
+    Flight controller + GPS simulator on a pair of PTYs.
+
+    Usage:
+        sim = UARTSimulator(fc_rate_hz=50, gps_rate_hz=10)
+        await sim.start()
+        FLIGHT_CONTROLLER["port"] = sim.fc_port
+        ...
+        await sim.stop()
+    """
+
+    def __init__(
+        self,
+        fc_rate_hz: float = 50.0,
+        gps_rate_hz: float = 10.0,
+        gps_format: str = "nmea",
+        ack_drop_rate: float = 0.0,
+        ack_delay_s: float = 0.0,
+    ):
+        """
+        Args:
+            fc_rate_hz: TELEMETRY_DATA rate (0 disables)
+            gps_rate_hz: GPS fix rate (0 disables)
+            gps_format: "nmea" (GGA + RMC) or "ubx" (NAV-PVT)
+            ack_drop_rate: Probability of not answering a command (retry testing)
+            ack_delay_s: Delay before each ACK (latency testing)
+        """
+        if gps_format not in ("nmea", "ubx"):
+            raise ValueError(f"unknown gps_format: {gps_format}")
+        self.fc_rate_hz = fc_rate_hz
+        self.gps_rate_hz = gps_rate_hz
+        self.gps_format = gps_format
+        self.ack_drop_rate = ack_drop_rate
+        self.ack_delay_s = ack_delay_s
+        self.mute = False       # True: ignore everything received (radio dropout)
+
+        self.vehicle = VehicleModel()
+        self.decoder = FrameDecoder()
+        self.fc_port: Optional[str] = None
+        self.gps_port: Optional[str] = None
+
+        self._fds = []
+        self._fc_master: Optional[int] = None
+        self._gps_master: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = []
+        self._tx = bytearray(MAX_FRAME_SIZE)
+
+        # Statistics
+        self.telemetry_sent = 0
+        self.gps_sent = 0
+        self.commands_rx = 0
+        self.acks_sent = 0
+        self.heartbeats = 0
+        self.bytes_dropped = 0
+
+    # ------------------------------------------------------------------
+    async def start(self):
+        """Open the PTYs and start streaming."""
+        self._loop = asyncio.get_running_loop()
+        self._fc_master, fc_slave, self.fc_port = _open_pty()
+        self._gps_master, gps_slave, self.gps_port = _open_pty()
+        # Slave fds stay open so the masters never see EIO between
+        # backend (re)connections
+        self._fds = [self._fc_master, fc_slave, self._gps_master, gps_slave]
+        self._loop.add_reader(self._fc_master, self._on_fc_readable)
+        if self.fc_rate_hz > 0:
+            self._tasks.append(self._loop.create_task(self._periodic(self.fc_rate_hz, self._send_telemetry)))
+        if self.gps_rate_hz > 0:
+            self._tasks.append(self._loop.create_task(self._periodic(self.gps_rate_hz, self._send_gps)))
+        print(f"[UART HIL] FC on {self.fc_port} ({self.fc_rate_hz} Hz), "
+              f"GPS on {self.gps_port} ({self.gps_rate_hz} Hz {self.gps_format})")
+
+    async def stop(self):
+        """Stop streaming and close the PTYs."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._fc_master is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self._fc_master)
+        for fd in self._fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = []
+        self._fc_master = self._gps_master = None
+
+    def stats(self) -> dict:
+        """Simulator statistics."""
+        return {
+            "fc_port": self.fc_port,
+            "gps_port": self.gps_port,
+            "telemetry_sent": self.telemetry_sent,
+            "gps_sent": self.gps_sent,
+            "commands_rx": self.commands_rx,
+            "acks_sent": self.acks_sent,
+            "heartbeats": self.heartbeats,
+            "bytes_dropped": self.bytes_dropped,
+        }
+
+    # ------------------------------------------------------------------
+    async def _periodic(self, rate_hz: float, callback):
+        period = 1.0 / rate_hz
+        next_at = self._loop.time()
+        while True:
+            callback()
+            next_at += period
+            delay = next_at - self._loop.time()
+            if delay < 0:
+                next_at = self._loop.time()   # fell behind: don't burst
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def _write(self, fd: Optional[int], data) -> bool:
+        if fd is None:
+            return False
+        try:
+            written = os.write(fd, data)
+        except (BlockingIOError, InterruptedError):
+            written = 0
+        except OSError:
+            return False
+        if written < len(data):
+            # Nobody draining the port: a real UART drops bytes too
+            self.bytes_dropped += len(data) - written
+            return False
+        return True
+
+    def _send_frame(self, msg_type: int, payload, seq: int = 0):
+        n = encode_into(self._tx, msg_type, payload, seq)
+        return self._write(self._fc_master, memoryview(self._tx)[:n])
+
+    # ------------------------------------------------------------------
+    # Flight controller
+    # ------------------------------------------------------------------
+    def _send_telemetry(self):
+        v = self.vehicle
+        s = v.state()
+        climb = v.step_altitude(1.0 / self.fc_rate_hz)
+        throttle = 400 + int(v.altitude_m * 10) if v.armed else 0
+        values = (
+            int(s["t"] * 1000) & 0xFFFFFFFF,
+            s["roll_deg"], s["pitch_deg"], s["course_deg"],
+            v.altitude_m, climb,
+            10.5 + 2.1 * v.battery_percent / 100.0, v.battery_percent,
+            throttle, throttle, throttle, throttle,
+            v.mode, 1 if v.armed else 0,
+        )
+        if self._send_frame(MessageType.TELEMETRY_DATA, values):
+            self.telemetry_sent += 1
+
+    def _on_fc_readable(self):
+        try:
+            data = os.read(self._fc_master, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            return
+        if self.mute:
+            return
+        for frame in self.decoder.feed(data):
+            self._on_frame(frame.msg_type, frame.seq, bytes(frame.payload))
+
+    def _on_frame(self, msg_type: int, seq: int, payload: bytes):
+        if msg_type == MessageType.HEARTBEAT:
+            self.heartbeats += 1
+            self._send_frame(MessageType.HEARTBEAT, payload, seq)
+            return
+        if msg_type in (MessageType.ACK, MessageType.TELEMETRY_DATA):
+            return
+        self.commands_rx += 1
+        status = self.vehicle.on_command(msg_type, payload)
+        if seq == 0 or random.random() < self.ack_drop_rate:
+            return
+        if self.ack_delay_s > 0:
+            self._loop.call_later(self.ack_delay_s, self._send_ack, seq, status)
+        else:
+            self._send_ack(seq, status)
+
+    def _send_ack(self, seq: int, status: int):
+        if self._send_frame(MessageType.ACK, (seq, status)):
+            self.acks_sent += 1
+
+    # ------------------------------------------------------------------
+    # GPS
+    # ------------------------------------------------------------------
+    def _send_gps(self):
+        s = self.vehicle.state()
+        data = self._ubx_nav_pvt(s) if self.gps_format == "ubx" else self._nmea(s)
+        if self._write(self._gps_master, data):
+            self.gps_sent += 1
+
+    def _nmea(self, s: dict) -> bytes:
+        utc = time.strftime("%H%M%S", time.gmtime()) + ".00"
+        date = time.strftime("%d%m%y", time.gmtime())
+        lat, ns = _nmea_coord(s["lat"], True)
+        lon, ew = _nmea_coord(s["lon"], False)
+        alt = 10.0 + self.vehicle.altitude_m
+        knots = s["speed_mps"] / 0.514444
+        return (
+            _nmea_sentence(f"GNGGA,{utc},{lat},{ns},{lon},{ew},1,12,0.8,{alt:.1f},M,46.9,M,,")
+            + _nmea_sentence(f"GNRMC,{utc},A,{lat},{ns},{lon},{ew},{knots:.2f},{s['course_deg']:.2f},{date},,,A")
+        )
+
+    def _ubx_nav_pvt(self, s: dict) -> bytes:
+        payload = bytearray(_NAV_PVT_LEN)
+        struct.pack_into('<I', payload, 0, int(s["t"] * 1000) & 0xFFFFFFFF)
+        struct.pack_into('<B B B B i i i i', payload, 20,
+                         3, 0x01, 0, 12,
+                         int(round(s["lon"] * 1e7)), int(round(s["lat"] * 1e7)),
+                         int((10.0 + self.vehicle.altitude_m) * 1000), int((10.0 + self.vehicle.altitude_m) * 1000))
+        struct.pack_into('<i i', payload, 60, int(s["speed_mps"] * 1000), int(s["course_deg"] * 1e5))
+        body = b'\x01\x07' + struct.pack('<H', _NAV_PVT_LEN) + bytes(payload)
+        return b'\xB5\x62' + body + bytes(ubx_checksum(body))
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AquaWing STM32 + GPS UART simulator (PTY)")
+    parser.add_argument("--fc-rate", type=float, default=50.0, help="TELEMETRY_DATA rate in Hz")
+    parser.add_argument("--gps-rate", type=float, default=10.0, help="GPS fix rate in Hz")
+    parser.add_argument("--gps-format", choices=("nmea", "ubx"), default="nmea")
+    parser.add_argument("--ack-drop", type=float, default=0.0, help="probability of dropping an ACK")
+    parser.add_argument("--ack-delay", type=float, default=0.0, help="ACK delay in seconds")
+    parser.add_argument("--link-dir", default=None,
+                        help="create stable symlinks <dir>/fc and <dir>/gps to the PTYs")
+    args = parser.parse_args(argv)
+
+    async def run():
+        sim = UARTSimulator(args.fc_rate, args.gps_rate, args.gps_format, args.ack_drop, args.ack_delay)
+        await sim.start()
+        fc_port, gps_port = sim.fc_port, sim.gps_port
+        if args.link_dir:
+            os.makedirs(args.link_dir, exist_ok=True)
+            for name, target in (("fc", sim.fc_port), ("gps", sim.gps_port)):
+                path = os.path.join(args.link_dir, name)
+                if os.path.islink(path):
+                    os.unlink(path)
+                os.symlink(target, path)
+            fc_port = os.path.join(args.link_dir, "fc")
+            gps_port = os.path.join(args.link_dir, "gps")
+        print(f"export AQUAWING_FC_PORT={fc_port} AQUAWING_GPS_PORT={gps_port}")
+        try:
+            while True:
+                await asyncio.sleep(5.0)
+                print(f"[UART HIL] {sim.stats()}")
+        finally:
+            await sim.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
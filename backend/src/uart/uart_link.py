@@ -8,7 +8,9 @@ Configuration from config/cablage.py:
 
 Serial instances are separate; no shared UART between GPS and STM32.
 
-TODO: Implement real serial communication
+UARTLink is the plain blocking pyserial wrapper. Code running on the asyncio
+event loop (FastAPI routes, WebSocket handlers) should use AsyncUARTLink from
+async_link.py instead.
 """
 
 import sys, os
@@ -101,9 +103,7 @@ class UARTLink:
                 return False
 
         try:
-            # real serial write (not yet implemented in this repo)
-            print(f"TODO: Send {len(data)} bytes over UART: {data.hex()}")
-            # self.serial.write(data)
+            self.serial.write(data)
             return True
         except Exception as e:
             print(f"Error sending over UART: {e}")
@@ -118,18 +118,14 @@ class UARTLink:
             
         Returns:
             Bytes received, or None if timeout/error
-            
-        TODO: Implement actual serial reception
         """
         if not self.serial or not self.serial.is_open:
-            print("TODO: Serial port not open, cannot receive")
+            print("Serial port not open, cannot receive")
             return None
         
         try:
-            print(f"TODO: Receive up to {size} bytes from UART")
-            # data = self.serial.read(size)
-            # return data if data else None
-            return None
+            data = self.serial.read(size)
+            return data if data else None
         except Exception as e:
             print(f"Error receiving from UART: {e}")
             return None
@@ -5,79 +5,34 @@ This module implements WebSocket connections for real-time telemetry streaming.
 Clients connect via /ws to receive continuous drone status updates and send commands.
 
 Features:
-- Real-time position tracking (broadcast when start_flight is sent)
-- Command handling: send_route, start_flight, abort, rtl, set_speed
+- Real-time position tracking (TelemetryProducer, started by start_flight)
+- Command handling: send_route, start_flight, abort, rtl, set_speed, subscribe
+- Per-client subscriptions: {"cmd": "subscribe", "topics": [...], "rate_hz": 2,
+  "events": ["alert", ...]} (event bus topics, see src/streaming/event_bus.py;
+  none unless subscribed - the dashboard reads them from /api/events)
+- Opt-in binary keyframe/delta telemetry (subprotocol "aquawing.bin.v1"
+  or /ws?encoding=bin, see src/streaming/binary_telemetry.py)
 - Session-based authentication (cookie session_id)
-- Broadcast to multiple clients
+- Broadcast to multiple clients through the shared TelemetryHub
+  (per-client sender task, bounded drop-oldest queue)
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Set
 import json
-import asyncio
 import time
-import math
 
 from backend import auth
-
-# Demo telemetry base (Tunis)
-_BASE_LAT = 36.8065
-_BASE_LON = 10.1815
-_flight_active = False
-
+from backend.src.telemetry.store import telemetry_store
+from backend.src.streaming.telemetry_hub import hub
+from backend.src.streaming.binary_telemetry import negotiate as negotiate_encoding
+from backend.src.streaming.event_bus import event_bus, parse_topics
+from backend.src.telemetry.producer import telemetry_producer
+from backend.src.telemetry.replay import flight_replay
+from backend.api import run_fc_command, submit_fc_command, submit_mission_upload
 
 router = APIRouter()
 
 
-# ============================================================================
-# WebSocket Connection Management
-# ============================================================================
-
-class ConnectionManager:
-    """
-    Manages active WebSocket connections for telemetry streaming.
-
-    Allows broadcasting telemetry data to all authenticated connected clients.
-    """
-
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
-
-    async def connect(self, websocket: WebSocket):
-        """Accept and register a new WebSocket connection."""
-        await websocket.accept()
-        self.active_connections.add(websocket)
-        print(f"✓ WebSocket connected. Active connections: {len(self.active_connections)}")
-
-    def disconnect(self, websocket: WebSocket):
-        """Unregister a closed WebSocket connection."""
-        self.active_connections.discard(websocket)
-        print(f"✓ WebSocket disconnected. Active connections: {len(self.active_connections)}")
-
-    async def broadcast(self, message: dict):
-        """
-        Broadcast a message to all connected clients.
-
-        Args:
-            message: Dictionary to send as JSON
-        """
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"Error broadcasting: {e}")
-                disconnected.append(connection)
-
-        # Clean up disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
-
-
-# Global connection manager instance
-manager = ConnectionManager()
-
-
 # ============================================================================
 # Helper Functions
 # ============================================================================
@@ -95,29 +50,6 @@ def get_session_from_headers(headers: dict) -> str:
     return ""
 
 
-async def _demo_telemetry_loop():
-    """Broadcast demo telemetry every 0.5 s while flight is active."""
-    global _flight_active
-    counter = 0
-    radius = 0.005
-    while _flight_active:
-        counter += 1
-        angle = (counter * 2.0) % 360
-        lat = _BASE_LAT + radius * math.cos(math.radians(angle))
-        lon = _BASE_LON + radius * math.sin(math.radians(angle))
-        telemetry = {
-            "lat": lat,
-            "lon": lon,
-            "alt": 15.0 + 5.0 * math.sin(math.radians(counter)),
-            "heading": angle,
-            "speed": 2.5,
-            "battery": 85.0,
-            "ts": int(time.time()),
-        }
-        await manager.broadcast(telemetry)
-        await asyncio.sleep(0.5)
-
-
 # ============================================================================
 # WebSocket Endpoints
 # ============================================================================
@@ -140,6 +72,9 @@ async def websocket_telemetry(websocket: WebSocket):
         "ts": int          # Unix timestamp
     }
 
+    Binary clients receive the same fields as keyframe / delta frames;
+    command ACKs and errors are always JSON text.
+
     Closes with code 1008 if session is missing or invalid.
     """
 
@@ -156,16 +91,16 @@ async def websocket_telemetry(websocket: WebSocket):
         return
 
     print(f"✓ WebSocket: User authenticated: {username}")
-    await manager.connect(websocket)
+    encoding, subprotocol = negotiate_encoding(websocket)
+    await hub.connect(websocket, username, encoding, subprotocol)
 
-    global _flight_active
     try:
         while True:
             raw = await websocket.receive_text()
             try:
                 msg = json.loads(raw)
             except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "msg": "Invalid JSON"})
+                hub.send(websocket, {"type": "error", "msg": "Invalid JSON"})
                 continue
 
             cmd = msg.get("cmd", "")
@@ -175,35 +110,63 @@ async def websocket_telemetry(websocket: WebSocket):
                 points = msg.get("points", [])
                 name = msg.get("name", f"mission_{int(time.time())}")
                 print(f"  Route '{name}' with {len(points)} waypoints")
-                await websocket.send_json({
+                try:
+                    submit_mission_upload(points)
+                except ValueError as e:
+                    hub.send(websocket, {"type": "error", "cmd": "send_route", "msg": str(e)})
+                    continue
+                hub.send(websocket, {
                     "type": "ack", "cmd": "send_route", "status": "ok",
                     "name": name, "count": len(points),
                 })
             elif cmd == "start_flight":
                 print(f"  ▶ START FLIGHT requested by {username}")
-                _flight_active = True
-                asyncio.create_task(_demo_telemetry_loop())
-                await websocket.send_json({"type": "ack", "cmd": "start_flight", "status": "ok"})
+                await flight_replay.stop()     # live telemetry takes over the hub
+                started = telemetry_producer.start(username)
+                hub.send(websocket, {
+                    "type": "ack", "cmd": "start_flight", "status": "ok",
+                    "already_running": not started,
+                })
             elif cmd == "abort":
                 print(f"  ■ ABORT requested by {username}")
-                _flight_active = False
-                await websocket.send_json({"type": "ack", "cmd": "abort", "status": "ok"})
+                result = await run_fc_command("abort")     # safety command first
+                await telemetry_producer.stop_demo()       # live FC telemetry keeps flowing
+                hub.send(websocket, {"type": "ack", "cmd": "abort", "status": "ok", "fc": result})
             elif cmd == "rtl":
                 print(f"  ↩ RTL requested by {username}")
-                _flight_active = False
-                await websocket.send_json({"type": "ack", "cmd": "rtl", "status": "ok"})
+                result = await run_fc_command("rtl")     # safety command first
+                await telemetry_producer.stop_demo()       # live FC telemetry keeps flowing
+                hub.send(websocket, {"type": "ack", "cmd": "rtl", "status": "ok", "fc": result})
             elif cmd == "set_speed":
                 value = msg.get("value", 0)
                 print(f"  Speed → {value} m/s")
-                await websocket.send_json({"type": "ack", "cmd": "set_speed", "value": value})
+                try:
+                    submit_fc_command("set_speed", {"value": value})
+                except ValueError as e:
+                    hub.send(websocket, {"type": "error", "cmd": "set_speed", "msg": str(e)})
+                    continue
+                hub.send(websocket, {"type": "ack", "cmd": "set_speed", "value": value})
+            elif cmd == "subscribe":
+                try:
+                    subscription = hub.subscribe(
+                        websocket, msg.get("topics"), msg.get("rate_hz"), parse_topics(msg.get("events")),
+                    )
+                except ValueError as e:
+                    hub.send(websocket, {"type": "error", "cmd": "subscribe", "msg": str(e)})
+                    continue
+                print(f"  Subscription → {subscription}")
+                hub.send(websocket, {"type": "ack", "cmd": "subscribe", "status": "ok", **subscription})
+                # retained state of the newly subscribed event topics, right away
+                for _, text in event_bus.retained(subscription["events"]):
+                    hub.send(websocket, text)
             else:
-                await websocket.send_json({"type": "error", "msg": f"Unknown cmd: {cmd}"})
+                hub.send(websocket, {"type": "error", "msg": f"Unknown cmd: {cmd}"})
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        await hub.disconnect(websocket)
         print(f"✓ WebSocket client disconnected: {username}")
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(websocket)
+        await hub.disconnect(websocket)
 
 
 # ============================================================================
@@ -107,3 +107,21 @@ FLIGHT_CONTROLLER = {
 #  GPIO15 P.10 │ RX (GPS ou FC → RPi)
 #  GND   Pin 9 │ AMG8833 GND
 #
+
+# ====================================================================
+# SURCHARGES PAR VARIABLES D'ENVIRONNEMENT
+# ====================================================================
+#
+#  Permet de pointer les liaisons vers le simulateur HIL
+#  (python -m backend.src.uart.simulator) ou un adaptateur USB :
+#
+#    AQUAWING_FC_PORT=/dev/pts/3 AQUAWING_GPS_PORT=/dev/pts/4 ./tools/run_dev.sh
+#
+
+import os as _os
+
+for _cfg, _prefix in ((FLIGHT_CONTROLLER, "AQUAWING_FC"), (GPS, "AQUAWING_GPS")):
+    if _os.environ.get(_prefix + "_PORT"):
+        _cfg["port"] = _os.environ[_prefix + "_PORT"]
+    if _os.environ.get(_prefix + "_BAUDRATE"):
+        _cfg["baudrate"] = int(_os.environ[_prefix + "_BAUDRATE"])
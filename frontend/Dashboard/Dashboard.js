@@ -19,6 +19,14 @@ window.addEventListener('unhandledrejection', function(e) {
 // URL Configuration - Uses current host (IP or localhost) automatically
 // ============================================================================
 const WS_RECONNECT_INTERVAL = 1000; // ms
+const WS_TOPICS = ['position', 'battery', 'status']; // telemetry fields used by updateTelemetry
+const WS_RATE_HZ = 5; // server-side rate limit for this client
+// Compact binary telemetry (keyframe + delta frames), see backend binary_telemetry.py
+// Off: the binary frames carry no battery voltage, attitude or link fields (the server
+// falls back to JSON for such subscriptions anyway)
+const WS_BINARY = false;
+const WS_BINARY_SUBPROTOCOL = 'aquawing.bin.v1';
+const WS_TUNNEL_BATCH_MS = 50;
 const POLYLINE_MAX_POINTS = 2000;
 const MAP_CENTER = [36.8065, 10.1815]; // Tunis
 
@@ -29,7 +37,10 @@ const getBaseURL = () => {
 
 const getWebSocketURL = () => {
     const protocol = location.protocol === "https:" ? "wss:" : "ws:";
-    return protocol + "//" + location.host + "/ws";
+    // Over HTTPS we are behind the cloudflared tunnel: let the server coalesce
+    // telemetry into one frame per WS_TUNNEL_BATCH_MS
+    const query = location.protocol === "https:" ? "?batch_ms=" + WS_TUNNEL_BATCH_MS : "";
+    return protocol + "//" + location.host + "/ws" + query;
 };
 
 // Use current host automatically (IP or localhost)
@@ -69,6 +80,7 @@ let rgbSamples = [];
 let thermalSamples = [];
 let lastRGBObjectURL = null;
 let lastThermalObjectURL = null;
+let lastThermalEtag = null;
 const RGB_INTERVAL = 900; // ms
 const THERMAL_INTERVAL = 1200; // ms
 const SAMPLE_WINDOW_MS = 5000; // sliding window for averages (ms)
@@ -159,7 +171,9 @@ function connectWebSocket() {
 
 
     try {
-        ws = new WebSocket(WS_URL);
+        ws = WS_BINARY ? new WebSocket(WS_URL, [WS_BINARY_SUBPROTOCOL]) : new WebSocket(WS_URL);
+        ws.binaryType = 'arraybuffer';
+        binaryTelemetryState = null;
     } catch (err) {
         console.error('WebSocket construction error', err);
         setTimeout(connectWebSocket, WS_RECONNECT_INTERVAL);
@@ -168,12 +182,28 @@ function connectWebSocket() {
 
     ws.onopen = () => {
         console.log('WebSocket connected');
+        // Only the fields the dashboard renders, at the map's refresh rate
+        // Bus events (alerts, system, thermal) arrive on the /api/events stream instead
+        ws.send(JSON.stringify({ cmd: 'subscribe', topics: WS_TOPICS, rate_hz: WS_RATE_HZ, events: [] }));
+        updateSystemHealth();
     };
 
     ws.onmessage = (event) => {
         try {
+            if (event.data instanceof ArrayBuffer) {
+                // one or more fixed-size frames (batched on slow links)
+                for (const tele of decodeBinaryTelemetryFrames(event.data)) {
+                    if (!frontendFlying && !demoTimer) updateTelemetry(tele);
+                }
+                return;
+            }
             const data = JSON.parse(event.data);
 
+            if (data.type === 'batch') {
+                if (!frontendFlying && !demoTimer) data.items.forEach(updateTelemetry);
+                return;
+            }
+
             // Server acknowledgement or error
             if (data.type === 'ack') {
                 console.log(`✓ ACK ${data.cmd}:`, data);
@@ -213,10 +243,116 @@ function connectWebSocket() {
         console.warn('WebSocket closed. Code:', event.code, 'Reason:', event.reason || 'No reason');
         console.warn('Will attempt to reconnect in', WS_RECONNECT_INTERVAL, 'ms');
         console.log('WebSocket disconnected');
+        updateSystemHealth();
         // Do NOT auto-reconnect — WebSocket will reconnect lazily when needed
     };
 }
 
+// -------------------------------
+// SERVER EVENTS (SSE, event bus)
+// -------------------------------
+// Pushed by the server instead of polled: system health (links, FC heartbeat),
+// safety alerts, FC command results and thermal stats.
+const EVENT_TOPICS = ['system', 'alert', 'command', 'thermal.stats'];
+let eventSource = null;
+let lastSystemEvent = null;
+let lastThermalPush = 0;
+
+function connectEventStream() {
+    if (eventSource || typeof EventSource === 'undefined') return;
+    eventSource = new EventSource(API_BASE + '/api/events?topics=' + EVENT_TOPICS.join(','));
+    const on = (topic, handler) => eventSource.addEventListener(topic, (event) => {
+        try { handler(JSON.parse(event.data)); } catch (err) { console.error('Invalid event', topic, err); }
+    });
+    on('system', (data) => {
+        lastSystemEvent = data;
+        updateSystemHealth();
+    });
+    on('alert', (data) => {
+        console.warn('⚠ Alert:', data);
+        showToast(data.msg, data.level === 'critical' ? 'error' : 'info');
+    });
+    on('command', (data) => {
+        console.log(`FC ${data.cmd}:`, data);
+        if (data.status !== 'acked') showToast(`${data.cmd}: ${data.status}`, 'error');
+    });
+    on('thermal.stats', (data) => {
+        lastThermalPush = Date.now();
+        const el = document.getElementById('advisor-thermal');
+        if (el && typeof data.max_temp === 'number') el.textContent = `${data.max_temp.toFixed(1)}°C max`;
+        // New sensor reading: refresh the thermal image now (the timer only covers missing pushes)
+        if (thermalTimer) fetchAndDisplayThermal();
+    });
+}
+
+// -------------------------------
+// BINARY TELEMETRY DECODER
+// -------------------------------
+// KEYFRAME 'K' (21 B): u32 ts, i32 lat/lon (1e-7 deg), i16 alt (dm),
+//   u16 heading (0.01 deg), u16 speed (cm/s), u8 battery (0.5 %), u8 flags
+// DELTA 'D' (14 B): u8 dts, i16 dlat/dlon/dalt/dheading/dspeed, u8 battery, u8 flags
+const BIN_KEYFRAME = 0x4B;
+const BIN_DELTA = 0x44;
+const BIN_NO_FIX = -2147483648;
+const BIN_FRAME_SIZE = { [BIN_KEYFRAME]: 21, [BIN_DELTA]: 14 };
+let binaryTelemetryState = null;
+
+function decodeBinaryTelemetryFrames(buffer) {
+    const out = [];
+    let offset = 0;
+    while (offset < buffer.byteLength) {
+        const size = BIN_FRAME_SIZE[new Uint8Array(buffer, offset, 1)[0]];
+        if (!size) { console.warn('Unknown binary telemetry frame at', offset); break; }
+        const tele = decodeBinaryTelemetry(buffer.slice(offset, offset + size));
+        if (tele) out.push(tele);
+        offset += size;
+    }
+    return out;
+}
+
+function decodeBinaryTelemetry(buffer) {
+    const v = new DataView(buffer);
+    const type = v.getUint8(0);
+    if (type === BIN_KEYFRAME) {
+        binaryTelemetryState = {
+            ts: v.getUint32(1, true),
+            lat: v.getInt32(5, true),
+            lon: v.getInt32(9, true),
+            alt: v.getInt16(13, true),
+            heading: v.getUint16(15, true),
+            speed: v.getUint16(17, true),
+            battery: v.getUint8(19),
+            flags: v.getUint8(20),
+        };
+    } else if (type === BIN_DELTA) {
+        const s = binaryTelemetryState;
+        if (!s) return null; // wait for the next keyframe
+        s.ts += v.getUint8(1);
+        s.lat += v.getInt16(2, true);
+        s.lon += v.getInt16(4, true);
+        s.alt += v.getInt16(6, true);
+        s.heading = (s.heading + v.getInt16(8, true) + 36000) % 36000;
+        s.speed += v.getInt16(10, true);
+        s.battery = v.getUint8(12);
+        s.flags = v.getUint8(13);
+    } else {
+        console.warn('Unknown binary telemetry frame', type);
+        return null;
+    }
+    const s = binaryTelemetryState;
+    if (s.lat === BIN_NO_FIX) return null;
+    return {
+        lat: s.lat / 1e7,
+        lon: s.lon / 1e7,
+        alt: s.alt / 10,
+        heading: s.heading / 100,
+        speed: s.speed / 100,
+        battery: s.battery / 2,
+        armed: (s.flags & 1) === 1,
+        ts: s.ts,
+    };
+}
+
 // -------------------------------
 // DEMO SIMULATION (no WebSocket)
 // -------------------------------
@@ -324,6 +460,10 @@ const dashHistPoints = [];
 let dashHistChart = null;
 let dashHistMetric = 'alt';
 let dashHistRangeMs = 60 * 1000;
+// Server-side history (/api/telemetry/history, downsampled), live points are appended after it
+const DASH_HIST_MAX_POINTS = 400;
+const DASH_HIST_FIELDS = { alt: 'alt', speed: 'speed', bat: 'battery' };
+let dashHistServer = null;
 
 function updateDashGaugeArc(speed) {
     const arc = document.getElementById('aw-dash-gauge-arc');
@@ -409,11 +549,37 @@ function pushDashHistory(ts, alt, speed, battery) {
     if (dashHistPoints.length > 400) dashHistPoints.splice(0, dashHistPoints.length - 400);
 }
 
+async function loadDashHistory() {
+    const field = DASH_HIST_FIELDS[dashHistMetric] || 'alt';
+    const rangeS = Math.round(dashHistRangeMs / 1000);
+    try {
+        const res = await fetch(API_BASE + `/api/telemetry/history?from=-${rangeS}&max_points=${DASH_HIST_MAX_POINTS}&fields=${field}`);
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const data = await res.json();
+        const series = data.series[field];
+        dashHistServer = {
+            metric: dashHistMetric,
+            points: series.t.map((t, i) => ({ t: t * 1000, v: series.v[i] }))
+        };
+    } catch (e) {
+        console.warn('loadDashHistory', e);
+        dashHistServer = null;
+    }
+    refreshDashHistoryChart();
+}
+
 function refreshDashHistoryChart() {
     if (!dashHistChart) return;
     const key = dashHistMetric === 'speed' ? 'speed' : dashHistMetric === 'bat' ? 'bat' : 'alt';
-    const vals = dashHistPoints.map(p => p[key]);
-    const labels = dashHistPoints.map(p => {
+    let points = dashHistPoints.map(p => ({ t: p.t, v: p[key] }));
+    if (dashHistServer && dashHistServer.metric === dashHistMetric && dashHistServer.points.length) {
+        const cutoff = Date.now() - dashHistRangeMs;
+        const server = dashHistServer.points.filter(p => p.t >= cutoff);
+        const lastT = dashHistServer.points[dashHistServer.points.length - 1].t;
+        points = server.concat(points.filter(p => p.t > lastT));
+    }
+    const vals = points.map(p => p.v);
+    const labels = points.map(p => {
         const d = new Date(p.t);
         return d.toLocaleTimeString(undefined, { hour: '2-digit', minute: '2-digit', second: '2-digit' });
     });
@@ -483,7 +649,7 @@ function initAquawingDashboard() {
         if (metricSel) {
             metricSel.addEventListener('change', () => {
                 dashHistMetric = metricSel.value;
-                refreshDashHistoryChart();
+                loadDashHistory();
             });
         }
         document.querySelectorAll('.aw-pill-tab[data-range]').forEach(btn => {
@@ -492,9 +658,10 @@ function initAquawingDashboard() {
                 btn.classList.add('is-active');
                 const r = btn.getAttribute('data-range');
                 dashHistRangeMs = r === '1m' ? 60e3 : r === '5m' ? 300e3 : r === '15m' ? 900e3 : 3600e3;
-                refreshDashHistoryChart();
+                loadDashHistory();
             });
         });
+        loadDashHistory();
     } catch (e) {
         console.warn('initAquawingDashboard', e);
     }
@@ -2067,8 +2234,17 @@ const thermalStatus = document.getElementById('thermal-status');
 async function fetchAndDisplayThermal(){
     const panel = document.querySelector('.camera-panel.thermal');
     const base = panel && panel.dataset && panel.dataset.url ? panel.dataset.url : '/thermal';
-    const url = base + '?_=' + Date.now();
-    const blob = await fetchBlob(url);
+    // Conditional GET: 304 while the sensor has not produced a new frame
+    let blob = null;
+    try {
+        const r = await fetch(base, {
+            cache: 'no-store',
+            credentials: 'include',
+            headers: lastThermalEtag ? { 'If-None-Match': lastThermalEtag } : {}
+        });
+        if (r.status === 304) return;
+        if (r.ok) { lastThermalEtag = r.headers.get('ETag'); blob = await r.blob(); }
+    } catch(e){ console.error('Thermal fetch error:', e); }
     if (!blob) { if (thermalStatus) thermalStatus.className = 'status-dot off'; return; }
     try { if (lastThermalObjectURL) URL.revokeObjectURL(lastThermalObjectURL); } catch(e){}
     const obj = URL.createObjectURL(blob); lastThermalObjectURL = obj; if (thermalImg) thermalImg.src = obj;
@@ -2084,8 +2260,8 @@ async function fetchAndDisplayThermal(){
 }
 
 let thermalAiTimer = null;
-function startThermalLoop(){ stopThermalLoop(); fetchAndDisplayThermal(); thermalTimer = setInterval(()=> fetchAndDisplayThermal(), THERMAL_INTERVAL); if (thermalAiTimer) clearInterval(thermalAiTimer); thermalAiTimer = setInterval(simulateThermalDetections, 1400); simulateThermalDetections(); }
-function stopThermalLoop(){ if (thermalTimer) { clearInterval(thermalTimer); thermalTimer = null; } try{ if (lastThermalObjectURL) { URL.revokeObjectURL(lastThermalObjectURL); lastThermalObjectURL = null; } }catch(e){} if (thermalImg) thermalImg.src = ''; const elF = document.getElementById('thermal-fps'); if (elF) elF.textContent = '0 fps'; const elR = document.getElementById('thermal-res'); if (elR) elR.textContent = '--'; if (thermalStatus) thermalStatus.className = 'status-dot off'; if (thermalAiTimer) { clearInterval(thermalAiTimer); thermalAiTimer = null; } clearOverlay('thermal-overlay'); document.getElementById('thermal-ai') && (document.getElementById('thermal-ai').textContent = ''); }
+function startThermalLoop(){ stopThermalLoop(); fetchAndDisplayThermal(); thermalTimer = setInterval(()=> { if (Date.now() - lastThermalPush > 3 * THERMAL_INTERVAL) fetchAndDisplayThermal(); }, THERMAL_INTERVAL); if (thermalAiTimer) clearInterval(thermalAiTimer); thermalAiTimer = setInterval(simulateThermalDetections, 1400); simulateThermalDetections(); }
+function stopThermalLoop(){ if (thermalTimer) { clearInterval(thermalTimer); thermalTimer = null; } try{ if (lastThermalObjectURL) { URL.revokeObjectURL(lastThermalObjectURL); lastThermalObjectURL = null; } }catch(e){} lastThermalEtag = null; if (thermalImg) thermalImg.src = ''; const elF = document.getElementById('thermal-fps'); if (elF) elF.textContent = '0 fps'; const elR = document.getElementById('thermal-res'); if (elR) elR.textContent = '--'; if (thermalStatus) thermalStatus.className = 'status-dot off'; if (thermalAiTimer) { clearInterval(thermalAiTimer); thermalAiTimer = null; } clearOverlay('thermal-overlay'); document.getElementById('thermal-ai') && (document.getElementById('thermal-ai').textContent = ''); }
 
 // cleanup on unload
 window.addEventListener('beforeunload', ()=>{
@@ -3568,11 +3744,14 @@ function updateSystemHealth() {
         battLabel.textContent = `${battPercent}%`;
     }
     
-    // FC status (simulated - would come from telemetry)
+    // FC status: heartbeat state pushed on the 'system' event
     const fcDot = document.getElementById('health-fc-dot');
     if (fcDot) {
-        // Assume healthy if connected
-        if (ws && ws.readyState === WebSocket.OPEN) {
+        const fcState = lastSystemEvent && lastSystemEvent.fc_link ? lastSystemEvent.fc_link.state : null;
+        if (fcState === 'lost') {
+            fcDot.className = 'health-dot critical';
+            systemHealth.fc = 'critical';
+        } else if (fcState === 'ok' || (ws && ws.readyState === WebSocket.OPEN)) {
             fcDot.className = 'health-dot healthy';
             systemHealth.fc = 'healthy';
         } else {
@@ -3582,9 +3761,9 @@ function updateSystemHealth() {
     }
 }
 
-// Update health indicators every 2 seconds
-setInterval(updateSystemHealth, 2000);
+// Health indicators follow server pushes ('system' events) and WS open / close
 updateSystemHealth();
+connectEventStream();
 
 // Enhanced Drone Marker with Smooth Animation
 let lastHeading = 0;
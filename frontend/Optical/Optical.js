@@ -5,6 +5,9 @@
     let thermalOn = false;
     let rgbTimer = null;
     let thermalTimer = null;
+    let thermalRefresh = null;
+    let lastThermalPush = 0;
+    let lastThermalFrame = null;
     let recOn = true;
 
     function setButtonText(id, on, label) {
@@ -123,9 +126,15 @@
             return;
         }
 
+        // One URL per sensor frame and palette: the browser revalidates it with
+        // If-None-Match (server answers 304) instead of downloading a copy per poll
         const refresh = () => {
-            img.src = `/thermal?t=${Date.now()}`;
+            const pal = document.getElementById("thermal-palette")?.value || "ironbow";
+            const frame = lastThermalFrame ?? Date.now();
+            const src = `/thermal?palette=${encodeURIComponent(pal)}&f=${frame}`;
+            if (img.getAttribute("src") !== src) img.src = src;
         };
+        thermalRefresh = refresh;
         img.onload = () => {
             img.style.display = "block";
             ph.style.display = "none";
@@ -144,7 +153,37 @@
         };
         refresh();
         if (thermalTimer) clearInterval(thermalTimer);
-        thermalTimer = setInterval(refresh, 1200);
+        // Fallback only: while thermal.stats pushes arrive they drive the refresh
+        thermalTimer = setInterval(() => {
+            if (Date.now() - lastThermalPush > 3600) refresh();
+        }, 1200);
+    }
+
+    // Thermal stats pushed by the server (one sensor read for every viewer)
+    function connectThermalEvents() {
+        if (typeof EventSource === "undefined") return;
+        const source = new EventSource("/api/events?topics=thermal.stats");
+        source.addEventListener("thermal.stats", (event) => {
+            let stats;
+            try {
+                stats = JSON.parse(event.data);
+            } catch (err) {
+                return;
+            }
+            lastThermalPush = Date.now();
+            if (typeof stats.frame_id === "number") lastThermalFrame = stats.frame_id;
+            const setText = (id, value) => {
+                const el = document.getElementById(id);
+                if (el && typeof value === "number") el.textContent = `${value.toFixed(1)}°C`;
+            };
+            setText("thermal-stat-max", stats.max_temp);
+            setText("thermal-stat-min", stats.min_temp);
+            const px = stats.pixels;
+            if (Array.isArray(px) && px.length === 8) {
+                setText("thermal-stat-center", (px[3][3] + px[3][4] + px[4][3] + px[4][4]) / 4);
+            }
+            if (thermalOn && thermalRefresh) thermalRefresh();
+        });
     }
 
     function updateThermalMeta() {
@@ -273,7 +312,10 @@
         document.querySelectorAll(".oc-range[id^=\"thermal-\"]").forEach((range) => {
             range.addEventListener("input", () => updateThermalMeta());
         });
-        document.getElementById("thermal-palette")?.addEventListener("change", () => updateThermalMeta());
+        document.getElementById("thermal-palette")?.addEventListener("change", () => {
+            updateThermalMeta();
+            if (thermalOn && thermalRefresh) thermalRefresh();
+        });
 
         wirePresets();
         wireToolbar();
@@ -286,6 +328,7 @@
 
         setVideo(true);
         setThermal(true);
+        connectThermalEvents();
         tickTimestamp();
         setInterval(tickTimestamp, 1000);
         updateThermalMeta();
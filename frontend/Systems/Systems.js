@@ -112,6 +112,34 @@
         });
     }
 
+    // Read-only live telemetry (Server-Sent Events; EventSource reconnects
+    // by itself and resumes with Last-Event-ID)
+    function connectTelemetryStream() {
+        if (typeof EventSource === "undefined") return;
+        const source = new EventSource("/api/telemetry/stream");
+        source.onmessage = function (event) {
+            let data;
+            try {
+                data = JSON.parse(event.data);
+            } catch (err) {
+                return;
+            }
+            const setText = function (id, text) {
+                const el = document.getElementById(id);
+                if (el) el.textContent = text;
+            };
+            if (typeof data.voltage === "number" && data.voltage > 0) {
+                setText("sys-batt-v", data.voltage.toFixed(1) + " V");
+            }
+            if (typeof data.battery === "number") {
+                const pct = Math.round(data.battery);
+                setText("sys-cap", pct + "%");
+                setText("sys-batt-pct", pct + "%");
+                setBatteryRing(pct);
+            }
+        };
+    }
+
     function kickLightMotion() {
         const motors = document.querySelectorAll(".sys-motor");
         if (!motors.length) return;
@@ -130,5 +158,6 @@
         buildSignalBars();
         initThermalChart();
         kickLightMotion();
+        connectTelemetryStream();
     });
 })();
@@ -38,6 +38,122 @@ def test_mission_manager():
     print("Mission manager OK")
 
 
+def test_mission_statistics():
+    """Vectorized leg distances, ETA and scanned area, cached until the waypoints change."""
+    import math
+    from backend.src.mission.mission_manager import STATS_CACHE_SIZE, Mission, WayPoint
+
+    mission = Mission("stats")
+    # 0.01° of latitude ≈ 1111.95 m, flown north and back
+    mission.set_waypoints([36.80, 36.81, 36.80], [10.18, 10.18, 10.18], 20.0, [5.0, 10.0, 5.0])
+    stats = mission.stats(footprint_m=20.0)
+    assert abs(stats["leg_distances_m"][0] - 1111.95) < 0.5
+    assert abs(stats["total_distance_m"] - 2 * 1111.95) < 1.0
+    assert abs(stats["eta_s"][1] - 111.2) < 0.1 and abs(stats["total_time_s"] - 333.6) < 0.2
+
+    # out and back over the same line: scanned once (rectangle + round ends)
+    expected = 1111.95 * 20.0 + math.pi * 10.0 ** 2
+    assert abs(stats["area_scanned_m2"] - expected) / expected < 0.02
+    assert mission.stats(footprint_m=20.0) is stats
+
+    mission.add_waypoint(WayPoint(36.80, 10.19, 20.0, speed=0.0))
+    assert mission.stats(footprint_m=20.0) is not stats
+    assert mission.stats(footprint_m=20.0)["total_time_s"] is None     # leg with no speed
+    assert len(mission.waypoints) == 4 and mission.waypoints[3].lon == 10.19
+    try:
+        mission.waypoints[3].completed = True           # snapshot: fails loudly
+        assert False, "waypoint snapshot is writable"
+    except AttributeError:
+        pass
+    mission.complete_waypoint(3)
+    assert mission.waypoints[3].completed
+
+    # only a bounded number of footprint variants is cached
+    for footprint in range(1, 20):
+        mission.stats(footprint_m=float(footprint))
+    assert len(mission._stats) <= STATS_CACHE_SIZE
+    # swath from the camera FOV: 2 * 20 m * tan(30°)
+    assert abs(mission.stats()["swath_m"] - 23.09) < 0.01
+
+    # a snapshot keeps its route while the mission is replaced; a rejected
+    # update leaves the mission as it was
+    route = mission.snapshot()
+    mission.set_waypoints([1.0, 2.0], [3.0, 4.0], 10.0)
+    assert len(route) == 4 and route.stats(footprint_m=20.0)["waypoints"] == 4
+    assert mission.stats(footprint_m=20.0)["waypoints"] == 2
+    try:
+        mission.set_waypoints([1.0, 2.0, 3.0], [3.0, 4.0], 10.0)
+        assert False, "mismatched lengths accepted"
+    except ValueError:
+        pass
+    assert mission.lat.tolist() == [1.0, 2.0] and len(mission.altitude) == 2
+    print("Mission statistics OK")
+
+
+def test_thermal_capture_thread():
+    """One capture thread reads the sensor; every reader gets the cached frame."""
+    import time
+    from backend.src.streaming.vedio_heatmap_stream import HeatmapStreamer
+
+    streamer = HeatmapStreamer(output_size=32)
+    camera = streamer._camera
+    camera.fps = 50
+    reads = []
+    simulate = camera.read_pixels
+    camera.read_pixels = lambda: reads.append(1) or simulate()
+    try:
+        first = streamer.latest()
+        stats = [streamer.get_stats() for _ in range(200)]
+        assert len(reads) < 10                  # 200 readers, a handful of sensor reads
+        assert stats[-1]["frame_id"] >= first.frame_id
+        assert stats[0]["max_temp"] >= stats[0]["avg_temp"] >= stats[0]["min_temp"]
+
+        newer = streamer.wait_frame(first.frame_id, timeout=1.0)
+        assert newer.frame_id > first.frame_id and newer.ts >= first.ts
+        assert not newer.pixels.flags.writeable
+        assert streamer.get_jpeg(frame=newer)[:2] == b"\xff\xd8"
+    finally:
+        streamer.stop()
+    count = len(reads)
+    time.sleep(0.1)
+    assert len(reads) == count and not streamer.status()["running"]
+    print("Thermal capture OK")
+
+
+def test_thermal_jpeg_cache():
+    """A frame is encoded once per variant; the next frame drops the cache."""
+    from backend.src.streaming.vedio_heatmap_stream import HeatmapStreamer, ThermalFrame
+    import numpy as np
+
+    streamer = HeatmapStreamer(output_size=32)
+    pixels = np.linspace(15.0, 50.0, 64, dtype=np.float32).reshape(8, 8)
+    frame = ThermalFrame(1, 0.0, pixels)
+
+    jpeg = streamer.get_jpeg(frame=frame)
+    assert streamer.get_jpeg(frame=frame) is jpeg
+    assert streamer.jpeg_encodes == 1 and streamer.jpeg_hits == 1
+    ironbow = streamer.get_jpeg(frame=frame, size=64, palette="ironbow")
+    assert ironbow != jpeg and streamer.get_jpeg(frame=frame, size=64, palette="ironbow") is ironbow
+    assert streamer.jpeg_encodes == 2
+
+    newer = ThermalFrame(2, 0.1, pixels)
+    assert streamer.get_jpeg(frame=newer) == jpeg       # same pixels, encoded again
+    assert streamer.jpeg_encodes == 3
+    streamer.get_jpeg(frame=frame)                      # older frame: encoded, not cached
+    streamer.get_jpeg(frame=newer)
+    assert streamer.jpeg_encodes == 4
+    etag = streamer.jpeg_etag(newer, 32, 85, "jet")
+    assert etag.endswith('-2-32-85-jet"')
+    assert HeatmapStreamer(output_size=32).jpeg_etag(newer, 32, 85, "jet") != etag     # new process / instance
+    assert streamer.get_jpeg(frame=newer, palette="rainbow") != streamer.get_jpeg(frame=newer, palette="jet")
+    try:
+        streamer.get_jpeg(frame=newer, palette="sepia")
+        assert False, "unknown palette accepted"
+    except ValueError:
+        pass
+    print("Thermal JPEG cache OK")
+
+
 def test_safety_supervisor():
     """Test safety constraint checking."""
     from backend.src.safety.supervisor import SafetySupervisor
@@ -51,6 +167,22 @@ def test_safety_supervisor():
     # Altitude violation
     bad_state = {"altitude_m": 150, "speed_mps": 10, "battery_percent": 80}
     assert supervisor.check_constraints(bad_state) is False
+
+    # link state reported in /health
+    supervisor.on_link_lost({"link": "fc", "reason": "heartbeat timeout"})
+    status = supervisor.status()
+    assert status["links_ok"] == {"fc": False} and status["last_link_event"]["event"] == "lost"
+    assert status["failsafe_at"] is None            # armed state unknown: report only
+
+    # lost while armed: failsafe
+    armed = [False]
+    supervisor.armed_state = lambda: armed[0]
+    supervisor.on_link_lost({"link": "fc", "reason": "heartbeat timeout"})
+    assert supervisor.status()["failsafe_at"] is None
+    armed[0] = True
+    supervisor.on_link_lost({"link": "fc", "reason": "heartbeat timeout"})
+    status = supervisor.status()
+    assert status["failsafe_at"] is not None and status["last_link_event"]["armed"] is True
     print("Safety supervisor OK")
 
 
@@ -108,11 +240,11 @@ def test_pid_api():
     except Exception as e:
         # FastAPI not installed in this environment — run lower-level smoke checks
         print('FastAPI not available, performing lower-level PID checks')
-        from backend.src.uart.protocol import encode_message, MessageType
+        from backend.src.uart.protocol import encode_message, decode_message, MessageType
         ok = fc.set_pid_gains('pitch', 3.14, 0.02, 0.003)
         assert ok is True
         data = encode_message(MessageType.PID_UPDATE, {'axis':'pitch','kp':3.14,'ki':0.02,'kd':0.003})
-        assert data[0] == MessageType.PID_UPDATE
+        assert decode_message(data)[0] == MessageType.PID_UPDATE
 
     # verify persisted in config file in either case
     from pathlib import Path
@@ -125,11 +257,86 @@ def test_pid_api():
     print('PID API + persistence OK')
 
 
+def test_command_defaults():
+    """takeoff / move without params get the configured altitude; PID updates report the MCU ACK."""
+    import asyncio
+    from types import SimpleNamespace
+    from backend import api
+    from backend.src.uart.protocol import MessageType, encode_message
+
+    sent = []
+
+    class FakeScheduler:
+        ack = True
+
+        def submit(self, msg_type, payload=b'', priority=None, key=None):
+            encode_message(msg_type, payload)       # same validation as the real scheduler
+            sent.append((msg_type, payload))
+            fut = asyncio.get_running_loop().create_future()
+            if self.ack:
+                fut.set_result({"status": "acked", "seq": len(sent)})
+            return fut
+
+    async def run():
+        scheduler = FakeScheduler()
+        link_manager = SimpleNamespace(commands=scheduler, fc=SimpleNamespace(state="connected"))
+        saved, api._link_manager = api._link_manager, link_manager
+        try:
+            takeoff = await api.send_command(api.Command(command="takeoff"))
+            assert takeoff.success and sent[-1] == (MessageType.TAKEOFF, {"alt": api._TAKEOFF_ALT_M})
+            move = await api.send_command(api.Command(command="move", params={"lat": 36.8, "lon": 10.18}))
+            assert move.success and sent[-1][1]["alt"] == api._TAKEOFF_ALT_M
+            rejected = await api.send_command(api.Command(command="move"))
+            assert not rejected.success and "rejected" in rejected.message and len(sent) == 2
+
+            gains = api.PIDUpdate(axis='pitch', kp=3.14, ki=0.02, kd=0.003)
+            acked = await api.update_pid(gains)
+            assert acked['sent_to_mcu'] is True and acked['mcu_status'] == "acked"
+            scheduler.ack, wait = False, api.PID_ACK_WAIT_S
+            api.PID_ACK_WAIT_S = 0.01
+            try:
+                pending = await api.update_pid(gains)
+            finally:
+                api.PID_ACK_WAIT_S = wait
+            assert pending['sent_to_mcu'] is False and pending['mcu_status'] == "pending"
+        finally:
+            api._link_manager = saved
+
+    asyncio.run(run())
+    print("Command defaults OK")
+
+
+def test_telemetry_update_round_trip():
+    """Telemetry posted to /telemetry/update reads back unchanged, heading included."""
+    import asyncio
+    from backend import api
+
+    async def run():
+        posted = api.TelemetryData(
+            timestamp="2026-10-17T12:00:00", position_lat=36.81, position_lon=10.18,
+            altitude_m=42.5, velocity_mps=7.25, heading_deg=123.5, yaw_deg=118.0,
+        )
+        await api.update_telemetry(posted)
+        latest = await api.get_telemetry()
+        assert latest.heading_deg == 123.5 and latest.yaw_deg == 118.0
+        assert (latest.position_lat, latest.position_lon) == (36.81, 10.18)
+        assert latest.altitude_m == 42.5 and latest.velocity_mps == 7.25
+        assert latest.timestamp == posted.timestamp
+
+    asyncio.run(run())
+    print("Telemetry round trip OK")
+
+
 if __name__ == "__main__":
     test_imports()
     test_mission_manager()
+    test_mission_statistics()
+    test_thermal_capture_thread()
+    test_thermal_jpeg_cache()
     test_safety_supervisor()
     test_flight_controller()
     test_guidance()
     test_pid_api()
+    test_command_defaults()
+    test_telemetry_update_round_trip()
     print("\n All tests passed!")
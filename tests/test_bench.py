@@ -0,0 +1,37 @@
+"""
+AquaWing - UART benchmark smoke tests
+
+Runs every benchmark of backend/src/uart/bench.py with small counts so the
+suite stays fast; use the CLI for real numbers:
+
+    python -m backend.src.uart.bench
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def test_codec_benchmarks():
+    """encode / decode / gps_parse report throughput and CPU per frame."""
+    from backend.src.uart.bench import bench_decode, bench_encode, bench_gps_parse
+
+    for result in (bench_encode(2000), bench_decode(2000), bench_gps_parse(500)):
+        assert result["frames"] > 0
+        assert result["frames_per_s"] > 1000, result
+        assert result["bytes_per_s"] > 0 and result["cpu_us_per_frame"] > 0
+        print(result)
+
+
+def test_link_benchmarks():
+    """PTY receive path and command→ACK round trips against the simulator."""
+    from backend.src.uart.bench import bench_ack_rtt, bench_pty_rx
+
+    rx = bench_pty_rx(2000)
+    assert rx["frames"] == 2000 and rx["frames_per_s"] > 1000, rx
+
+    rtt = bench_ack_rtt(50)
+    assert rtt["frames"] == 50
+    assert 0 < rtt["p50_ms"] <= rtt["p99_ms"] < 250, rtt
+    print(rx, rtt)
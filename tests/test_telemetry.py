@@ -0,0 +1,765 @@
+"""
+AquaWing - Telemetry store / broadcast tests
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def test_telemetry_store_ring():
+    """Raw TELEMETRY_DATA payloads land in the ring buffer with the latched GPS fix."""
+    from backend.src.telemetry.store import TelemetryStore, TELEMETRY_DTYPE
+    from backend.src.uart.protocol import TELEMETRY_STRUCT, TELEMETRY_FIELDS
+
+    assert TELEMETRY_DTYPE.itemsize == 8 + TELEMETRY_STRUCT.size + 8 + 8 + 4 * 3 + 2 + 4 * 2
+
+    store = TelemetryStore(capacity=8)
+    assert store.latest() is None
+    store.update_gps(lat=36.8, lon=10.18, gps_fix=1, num_satellites=9, course_deg=45.0)
+    for i in range(20):
+        payload = TELEMETRY_STRUCT.pack(i, 1.0, 2.0, 3.0, 10.0 + i, 0.0, 12.5, 80.0, 1000, 1000, 1000, 1000, 0, 1)
+        assert store.write_fc_payload(memoryview(payload), ts=100.0 + i) == i
+
+    assert len(store) == 8 and store.count == 20
+    row = store.latest_dict()
+    assert row['time_ms'] == 19 and row['altitude_m'] == 29.0
+    assert row['lat'] == 36.8 and row['num_satellites'] == 9
+
+    hist = store.last(5)
+    assert list(hist['time_ms']) == [15, 16, 17, 18, 19]
+    assert list(store.ordered()['ts']) == [100.0 + i for i in range(12, 20)]
+
+    msg = store.latest_message()
+    assert msg['alt'] == 29.0 and msg['heading'] == 45.0 and msg['armed'] is True
+    assert msg['rtt_ms'] is None
+
+    store.update_link(rtt_ms=3.5, loss_pct=10.0)
+    msg = store.latest_message()
+    assert msg['rtt_ms'] == 3.5 and msg['link_loss'] == 10.0
+    assert set(TELEMETRY_FIELDS) <= set(row)
+
+    # short payloads are rejected without touching the ring
+    assert store.write_fc_payload(b'\x00' * 4) == -1 and store.count == 20
+    print("Telemetry store OK")
+
+
+def test_telemetry_history_downsampling():
+    """Time windows are binary-searched across the ring wrap and reduced with LTTB / min-max."""
+    import numpy as np
+    from backend.src.telemetry.downsample import lttb, minmax
+    from backend.src.telemetry.store import TelemetryStore
+
+    store = TelemetryStore(capacity=1000)
+    for i in range(2500):
+        store.append(ts=1000.0 + i, altitude_m=float(i % 100), battery_percent=100.0 - i / 100)
+    assert len(store) == 1000          # ts 2500..3499, wrapped
+
+    assert store.time_range() == (0, 1000)
+    assert store.time_range(3000.0, 3100.0) == (500, 601)
+    assert store.time_range(2950.5, 3049.5) == (451, 550)
+    assert store.time_range(3400.0, 3499.0) == (900, 1000)
+    assert store.time_range(0.0, 2500.0) == (0, 1)
+    assert store.time_range(5000.0) == (1000, 1000)
+    cols = store.columns(['ts'], 495, 510)
+    assert list(cols['ts']) == [1000.0 + 1500 + i for i in range(495, 510)]
+
+    hist = store.history(2600.0, 3499.0, fields=['alt', 'battery'], max_points=100)
+    assert hist["raw_points"] == 900 and hist["method"] == "lttb"
+    alt = hist["series"]["alt"]
+    assert len(alt["t"]) == 100 and alt["t"][0] == 2600.0 and alt["t"][-1] == 3499.0
+    assert max(alt["v"]) >= 95.0     # sawtooth peaks survive
+
+    # a backwards clock step falls back to a linear scan
+    store.append(ts=1200.0, altitude_m=1.0)
+    assert store.clock_steps == 1
+    assert store.time_range(1100.0, 1300.0) == (999, 1000)
+
+    try:
+        store.history(fields=['nope'])
+        assert False, "unknown field accepted"
+    except ValueError:
+        pass
+
+    # a window older than the live ring is served from the 1 Hz archive
+    store = TelemetryStore(capacity=1000, archive_capacity=4000)
+    for i in range(3600 * 50):                 # 1 h at 50 Hz
+        store.append(ts=10000.0 + i / 50, altitude_m=float(i // 50))
+    assert len(store) == 1000 and len(store.archive) == 3600
+    hour = store.history(10000.0, 13600.0, fields=['alt'], max_points=5000)
+    assert hour["archive"] and hour["raw_points"] == 3600
+    assert hour["series"]["alt"]["t"][0] == 10000.0 and hour["series"]["alt"]["v"][-1] == 3599.0
+    recent = store.history(13590.0, fields=['alt'])
+    assert not recent["archive"] and recent["raw_points"] == 500
+
+    # a single spike is kept by both methods
+    x = np.arange(10000, dtype=np.float64)
+    y = np.zeros_like(x)
+    y[4321] = 50.0
+    for fn, n in ((lttb, 200), (minmax, 200)):
+        keep = fn(x, y, n)
+        assert len(keep) <= n and keep[0] == 0 and keep[-1] == len(x) - 1
+        assert 4321 in keep and np.all(np.diff(keep) > 0)
+    assert len(lttb(x, y, 5000)) == 5000
+    assert len(lttb(x[:50], y[:50], 200)) == 50
+    print("Telemetry history OK")
+
+
+def test_telemetry_hub_slow_client():
+    """A slow client drops old telemetry without delaying the others."""
+    import asyncio
+    import json
+    from backend.src.streaming.telemetry_hub import TelemetryHub
+
+    class FakeSocket:
+        def __init__(self, delay):
+            self.delay = delay
+            self.texts = []
+            self.received = []
+
+        async def accept(self):
+            pass
+
+        async def send_text(self, text):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.texts.append(text)
+            self.received.append(json.loads(text))
+
+    async def run():
+        hub = TelemetryHub(queue_size=4)
+        fast = [FakeSocket(0) for _ in range(20)]
+        slow = FakeSocket(0.2)
+        for i, ws in enumerate(fast + [slow]):
+            await hub.connect(ws, f"client{i}")
+
+        for seq in range(50):
+            assert hub.publish({"seq": seq}) == 21
+            await asyncio.sleep(0.002)
+        hub.send(slow, {"type": "ack"})
+        await asyncio.sleep(0.05)
+
+        assert all([m["seq"] for m in ws.received] == list(range(50)) for ws in fast)
+        # encoded once: every client got the very same str object
+        assert all(ws.texts[7] is fast[0].texts[7] for ws in fast)
+        status = {c["name"]: c for c in hub.status()["per_client"]}
+        assert status["client20"]["dropped"] > 0 and status["client0"]["dropped"] == 0
+        assert status["client0"]["max_lag_ms"] < 100
+
+        await asyncio.sleep(1.2)
+        # control messages are never dropped and jump the telemetry queue
+        assert {"type": "ack"} in slow.received
+        assert slow.received[-1]["seq"] == 49
+
+        await hub.close()
+        assert hub.status()["clients"] == 0
+
+    asyncio.run(run())
+    print("Telemetry hub OK")
+
+
+def test_telemetry_hub_subscriptions():
+    """Per-client topics and rate_hz: projected fields, decimated stream."""
+    import asyncio
+    import json
+    from backend.src.streaming.telemetry_hub import TelemetryHub
+    from backend.src.telemetry.store import TelemetryStore
+
+    class FakeSocket:
+        def __init__(self):
+            self.received = []
+
+        async def accept(self):
+            pass
+
+        async def send_text(self, text):
+            self.received.append(json.loads(text))
+
+    async def run():
+        store = TelemetryStore(capacity=16)
+        store.append(lat=36.8, lon=10.18, altitude_m=12.0, battery_percent=80.0)
+        message = store.latest_message()
+
+        hub = TelemetryHub(queue_size=64)
+        full, small, a, b = FakeSocket(), FakeSocket(), FakeSocket(), FakeSocket()
+        for i, ws in enumerate((full, small, a, b)):
+            await hub.connect(ws, f"client{i}")
+        applied = hub.subscribe(small, ["position", "battery"], rate_hz=10)
+        assert applied == {"topics": ["position", "battery"], "rate_hz": 10.0, "events": []}
+        hub.subscribe(a, ["battery"])
+        hub.subscribe(b, ["battery"])
+        try:
+            hub.subscribe(small, ["nope"])
+            assert False, "unknown topic accepted"
+        except ValueError:
+            pass
+
+        # 50 Hz producer for 1 s
+        for _ in range(50):
+            hub.publish(message)
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.05)
+
+        assert len(full.received) == 50
+        assert set(full.received[0]) == set(message)
+        assert 8 <= len(small.received) <= 13
+        assert set(small.received[0]) == {"ts", "lat", "lon", "alt", "heading", "speed", "battery", "voltage"}
+        assert a.received[0] == {"ts": message["ts"], "battery": 80.0, "voltage": 0.0}
+        status = {c["name"]: c for c in hub.status()["per_client"]}
+        assert status["client1"]["decimated"] == 50 - len(small.received)
+        assert status["client1"]["bytes_sent"] < status["client0"]["bytes_sent"] / 5
+
+        await hub.close()
+
+    asyncio.run(run())
+    print("Telemetry subscriptions OK")
+
+
+def test_binary_telemetry_keyframe_delta():
+    """Binary frames round-trip exactly and are ~10x smaller than JSON."""
+    import asyncio
+    import json
+    import math
+    from backend.src.streaming.binary_telemetry import (
+        BinaryTelemetryDecoder, BinaryTelemetryEncoder, KEYFRAME, quantize,
+    )
+    from backend.src.streaming.telemetry_hub import TelemetryHub, encode_json
+    from backend.src.telemetry.store import TelemetryStore
+
+    store = TelemetryStore(capacity=256)
+    messages = []
+    for i in range(200):
+        angle = math.radians(i * 4.0)
+        store.append(
+            lat=36.8065 + 0.005 * math.cos(angle), lon=10.1815 + 0.005 * math.sin(angle),
+            altitude_m=15.0 + i * 0.1, yaw_deg=(i * 4.0) % 360.0, ground_speed_mps=2.5,
+            battery_percent=85.0 - i * 0.05, armed=True, ts=1_700_000_000 + i // 10,
+        )
+        messages.append(store.latest_message())
+
+    encoder, decoder = BinaryTelemetryEncoder(), BinaryTelemetryDecoder()
+    frames = [encoder.encode(quantize(m)) for m in messages]
+    assert frames[0][0] == KEYFRAME and encoder.stats()["keyframes"] == 4
+    for message, frame in zip(messages, frames):
+        out = decoder.decode(frame)
+        assert abs(out["lat"] - message["lat"]) < 1e-7 and abs(out["lon"] - message["lon"]) < 1e-7
+        assert abs(out["alt"] - message["alt"]) <= 0.05
+        assert abs((out["heading"] - message["heading"] + 180) % 360 - 180) <= 0.005
+        assert out["ts"] == message["ts"] and out["armed"] is True
+    json_bytes = sum(len(encode_json(m)) for m in messages)
+    bin_bytes = sum(len(f) for f in frames)
+    assert json_bytes / bin_bytes > 10, (json_bytes, bin_bytes)
+
+    class FakeSocket:
+        def __init__(self):
+            self.frames = []
+
+        async def accept(self, subprotocol=None):
+            pass
+
+        async def send_text(self, text):
+            self.frames.append(text)
+
+        async def send_bytes(self, data):
+            self.frames.append(data)
+
+    async def run():
+        hub = TelemetryHub(queue_size=4)
+        ws = FakeSocket()
+        await hub.connect(ws, "bin", encoding="bin")
+        for i, message in enumerate(messages[:20]):
+            hub.publish(message)
+            if i % 5 == 4:
+                await asyncio.sleep(0.01)      # hub drops while we don't yield
+        hub.send(ws, {"type": "ack"})
+        await asyncio.sleep(0.05)
+        # deltas follow what this client actually received, drops included
+        decoder = BinaryTelemetryDecoder()
+        received = [decoder.decode(f) for f in ws.frames if isinstance(f, bytes)]
+        assert received[-1]["ts"] == messages[19]["ts"]
+        assert abs(received[-1]["lat"] - messages[19]["lat"]) < 1e-7
+        assert '{"type":"ack"}' in ws.frames
+        status = hub.status()["per_client"][0]
+        assert status["encoding"] == "bin" and status["dropped"] > 0
+
+        # battery voltage / attitude are not in the binary frames: JSON for that subscription
+        assert hub.subscribe(ws, ["position", "battery"])["encoding"] == "json"
+        ws.frames.clear()
+        hub.publish(messages[20])
+        await asyncio.sleep(0.01)
+        assert json.loads(ws.frames[-1])["voltage"] == messages[20]["voltage"]
+        assert hub.subscribe(ws, ["position", "status"])["encoding"] == "bin"
+        hub.publish(messages[21])
+        await asyncio.sleep(0.01)
+        assert ws.frames[-1][0] == KEYFRAME                 # fresh keyframe after the fallback
+        await hub.close()
+
+    asyncio.run(run())
+    print(f"Binary telemetry OK ({json_bytes / bin_bytes:.1f}x smaller)")
+
+
+def test_telemetry_hub_batching_and_deflate():
+    """A batch window coalesces telemetry into one frame; deflate ratio is reported."""
+    import asyncio
+    import json
+    from backend.src.streaming.binary_telemetry import BinaryTelemetryDecoder
+    from backend.src.streaming.telemetry_hub import TelemetryHub
+
+    class FakeSocket:
+        def __init__(self, query=None):
+            self.query_params = query or {}
+            self.headers = {"sec-websocket-extensions": "permessage-deflate; client_max_window_bits"}
+            self.frames = []
+
+        async def accept(self, subprotocol=None):
+            pass
+
+        async def send_text(self, text):
+            self.frames.append(text)
+
+        async def send_bytes(self, data):
+            self.frames.append(data)
+
+    async def run():
+        hub = TelemetryHub(queue_size=16, batch_window_s=0.05, per_message_deflate=True)
+        batched, binary, direct = FakeSocket(), FakeSocket(), FakeSocket({"batch_ms": "0"})
+        await hub.connect(batched, "batched")
+        await hub.connect(binary, "binary", encoding="bin")
+        await hub.connect(direct, "direct")
+
+        # 10 messages per 50 ms window, 100 in total
+        for i in range(100):
+            hub.publish({"lat": 36.8 + i * 1e-5, "lon": 10.18, "alt": 10.0, "heading": 90.0,
+                         "speed": 2.5, "battery": 80.0, "armed": True, "ts": 1_700_000_000})
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.1)
+        hub.send(batched, {"type": "ack"})
+        await asyncio.sleep(0.01)
+
+        assert len(direct.frames) == 100
+        batches = [json.loads(f) for f in batched.frames]
+        assert batches[-1] == {"type": "ack"}
+        items = [m for b in batches[:-1] for m in (b["items"] if b.get("type") == "batch" else [b])]
+        assert [round((m["lat"] - 36.8) * 1e5) for m in items] == list(range(100))
+        assert len(batches) - 1 < 20
+
+        decoder = BinaryTelemetryDecoder()
+        decoded = []
+        for frame in binary.frames:
+            offset = 0
+            while offset < len(frame):
+                size = 21 if frame[offset] == 0x4B else 14
+                decoded.append(decoder.decode(frame[offset:offset + size]))
+                offset += size
+        assert len(decoded) == 100 and abs(decoded[-1]["lat"] - (36.8 + 99e-5)) < 1e-7
+
+        status = {c["name"]: c for c in hub.status()["per_client"]}
+        assert status["direct"]["batch_window_ms"] == 0 and status["direct"]["batches"] == 0
+        assert status["batched"]["msgs_per_batch"] > 5
+        assert 40 <= status["batched"]["max_batch_wait_ms"] < 150
+        assert status["batched"]["deflate"] and status["batched"]["compression_ratio"] > 2
+        assert status["batched"]["sent"] < status["direct"]["sent"] / 5
+
+        # an ACK queued while a batch window is open is sent right away, ahead of the batch
+        hub.publish({"lat": 36.9, "lon": 10.18, "ts": 1_700_000_001})
+        await asyncio.sleep(0.005)
+        hub.send(batched, {"type": "ack", "cmd": "rtl"})
+        await asyncio.sleep(0.01)
+        assert json.loads(batched.frames[-1]) == {"type": "ack", "cmd": "rtl"}
+        await asyncio.sleep(0.06)
+        assert json.loads(batched.frames[-1])["lat"] == 36.9
+        await hub.close()
+
+    asyncio.run(run())
+    print("Telemetry batching OK")
+
+
+def test_telemetry_sse_stream_resume():
+    """SSE events reuse the published text and resume from Last-Event-ID."""
+    import asyncio
+    from backend.src.streaming.telemetry_hub import TelemetryHub
+
+    def events(chunk):
+        return [
+            (int(block.split("\n")[0][4:]), block.split("\n")[1][6:])
+            for block in chunk.split("\n\n") if block.startswith("id: ")
+        ]
+
+    async def run():
+        hub = TelemetryHub(replay_size=10)
+        for seq in range(1, 6):
+            hub.publish({"seq": seq})
+
+        stream = hub.sse_stream(last_event_id="3", name="viewer")
+        assert (await stream.__anext__()).startswith("retry: ")
+        # missed events 4 and 5 come from the replay buffer
+        assert events(await stream.__anext__()) == [(4, '{"seq":4}'), (5, '{"seq":5}')]
+
+        hub.publish({"seq": 6})
+        live = await asyncio.wait_for(stream.__anext__(), 1.0)
+        assert events(live) == [(6, '{"seq":6}')]
+        assert hub.status()["sse_clients"][0]["replayed"] == 2
+
+        # unknown (newer) id, e.g. after a server restart: replay everything kept
+        fresh = hub.sse_stream(last_event_id="999")
+        await fresh.__anext__()
+        assert [i for i, _ in events(await fresh.__anext__())] == [1, 2, 3, 4, 5, 6]
+
+        await hub.close()
+        for gen in (stream, fresh):
+            try:
+                await asyncio.wait_for(gen.__anext__(), 1.0)
+                assert False, "stream not closed"
+            except StopAsyncIteration:
+                pass
+        assert hub.status()["sse_clients"] == []
+
+    asyncio.run(run())
+    print("Telemetry SSE OK")
+
+
+def test_event_bus_fan_out_and_pollers():
+    """Events reach callbacks, /ws clients and SSE viewers; pollers run only with listeners."""
+    import asyncio
+    import json
+    from backend.src.streaming.event_bus import EventBus, Topic
+    from backend.src.streaming.telemetry_hub import TelemetryHub
+
+    class FakeSocket:
+        def __init__(self):
+            self.received = []
+
+        async def accept(self):
+            pass
+
+        async def send_text(self, text):
+            self.received.append(json.loads(text))
+
+    async def run():
+        hub = TelemetryHub()
+        bus = EventBus(hub)
+        polls = []
+        bus.add_poller(Topic.SYSTEM, lambda: polls.append(1) or {"clients": len(hub.clients)}, 0.02)
+        await bus.start()
+        await asyncio.sleep(0.1)
+        assert polls == []                  # nobody connected: no polling
+
+        seen = []
+        bus.subscribe(Topic.ALERT, seen.append)
+        everything, alerts_only, quiet = FakeSocket(), FakeSocket(), FakeSocket()
+        await hub.connect(everything, "all")
+        await hub.connect(alerts_only, "alerts")
+        await hub.connect(quiet, "default")
+        hub.subscribe(everything, events=[t.value for t in Topic])
+        hub.subscribe(alerts_only, events=["alert"])
+        stream = hub.sse_stream(telemetry=False, topics={"alert"})
+        await stream.__anext__()
+
+        await asyncio.sleep(0.1)
+        assert len(polls) >= 3
+        bus.publish(Topic.ALERT, {"level": "critical", "msg": "Link lost: fc", "link": "fc"})
+        bus.publish(Topic.TELEMETRY, {"lat": 36.8, "lon": 10.18, "ts": 1})
+        try:
+            bus.publish(Topic.COMMAND, {"status": "acked"})
+            assert False, "payload without cmd accepted"
+        except ValueError:
+            pass
+        await asyncio.sleep(0.05)
+
+        alert = {"type": "alert", "level": "critical", "msg": "Link lost: fc", "link": "fc"}
+        assert seen == [{"level": "critical", "msg": "Link lost: fc", "link": "fc"}]
+        assert alert in everything.received and {"lat": 36.8, "lon": 10.18, "ts": 1} in everything.received
+        assert any(m.get("type") == "system" for m in everything.received)
+        assert [m for m in alerts_only.received if m.get("type") != "alert"] == [{"lat": 36.8, "lon": 10.18, "ts": 1}]
+        assert quiet.received == [{"lat": 36.8, "lon": 10.18, "ts": 1}]        # no events by default
+
+        # periodic events: only the newest one waits for a client, ACKs are never replaced
+        everything.received.clear()
+        client = hub.clients[everything]
+        for i in range(5):
+            hub.publish_event("thermal.stats", json.dumps({"type": "thermal.stats", "n": i}), latest_only=True)
+            hub.send(everything, {"type": "ack", "n": i})
+        assert len(client.latest) == 1 and client.superseded == 4 and len(client.control) == 5
+        await asyncio.sleep(0.05)
+        assert [m["n"] for m in everything.received if m["type"] == "ack"] == [0, 1, 2, 3, 4]
+        assert [m["n"] for m in everything.received if m["type"] == "thermal.stats"] == [4]
+        chunk = await asyncio.wait_for(stream.__anext__(), 1.0)
+        assert chunk.startswith("event: alert\ndata: ") and "system" not in chunk
+
+        # retained: a late subscriber gets the last system event immediately
+        assert [topic for topic, _ in bus.retained()] == ["system"]
+        assert bus.status()["published"]["alert"] == 1
+
+        await bus.stop()
+        await hub.close()
+        await stream.aclose()
+
+    asyncio.run(run())
+    print("Event bus OK")
+
+
+def test_telemetry_producer_singleton():
+    """start() is idempotent, stop() really stops, status reports the lifecycle."""
+    import asyncio
+    from backend.src.streaming.telemetry_hub import TelemetryHub
+    from backend.src.telemetry.producer import TelemetryProducer
+    from backend.src.telemetry.store import TelemetryStore
+
+    async def run():
+        store = TelemetryStore(capacity=100)
+        producer = TelemetryProducer(store, TelemetryHub(), interval_s=0.01)
+        assert producer.start("alice") is True
+        assert producer.start("bob") is False        # second click / operator
+        await asyncio.sleep(0.1)
+        status = producer.status()
+        assert status["running"] and status["source"] == "demo" and status["started_by"] == "alice"
+        # one loop only: ~10 ticks in 100 ms, not ~20
+        assert 5 <= producer.ticks <= 13 and store.count == producer.ticks
+
+        assert await producer.stop() is True
+        ticks = producer.ticks
+        await asyncio.sleep(0.05)
+        assert producer.ticks == ticks and not producer.status()["running"]
+        assert await producer.stop() is False
+
+        # abort / rtl: the demo producer stops, live FC telemetry does not
+        class Link:
+            connected = True
+
+            def is_connected(self):
+                return self.connected
+
+        link = Link()
+        live_hub = TelemetryHub()
+        live = TelemetryProducer(store, live_hub, link=link, interval_s=0.01)
+        store.update_gps(lat=48.85, lon=2.35, gps_fix=3)        # real fix, latched
+        live.start("alice")
+        await asyncio.sleep(0.03)
+        assert live.status()["source"] == "fc"
+        # no TELEMETRY_DATA yet: the old row is not republished as fresh
+        assert live_hub.published == 0 and live.stale_ticks >= 2
+        store.append(altitude_m=30.0)
+        await asyncio.sleep(0.03)
+        assert live_hub.published == 1 and store.latest_dict()["lat"] == 48.85
+        assert await live.stop_demo() is False and live.is_running()
+        link.connected = False
+        await asyncio.sleep(0.03)
+        # demo rows carry the simulated orbit, the real fix stays latched
+        assert store.latest_dict()["lat"] != 48.85 and store.gps()["lat"] == 48.85
+        assert await live.stop_demo() is True and not live.is_running()
+
+    asyncio.run(run())
+    print("Telemetry producer OK")
+
+
+def test_flight_recorder_segments_and_recovery(tmp_path):
+    """Rows and events are appended to CRC'd segments, read back via mmap and survive a torn tail."""
+    import asyncio
+    from backend.src.streaming.event_bus import Topic, event_bus
+    from backend.src.telemetry.recorder import (
+        FlightLog, FlightRecorder, TELEMETRY_RECORD, list_flights, recover_flight,
+    )
+    from backend.src.telemetry.store import TelemetryStore
+
+    store = TelemetryStore(capacity=64)
+    # ~100 records per segment
+    recorder = FlightRecorder(store, directory=tmp_path, flush_interval_s=0.01,
+                              segment_mb=(64 + 100 * TELEMETRY_RECORD.itemsize) / 1024 / 1024)
+
+    async def record():
+        await recorder.start()
+        for i in range(250):
+            store.append(ts=1000.0 + i, altitude_m=float(i))
+            if i % 50 == 0:
+                await recorder.flush()
+        event_bus.publish(Topic.ALERT, {"level": "critical", "msg": "Link lost: fc", "link": "fc"})
+        event_bus.publish(Topic.COMMAND, {"cmd": "rtl", "status": "acked", "note": "x" * 500})
+        await recorder.stop()
+
+    asyncio.run(record())
+    assert recorder.records == {"telemetry": 250, "events": 2}
+    assert recorder.truncated_events == 1
+    flight = tmp_path / recorder.flight_id
+    assert len(list(flight.glob('tlm-*.seg'))) == 3
+
+    (summary,) = list_flights(tmp_path)
+    assert summary["closed"] and summary["telemetry_records"] == 250
+    assert summary["first_ts"] == 1000.0 and summary["last_ts"] == 1249.0
+
+    with FlightLog(flight) as log:
+        assert len(log) == 250 and log.time_span() == (1000.0, 1249.0)
+        seg, i = log.seek(1150.0)
+        assert log.segments[seg]['ts'][i] == 1150.0 and log.position(seg, i) == 150
+        views = log.telemetry(1090.0, 1110.0)
+        assert [len(v) for v in views] == [10, 11]
+        assert not views[0].flags.owndata          # mmap view, not a copy
+        assert list(views[1]['altitude_m'][:3]) == [100.0, 101.0, 102.0]
+        events = log.events()
+        assert [e["type"] for e in events] == ["alert", "command"]
+        assert events[1]["truncated"] and events[1]["cmd"] == "rtl"
+
+    # power loss: half-written record plus zero-filled garbage at the end of the last segment
+    last = sorted(flight.glob('tlm-*.seg'))[-1]
+    size = last.stat().st_size
+    with open(last, 'ab') as f:
+        f.write(b'\x01' * (TELEMETRY_RECORD.itemsize + 7) + b'\x00' * TELEMETRY_RECORD.itemsize)
+    with FlightLog(flight) as log:
+        assert len(log) == 250 and log.torn_records == 2
+    index = recover_flight(flight)
+    assert last.stat().st_size == size
+    assert sum(s["records"] for s in index["segments"] if s["kind"] == "tlm") == 250
+
+    # stop() during a slow write: the writes never overlap and nothing is lost;
+    # a non-OSError failure in one flush does not end the recording
+    import threading
+    import time
+    store = TelemetryStore(capacity=64)
+    slow = FlightRecorder(store, directory=tmp_path / "slow", flush_interval_s=0.01)
+    write, active, overlaps, calls = slow._write, [0], [0], [0]
+    guard = threading.Lock()
+
+    def slow_write(*args):
+        with guard:
+            active[0] += 1
+            overlaps[0] += active[0] > 1
+            calls[0] += 1
+            fail = calls[0] == 2
+        try:
+            time.sleep(0.05)
+            if fail:
+                raise RuntimeError("boom")
+            write(*args)
+        finally:
+            with guard:
+                active[0] -= 1
+
+    slow._write = slow_write
+
+    async def record_slow():
+        await slow.start()
+        for i in range(40):
+            store.append(ts=2000.0 + i, altitude_m=float(i))
+            await asyncio.sleep(0.005)
+        assert slow.is_running()
+        await slow.stop()
+
+    asyncio.run(record_slow())
+    assert overlaps[0] == 0 and slow.write_errors == 1
+    with FlightLog(tmp_path / "slow" / slow.flight_id) as log:
+        assert log.torn_records == 0 and len(log) == slow.records["telemetry"]
+    print("Flight recorder OK")
+
+
+def test_flight_replay_speed_pause_seek(tmp_path):
+    """A recorded flight is replayed through the hub at N× speed with pause and indexed seek."""
+    import asyncio
+    import time
+    from backend.src.telemetry.recorder import FlightRecorder
+    from backend.src.telemetry.replay import FlightReplay
+    from backend.src.telemetry.store import TelemetryStore
+
+    class FakeHub:
+        def __init__(self):
+            self.messages = []
+            self.events = []
+
+        def publish(self, message):
+            self.messages.append(message)
+
+        def publish_event(self, topic, text):
+            self.events.append(topic)
+
+    store = TelemetryStore(capacity=512)
+    recorder = FlightRecorder(store, directory=tmp_path, flush_interval_s=60)
+    hub = FakeHub()
+    replay = FlightReplay(hub, directory=tmp_path, publish_interval_s=0.01)
+
+    async def scenario():
+        await recorder.start()
+        t0 = time.time() - 10.0
+        for i in range(200):                     # 20 s at 10 Hz, the alert 10 s in
+            store.append(ts=t0 + i / 10, altitude_m=float(i))
+        recorder.record_event(1, {"level": "warning", "msg": "low battery"})
+        await recorder.stop()
+
+        try:
+            await replay.start(recorder.flight_id, speed=500)
+            assert False, "speed above 50x accepted"
+        except ValueError:
+            pass
+
+        await replay.start(recorder.flight_id, speed=50, offset_s=15.0)
+        assert hub.messages[-1]["alt"] == 150.0          # seek publishes the position at once
+        await asyncio.sleep(0.05)
+        replay.pause()
+        paused_at = len(hub.messages)
+        position = replay.status()["position_s"]
+        assert 15.0 < position < 20.0
+        await asyncio.sleep(0.05)
+        assert len(hub.messages) == paused_at and replay.status()["position_s"] == position
+
+        replay.seek(2.0)
+        assert hub.messages[-1]["alt"] == 20.0
+        replay.resume()
+        await asyncio.sleep(0.6)                 # 18 s of flight at 50x = 0.36 s
+        status = replay.status()
+        assert status["finished"] and status["position_s"] == 19.9
+        assert hub.messages[-1]["alt"] == 199.0
+        assert hub.events == ["alert"]
+        alts = [m["alt"] for m in hub.messages]
+        assert alts[paused_at + 1:] == sorted(alts[paused_at + 1:])
+        await replay.stop()
+        assert replay.status() == {"loaded": False, "running": False}
+
+    asyncio.run(scenario())
+    print("Flight replay OK")
+
+
+def test_flight_export_formats(tmp_path, monkeypatch):
+    """Exports stream per-column .npy / .npz and CSV / GPX / KML from the memory-mapped segments."""
+    import asyncio
+    import io
+    import numpy as np
+    from backend.src.telemetry import export
+    from backend.src.telemetry.recorder import FlightLog, FlightRecorder
+    from backend.src.telemetry.store import TelemetryStore
+
+    store = TelemetryStore(capacity=10000)
+    recorder = FlightRecorder(store, directory=tmp_path / "flights", flush_interval_s=60)
+
+    async def record():
+        await recorder.start()
+        for i in range(5000):
+            store.append(ts=1000.0 + i / 10, altitude_m=i / 100, lat=36.8 + i * 1e-6, lon=10.18,
+                         gps_alt_m=50.0, gps_fix=1 if i else 0, num_satellites=9)
+        await recorder.stop()
+
+    asyncio.run(record())
+    monkeypatch.setattr(export, "CHUNK_ROWS", 1000)
+    with FlightLog(tmp_path / "flights" / recorder.flight_id) as log:
+        npz = b"".join(export.export_stream(log, "npz", ["alt", "ts", "num_satellites"])[0])
+        data = np.load(io.BytesIO(npz))
+        assert sorted(data.files) == ["altitude_m", "num_satellites", "ts"]
+        assert len(data["ts"]) == 5000 and data["altitude_m"][4321] == np.float32(43.21)
+        assert data["num_satellites"].dtype == np.uint8
+
+        paths = export.write_npy_columns(log, tmp_path / "cols", ["lat", "ts"], t0=1100.0, t1=1199.95)
+        lat = np.load(paths[0], mmap_mode="r")
+        assert len(lat) == 1000 and lat[0] == 36.8 + 1000 * 1e-6
+
+        csv = b"".join(export.iter_csv(log, ["altitude_m", "gps_fix"], t1=1000.1)).decode().splitlines()
+        assert csv == ["ts,altitude_m,gps_fix", "1000.000,0,0", "1000.100,0.01,1"]
+
+        gpx = b"".join(export.iter_gpx(log)).decode()
+        assert gpx.count("<trkpt") == 5000
+        assert '<time>1970-01-01T00:16:40.000Z</time>' in gpx
+        kml = b"".join(export.iter_kml(log, t0=1499.05)).decode()
+        assert kml.count(",") == 2 * 9
+
+        try:
+            export.export_stream(log, "npy", ["alt", "lat"])
+            assert False, "npy with two fields accepted"
+        except ValueError:
+            pass
+    print("Flight export OK")
@@ -0,0 +1,378 @@
+"""
+AquaWing - UART protocol / link tests
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def test_frame_roundtrip():
+    """Encode/decode a framed PID update."""
+    from backend.src.uart.protocol import encode_message, decode_message, MessageType
+
+    data = encode_message(MessageType.PID_UPDATE, {'axis': 'roll', 'kp': 1.5, 'ki': 0.1, 'kd': 0.01})
+    msg_type, payload = decode_message(data)
+    assert msg_type == MessageType.PID_UPDATE
+    assert len(payload) == 13
+
+    # A single flipped bit must be rejected
+    corrupted = bytearray(data)
+    corrupted[7] ^= 0x01
+    assert decode_message(bytes(corrupted)) == (None, b'')
+    print("Frame roundtrip OK")
+
+
+def test_frame_decoder_resync():
+    """Streaming decoder handles split chunks, garbage and corrupted frames."""
+    from backend.src.uart.protocol import encode_frame, FrameDecoder, MessageType
+
+    frames = [encode_frame(MessageType.TELEMETRY_DATA, bytes([i]) * 20, seq=i) for i in range(10)]
+    bad = bytearray(frames[3])
+    bad[10] ^= 0xFF
+    stream = b'\x00\xAA\x13' + b''.join(frames[:3]) + bytes(bad) + b'garbage' + b''.join(frames[4:])
+
+    decoder = FrameDecoder(buffer_size=64)
+    got = []
+    # feed in awkward chunk sizes to exercise partial frames
+    for i in range(0, len(stream), 7):
+        for f in decoder.feed(stream[i:i + 7]):
+            got.append((f.msg_type, f.seq, bytes(f.payload)))
+
+    assert [seq for _, seq, _ in got] == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert all(p == bytes([seq]) * 20 for _, seq, p in got)
+    assert decoder.crc_errors == 1
+    assert decoder.buffered() == 0
+
+    # one big chunk larger than the buffer
+    decoder = FrameDecoder(buffer_size=64)
+    assert len(decoder.feed(b''.join(frames) * 5)) == 50
+    print("Frame decoder OK")
+
+
+def test_async_link_pty():
+    """AsyncUARTLink reads frames and writes bytes through a pseudo-terminal."""
+    import asyncio
+    import os
+    import tty
+    from backend.src.uart.async_link import AsyncUARTLink
+    from backend.src.uart.protocol import encode_frame, MessageType
+
+    master, slave = os.openpty()
+    tty.setraw(master)
+
+    async def run():
+        link = AsyncUARTLink(port=os.ttyname(slave), baudrate=115200)
+        assert await link.open() is True
+        seen = []
+        link.add_handler(lambda f: seen.append(bytes(f.payload)), MessageType.HEARTBEAT)
+
+        os.write(master, encode_frame(MessageType.TELEMETRY_DATA, b'abc', seq=1)
+                 + encode_frame(MessageType.HEARTBEAT, b'\x01\x02', seq=2))
+        first = await asyncio.wait_for(link.recv(), 2.0)
+        second = await asyncio.wait_for(link.recv(), 2.0)
+        assert (first.msg_type, first.seq, first.payload) == (MessageType.TELEMETRY_DATA, 1, b'abc')
+        assert second.msg_type == MessageType.HEARTBEAT
+        assert seen == [b'\x01\x02']
+
+        out = encode_frame(MessageType.ARM)
+        assert await link.send(out) is True
+        await asyncio.sleep(0.05)
+        assert os.read(master, 64) == out
+        link.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        os.close(master)
+        os.close(slave)
+    print("Async UART link OK")
+
+
+def test_link_manager_reconnect():
+    """ManagedLink opens lazily, reports state and retries a missing port."""
+    import asyncio
+    import os
+    from backend.src.uart.link_manager import LinkManager, LinkState
+
+    master, slave = os.openpty()
+    fc_cfg = {"port": os.ttyname(slave), "baudrate": 115200, "label": "FC test"}
+    gps_cfg = {"port": "/dev/does-not-exist", "baudrate": 9600, "label": "GPS test"}
+
+    async def run():
+        mgr = LinkManager(fc_config=fc_cfg, gps_config=gps_cfg)
+        mgr.gps.min_backoff_s = 0.01
+        assert mgr.fc.state == LinkState.IDLE
+        await mgr.start()
+        assert await mgr.fc.wait_connected(2.0) is True
+        assert mgr.fc.is_connected()
+        assert await mgr.gps.wait_connected(0.1) is False
+        await asyncio.sleep(0.05)
+        assert mgr.gps.attempts >= 2
+        assert mgr.status()["gps"]["connected"] is False
+        await mgr.stop()
+        assert mgr.fc.state == LinkState.STOPPED
+
+    try:
+        asyncio.run(run())
+    finally:
+        os.close(master)
+        os.close(slave)
+    print("Link manager OK")
+
+
+def test_command_scheduler_priority_ack_coalesce():
+    """Safety commands preempt bulk traffic, ACKs resolve futures, PID updates coalesce."""
+    import asyncio
+    from backend.src.uart.protocol import ACK_STRUCT, AckStatus, Frame, FrameDecoder, MessageType
+    from backend.src.uart.scheduler import CommandScheduler, Priority
+
+    class FakeLink:
+        config = {"baudrate": 115200}
+
+        def __init__(self):
+            self.decoder = FrameDecoder()
+            self.sent = []
+            self.handlers = {}
+
+        def add_handler(self, cb, msg_type=None):
+            self.handlers[msg_type] = cb
+
+        def is_connected(self):
+            return True
+
+        async def send(self, data):
+            for f in self.decoder.feed(data):
+                self.sent.append((f.msg_type, f.seq))
+            return True
+
+        def ack(self, seq, status=AckStatus.OK):
+            self.handlers[MessageType.ACK](Frame(MessageType.ACK, 0, ACK_STRUCT.pack(seq, status)))
+
+    async def run():
+        link = FakeLink()
+        sched = CommandScheduler(link, window=2, ack_timeout_s=0.05, max_retries=1)
+        bulk = [sched.submit(MessageType.MISSION_ITEM, b'x' * 18, Priority.BULK) for _ in range(3)]
+        pids = [sched.submit(MessageType.PID_UPDATE, {'axis': 'yaw', 'kp': float(i), 'ki': 0.0, 'kd': 0.0}, key=('pid', 'yaw'))
+                for i in range(10)]
+        abort = sched.submit(MessageType.ABORT, priority=Priority.SAFETY)
+        await asyncio.sleep(0.01)
+
+        # only the ABORT goes out; everything else waits for its ACK
+        assert [t for t, _ in link.sent] == [MessageType.ABORT]
+        link.ack(link.sent[0][1])
+        assert (await abort)["status"] == "acked"
+        await asyncio.sleep(0.01)
+
+        types = [t for t, _ in link.sent]
+        assert types[1] == MessageType.PID_UPDATE
+        assert types.count(MessageType.PID_UPDATE) == 1        # ten updates coalesced
+        assert len(set(pids)) == 1
+        for msg_type, seq in list(link.sent):
+            link.ack(seq)
+        assert (await pids[0])["status"] == "acked"
+
+        # remaining bulk items: ack as they go out
+        for _ in range(20):
+            for msg_type, seq in link.sent:
+                link.ack(seq)
+            await asyncio.sleep(0.01)
+        assert all(f.done() and f.result()["status"] == "acked" for f in bulk)
+
+        # no ACK at all -> retried with the same seq, then timeout
+        sent_before = len(link.sent)
+        lost = sched.submit(MessageType.ARM)
+        result = await asyncio.wait_for(lost, 1.0)
+        assert result["status"] == "timeout" and result["attempts"] == 2
+        attempts = link.sent[sent_before:]
+        assert len(attempts) == 2 and attempts[0] == attempts[1] == (MessageType.ARM, result["seq"])
+
+        # ACK of the first attempt arriving after the retry went out still completes it
+        sent_before = len(link.sent)
+        takeoff = sched.submit(MessageType.TAKEOFF, {'alt': 10.0})
+        while len(link.sent) < sent_before + 2:
+            await asyncio.sleep(0.01)
+        link.ack(link.sent[sent_before][1])
+        result = await asyncio.wait_for(takeoff, 1.0)
+        assert result["status"] == "acked" and result["attempts"] == 2
+        await sched.stop()
+
+    asyncio.run(run())
+    print("Command scheduler OK")
+
+
+def test_codec_registry():
+    """Every codec round-trips through a frame; telemetry decodes from a memoryview."""
+    from backend.src.uart.protocol import (
+        CODECS, FrameDecoder, MessageType, TELEMETRY_FIELDS, decode_payload, encode_into, encode_message,
+    )
+
+    move = encode_message(MessageType.MOVE, {'lat': 36.8065123, 'lon': 10.1815456, 'alt': 25.0})
+    frame = FrameDecoder().feed(move)[0]
+    out = decode_payload(frame.msg_type, frame.payload)
+    assert abs(out['lat'] - 36.8065123) < 1e-7 and abs(out['lon'] - 10.1815456) < 1e-7
+
+    pid = decode_payload(MessageType.PID_UPDATE,
+                         FrameDecoder().feed(encode_message(MessageType.PID_UPDATE, {'axis': 'roll', 'kp': 2.0, 'ki': 0.0, 'kd': 0.0}))[0].payload)
+    assert pid['axis'] == 'roll' and pid['kp'] == 2.0
+
+    values = (1234, 1.0, -2.0, 90.0, 12.5, 0.5, 11.75, 77.0, 1000, 1010, 1020, 1030, 2, 1)
+    buf = bytearray(512)
+    n = encode_into(buf, MessageType.TELEMETRY_DATA, values, seq=9, offset=100)
+    frame = FrameDecoder().feed(memoryview(buf)[100:100 + n])[0]
+    assert frame.seq == 9
+    assert CODECS[MessageType.TELEMETRY_DATA].unpack_from(frame.payload) == values
+    assert len(TELEMETRY_FIELDS) == len(values)
+
+    for msg_type, codec in CODECS.items():
+        payload = {name: next(iter(codec.enums[name])) if name in codec.enums else 0 for name in codec.fields}
+        assert len(encode_message(msg_type, payload)) == codec.size + 7
+
+    # malformed commands are rejected, never sent as an empty frame
+    for msg_type, payload in (
+        (MessageType.TAKEOFF, {'altitude': 10.0}),                           # misspelled field
+        (MessageType.TAKEOFF, b''),                                          # raw bytes of the wrong size
+        (MessageType.MOVE, {'lat': 'north', 'lon': 10.0, 'alt': 20.0}),
+        (MessageType.PID_UPDATE, {'axis': 'spin', 'kp': 1.0, 'ki': 0.0, 'kd': 0.0}),
+        (MessageType.SET_SPEED, {'value': 'fast'}),
+    ):
+        try:
+            encode_message(msg_type, payload)
+            assert False, f"accepted {payload!r}"
+        except ValueError:
+            pass
+    print("Codec registry OK")
+
+
+def test_gps_parser_nmea_ubx():
+    """GPS parser decodes GGA/RMC/VTG and UBX NAV-PVT from a chunked stream."""
+    import struct
+    from functools import reduce
+    from backend.src.uart.gps_parser import GPSParser, nmea_checksum, ubx_checksum
+
+    def nmea(body):
+        assert nmea_checksum(body.encode()) == reduce(lambda a, b: a ^ b, body.encode(), 0)
+        return f"${body}*{nmea_checksum(body.encode()):02X}\r\n".encode()
+
+    gga = nmea("GNGGA,123519,3648.390,N,01010.893,E,1,08,0.9,12.4,M,46.9,M,,")
+    rmc = nmea("GPRMC,123519,A,3648.390,N,01010.893,E,004.0,084.4,230394,003.1,W")
+    vtg = nmea("GPVTG,054.7,T,034.4,M,005.5,N,010.2,K,A")
+    bad = bytearray(gga)
+    bad[10] ^= 0x01
+
+    pvt = bytearray(92)
+    struct.pack_into('<B B B B i i i i', pvt, 20, 3, 0x01, 0, 11, 101815456, 368065123, 50000, 25500)
+    struct.pack_into('<i i', pvt, 60, 2500, 9000000)
+    body = bytes([0x01, 0x07]) + struct.pack('<H', len(pvt)) + bytes(pvt)
+    ubx = b'\xB5\x62' + body + bytes(ubx_checksum(body))
+
+    stream = b'\xB5junk' + gga + bytes(bad) + rmc + ubx + b'\x00\x00' + vtg
+    parser = GPSParser()
+    updates = []
+    for i in range(0, len(stream), 5):
+        updates.extend(parser.feed(stream[i:i + 5]))
+
+    assert [u['source'] for u in updates] == ['GGA', 'RMC', 'NAV-PVT', 'VTG']
+    gga_u, rmc_u, pvt_u, vtg_u = updates
+    assert gga_u['gps_fix'] == 1 and gga_u['num_satellites'] == 8 and gga_u['gps_alt_m'] == 12.4
+    assert abs(gga_u['lat'] - (36 + 48.390 / 60)) < 1e-9 and abs(gga_u['lon'] - (10 + 10.893 / 60)) < 1e-9
+    assert abs(rmc_u['ground_speed_mps'] - 4.0 * 0.514444) < 1e-6 and rmc_u['course_deg'] == 84.4
+    assert abs(pvt_u['lat'] - 36.8065123) < 1e-7 and pvt_u['num_satellites'] == 11
+    assert pvt_u['gps_alt_m'] == 25.5 and pvt_u['ground_speed_mps'] == 2.5 and pvt_u['course_deg'] == 90.0
+    assert vtg_u['course_deg'] == 54.7 and abs(vtg_u['ground_speed_mps'] - 10.2 / 3.6) < 1e-9
+    assert parser.checksum_errors == 1
+    assert parser.stats()['buffered'] == 0
+
+    # stray '$' in the line noise must not swallow the frame behind it
+    noisy = b'$GP\x01\xfegarbage' + ubx + b'\xff$$' + gga + b'$\x00' + ubx + b'$GPR' + rmc
+    parser = GPSParser()
+    updates = []
+    for i in range(0, len(noisy), 3):
+        updates.extend(parser.feed(noisy[i:i + 3]))
+    assert [u['source'] for u in updates] == ['NAV-PVT', 'GGA', 'NAV-PVT', 'RMC']
+    assert parser.checksum_errors == 0 and parser.stats()['buffered'] == 0
+    print("GPS parser OK")
+
+
+def test_hil_simulator_end_to_end():
+    """Links talk to the PTY simulator: telemetry, GPS fixes and ACKed commands."""
+    import asyncio
+    from backend.src.telemetry.store import TelemetryStore
+    from backend.src.uart.link_manager import LinkManager
+    from backend.src.uart.protocol import MessageType
+    from backend.src.uart.scheduler import Priority
+    from backend.src.uart.simulator import HOME_LAT, UARTSimulator
+
+    async def run():
+        sim = UARTSimulator(fc_rate_hz=100, gps_rate_hz=20, gps_format="ubx")
+        await sim.start()
+        mgr = LinkManager(
+            fc_config={"port": sim.fc_port, "baudrate": 115200, "label": "FC sim"},
+            gps_config={"port": sim.gps_port, "baudrate": 9600, "label": "GPS sim"},
+        )
+        store = TelemetryStore(capacity=100)
+        mgr.fc.add_handler(store.on_fc_frame, MessageType.TELEMETRY_DATA)
+        mgr.gps.add_handler(store.on_gps_update)
+        try:
+            await mgr.start()
+            assert await mgr.fc.wait_connected(2.0) and await mgr.gps.wait_connected(2.0)
+            result = await asyncio.wait_for(mgr.commands.submit(MessageType.ARM, priority=Priority.CONTROL), 2.0)
+            assert result["status"] == "acked"
+            await asyncio.sleep(0.3)
+        finally:
+            await mgr.stop()
+            await sim.stop()
+
+        assert store.count >= 5
+        assert store.latest()['armed'] == 1
+        assert store.gps()['gps_fix'] == 1 and abs(store.gps()['lat'] - HOME_LAT) < 0.01
+        assert sim.commands_rx == 1 and sim.acks_sent == 1
+
+    asyncio.run(run())
+    print("HIL simulator OK")
+
+
+def test_heartbeat_rtt_and_link_lost():
+    """Heartbeats measure RTT against the simulator and signal loss / recovery."""
+    import asyncio
+    from backend.src.safety.supervisor import SafetySupervisor
+    from backend.src.uart.heartbeat import HeartbeatMonitor, LinkHealth
+    from backend.src.uart.link_manager import ManagedLink
+    from backend.src.uart.simulator import UARTSimulator
+
+    async def run():
+        sim = UARTSimulator(fc_rate_hz=0, gps_rate_hz=0)
+        await sim.start()
+        link = ManagedLink("fc", {"port": sim.fc_port, "baudrate": 115200, "label": "FC sim"}, queue_size=0)
+        monitor = HeartbeatMonitor(link, interval_s=0.02, reply_timeout_s=0.05, lost_after_s=0.15)
+        supervisor = SafetySupervisor()
+        monitor.on_link_lost(supervisor.on_link_lost)
+        monitor.on_link_restored(supervisor.on_link_restored)
+        try:
+            link.ensure_started()
+            assert await link.wait_connected(2.0)
+            monitor.start()
+            await asyncio.sleep(0.2)
+            assert monitor.state == LinkHealth.OK
+            assert monitor.received >= 3 and 0 < monitor.last_rtt_ms < 50
+            assert monitor.status()["loss_pct"] == 0.0
+
+            sim.mute = True
+            await asyncio.sleep(0.3)     # lost_after_s + interval_s bound
+            assert monitor.state == LinkHealth.LOST and monitor.lost_events == 1
+            assert supervisor.links_ok == {"fc": False}
+            assert supervisor.check_constraints({}) is False
+            assert monitor.loss_pct() > 0
+
+            sim.mute = False
+            await asyncio.sleep(0.1)
+            assert monitor.state == LinkHealth.OK and supervisor.links_ok == {"fc": True}
+            assert sim.heartbeats >= 3
+        finally:
+            await monitor.stop()
+            await link.stop()
+            await sim.stop()
+
+    asyncio.run(run())
+    print("Heartbeat OK")